@@ -1,14 +1,45 @@
+import io
+import json
+
 import pendulum
-from typing import Optional, Union, TypeVar, Type
+from typing import List, Optional, Tuple, Union, TypeVar, Type
 
-from molten import Route, schema, field, HTTP_404
+from molten import Route,\
+    schema,\
+    field,\
+    load_schema,\
+    Header,\
+    HTTPError,\
+    RequestBody,\
+    ValidationError,\
+    BaseApp,\
+    QueryParam,\
+    QueryParams,\
+    Response,\
+    StreamingResponse,\
+    HTTP_200,\
+    HTTP_400,\
+    HTTP_404,\
+    HTTP_413
 
 from models import ChoreInstanceManager,\
     FrequencyTypes,\
     ChoreDefinitionManager,\
-    ChoreDefinition
+    ChoreDefinition,\
+    ChoreRow,\
+    UserProvider,\
+    VersionManager,\
+    isoformat_utc
 from auth import AuthProvider
 from validators import PendulumValidator
+from pagination import Page, stream_json_array
+from rendering import dumps
+from recurrence import project
+from forecast import ForecastCache, forecast
+from upcoming_cache import UpcomingCache
+from conditional import conditional_get, digest
+from changes import ChangeFeed, change_token
+from timing import query_budget
 
 
 T = TypeVar('T', bound='Chore')
@@ -38,7 +69,7 @@ class Chore:
     )
 
     @classmethod
-    def from_chore_model(cls: Type[T], chore_model: ChoreDefinition) -> T:
+    def from_chore_model(cls: Type[T], chore_model: Union[ChoreDefinition, ChoreRow]) -> T:
         return cls(
             id=chore_model.id,
             name=chore_model.name,
@@ -49,21 +80,124 @@ class Chore:
         )
 
 
-def get_upcoming(chore_instance_manager: ChoreInstanceManager, auth_provider: AuthProvider) -> list:
-    upcoming_chores = chore_instance_manager.get_upcoming_chores()
-    return [{
+def upcoming_chore_to_dict(upcoming_chore) -> dict:
+    return {
         'id': upcoming_chore.id,
         'name': upcoming_chore.name,
-        'dueDate': str(upcoming_chore.due_date),
+        'dueDate': isoformat_utc(upcoming_chore.due_date),
         'details': upcoming_chore.details
-    } for upcoming_chore in upcoming_chores]
+    }
+
+
+def json_stream_response(items) -> StreamingResponse:
+    return StreamingResponse(HTTP_200, content=stream_json_array(items), headers={
+        'content-type': 'application/json; charset=utf-8',
+    })
+
+
+def cached_upcoming_response(
+    chore_instance_manager: ChoreInstanceManager,
+    upcoming_cache: UpcomingCache,
+    version: str,
+) -> Response:
+    owner_id = chore_instance_manager.user_provider.get_user().id
+    payload = upcoming_cache.get(owner_id, version)
+    if payload is None:
+        upcoming_chores = chore_instance_manager.get_upcoming_chore_rows()
+        payload = dumps([upcoming_chore_to_dict(upcoming_chore) for upcoming_chore in upcoming_chores])
+        upcoming_cache.set(owner_id, version, payload, ttl=chore_instance_manager.seconds_until_upcoming_changes())
+
+    return Response(HTTP_200, stream=io.BytesIO(payload), headers={
+        'content-type': 'application/json; charset=utf-8',
+    })
+
+
+@conditional_get('upcoming')
+@query_budget(4)
+def get_upcoming(
+    chore_instance_manager: ChoreInstanceManager,
+    auth_provider: AuthProvider,
+    app: BaseApp,
+    upcoming_cache: UpcomingCache,
+    version_manager: VersionManager,
+    limit: Optional[QueryParam],
+    cursor: Optional[QueryParam],
+    stream: Optional[QueryParam],
+) -> list:
+    if stream in ('1', 'true'):
+        return json_stream_response(
+            upcoming_chore_to_dict(upcoming_chore)
+            for upcoming_chore in chore_instance_manager.iter_upcoming_chore_rows()
+        )
+
+    if limit is None and cursor is None:
+        version = digest(version_manager.current_version_stamp(upcoming=True))
+        return cached_upcoming_response(chore_instance_manager, upcoming_cache, version)
+
+    page = Page.from_params(limit, cursor)
+    upcoming_chores = chore_instance_manager.get_upcoming_chore_rows(limit=page.fetch_limit, after=page.after)
+    upcoming_chores, headers = page.paginate(
+        upcoming_chores,
+        app.reverse_uri('api:get-upcoming'),
+        key=lambda upcoming_chore: (upcoming_chore.due_date, upcoming_chore.id),
+    )
+    return HTTP_200, [upcoming_chore_to_dict(upcoming_chore) for upcoming_chore in upcoming_chores], headers
+
+
+MAX_CHANGES_TIMEOUT = 25
+
+
+@query_budget(3)
+def get_changes(
+    version_manager: VersionManager,
+    change_feed: ChangeFeed,
+    since: Optional[QueryParam],
+    timeout: Optional[QueryParam],
+) -> dict:
+    try:
+        timeout = float(timeout) if timeout is not None else MAX_CHANGES_TIMEOUT
+    except ValueError:
+        raise HTTPError(HTTP_400, {'errors': {'timeout': 'must be a number'}})
+
+    if not 0 <= timeout <= MAX_CHANGES_TIMEOUT:
+        raise HTTPError(HTTP_400, {'errors': {'timeout': f'must be between 0 and {MAX_CHANGES_TIMEOUT}'}})
 
+    owner_id = version_manager.user_provider.get_user().id
+    with change_feed.watch(owner_id) as changed:
+        version = change_token(version_manager.get_version_stamp(upcoming=True))
+        if since == version and timeout:
+            # Hand the connection back to the pool for the duration of the wait.
+            version_manager.session.commit()
+            changed.wait(timeout)
+            version = change_token(version_manager.get_version_stamp(upcoming=True))
 
+    return HTTP_200, {
+        'version': version,
+        'changed': since is not None and since != version,
+    }, {'cache-control': 'no-store'}
+
+
+@query_budget(4)
 def complete_upcoming(chore_id: str, chore_instance_manager: ChoreInstanceManager) -> dict:
     chore_instance_manager.complete_chore(chore_id)
     return {}
 
 
+@schema
+class CompleteChores:
+    ids: List[str] = field(min_items=1, max_items=500)
+
+
+@query_budget(4)
+def complete_upcoming_batch(complete: CompleteChores, chore_instance_manager: ChoreInstanceManager) -> dict:
+    results = chore_instance_manager.complete_chores(complete.ids)
+    return {
+        'results': [{'id': chore_id, 'completed': completed} for chore_id, completed in results.items()],
+    }
+
+
+@conditional_get()
+@query_budget(3)
 def get_chore(chore_id: str, chore_manager: ChoreDefinitionManager) -> dict:
     chore_model = chore_manager.get_chore(chore_id)
     if not chore_model:
@@ -71,16 +205,189 @@ def get_chore(chore_id: str, chore_manager: ChoreDefinitionManager) -> dict:
     return Chore.from_chore_model(chore_model)
 
 
-def get_chores(chore_manager: ChoreDefinitionManager) -> Chore:
-    chores = chore_manager.get_chores()
-    return [Chore.from_chore_model(chore_model) for chore_model in chores]
+MAX_SCHEDULE_COUNT = 366
+
+
+@conditional_get()
+@query_budget(4)
+def get_chore_schedule(chore_id: str, count: Optional[QueryParam], chore_manager: ChoreDefinitionManager) -> dict:
+    try:
+        count = int(count) if count is not None else 10
+    except ValueError:
+        raise HTTPError(HTTP_400, {'errors': {'count': 'must be an integer'}})
 
+    if not 1 <= count <= MAX_SCHEDULE_COUNT:
+        raise HTTPError(HTTP_400, {'errors': {'count': f'must be between 1 and {MAX_SCHEDULE_COUNT}'}})
+
+    chore_model = chore_manager.get_chore(chore_id)
+    if not chore_model:
+        return HTTP_404, 'not found'
+
+    start = chore_manager.get_next_due_date(chore_model) or pendulum.now('UTC')
+    occurrences = [start] + project(
+        [start],
+        [chore_model.frequency_type],
+        [chore_model.frequency_amount],
+        count - 1,
+    )[0]
+    return {
+        'id': chore_model.id,
+        'occurrences': [isoformat_utc(occurrence) for occurrence in occurrences],
+    }
+
+
+@conditional_get()
+@query_budget(4)
+def get_chore_history(
+    chore_id: str,
+    chore_manager: ChoreDefinitionManager,
+    app: BaseApp,
+    limit: Optional[QueryParam],
+    cursor: Optional[QueryParam],
+) -> dict:
+    if not chore_manager.get_chore(chore_id):
+        return HTTP_404, 'not found'
 
+    page = Page.from_params(limit, cursor)
+    rows = chore_manager.get_history_rows(chore_id, limit=page.fetch_limit, after=page.after)
+    rows, headers = page.paginate(
+        rows,
+        app.reverse_uri('api:get-chore-history', chore_id=chore_id),
+        key=lambda row: (row.due_date, row.id),
+    )
+    return HTTP_200, [{
+        'id': row.id,
+        'dueDate': isoformat_utc(row.due_date),
+        'completedAt': isoformat_utc(row.completed_at),
+    } for row in rows], headers
+
+
+@conditional_get()
+@query_budget(3)
+def get_chore_stats(chore_id: str, chore_manager: ChoreDefinitionManager) -> dict:
+    stats = chore_manager.get_stats_row(chore_id)
+    if not stats:
+        return HTTP_404, 'not found'
+
+    completions = stats.completions
+    return {
+        'id': stats.id,
+        'completions': completions,
+        'onTimeRatio': stats.on_time / completions if completions else None,
+        'averageLatenessSeconds': stats.total_lateness / completions if completions else None,
+        'currentStreak': stats.current_streak,
+        'lastCompletedAt': isoformat_utc(stats.last_completed_at) if stats.last_completed_at else None,
+    }
+
+
+MAX_FORECAST_DAYS = 366 * 5
+
+
+def parse_forecast_window(params: QueryParams) -> Tuple[pendulum.DateTime, pendulum.DateTime]:
+    try:
+        start = pendulum.parse(params.get('from')) if params.get('from') else pendulum.today('UTC')
+        end = pendulum.parse(params.get('to')) if params.get('to') else start.add(days=30)
+    except (ValueError, TypeError):
+        raise HTTPError(HTTP_400, {'errors': 'from and to must be ISO 8601 dates'})
+
+    if end < start or (end - start).in_days() > MAX_FORECAST_DAYS:
+        raise HTTPError(HTTP_400, {'errors': f'the window must span 0 to {MAX_FORECAST_DAYS} days'})
+
+    return start, end
+
+
+@conditional_get('daily')
+@query_budget(3)
+def get_forecast(
+    params: QueryParams,
+    chore_manager: ChoreDefinitionManager,
+    user_provider: UserProvider,
+    forecast_cache: ForecastCache,
+    version_manager: VersionManager,
+) -> list:
+    start, end = parse_forecast_window(params)
+    owner_id = user_provider.get_user().id
+    version = digest(version_manager.current_version_stamp())
+    window = (start.isoformat(), end.isoformat())
+
+    cached = forecast_cache.get(owner_id, version, window)
+    if cached is not None:
+        return cached
+
+    rows = chore_manager.get_forecast_rows()
+    return json_stream_response(forecast_cache.record(owner_id, version, window, forecast(rows, start, end)))
+
+
+@conditional_get()
+@query_budget(3)
+def get_chores(
+    chore_manager: ChoreDefinitionManager,
+    app: BaseApp,
+    limit: Optional[QueryParam],
+    cursor: Optional[QueryParam],
+    stream: Optional[QueryParam],
+) -> Chore:
+    if stream in ('1', 'true'):
+        return json_stream_response(
+            Chore.from_chore_model(chore_model)
+            for chore_model in chore_manager.iter_chore_rows()
+        )
+
+    page = Page.from_params(limit, cursor)
+    chores = chore_manager.get_chore_rows(limit=page.fetch_limit, after=page.after)
+    chores, headers = page.paginate(
+        chores,
+        app.reverse_uri('api:get-chores'),
+        key=lambda chore_model: (chore_model.created_at, chore_model.id),
+    )
+    return HTTP_200, [Chore.from_chore_model(chore_model) for chore_model in chores], headers
+
+
+@query_budget(4)
 def create_chore(chore: Chore, chore_manager: ChoreDefinitionManager) -> Chore:
     chore_model = chore_manager.persist_chore(chore)
     return Chore.from_chore_model(chore_model)
 
 
+MAX_BULK_CHORES = 10000
+
+
+def parse_bulk_chores(body: str, content_type: Optional[str]) -> List[Chore]:
+    try:
+        if content_type and content_type.startswith('application/x-ndjson'):
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError:
+        raise HTTPError(HTTP_400, {'errors': 'invalid JSON'})
+
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise HTTPError(HTTP_400, {'errors': 'expected an array of chores'})
+
+    if len(items) > MAX_BULK_CHORES:
+        raise HTTPError(HTTP_413, {'errors': f'at most {MAX_BULK_CHORES} chores per request'})
+
+    chores, errors = [], {}
+    for index, item in enumerate(items):
+        try:
+            chores.append(load_schema(Chore, item))
+        except ValidationError as e:
+            errors[index] = e.reasons
+
+    if errors:
+        raise HTTPError(HTTP_400, {'errors': errors})
+
+    return chores
+
+
+# Definitions, instances and stats rows are inserted in batches of 1000.
+@query_budget(1 + 3 * MAX_BULK_CHORES // 1000)
+def create_chores(body: RequestBody, content_type: Optional[Header], chore_manager: ChoreDefinitionManager) -> dict:
+    chores = parse_bulk_chores(body, content_type)
+    return {'ids': chore_manager.persist_chores(chores)}
+
+
+@query_budget(4)
 def delete_chore(chore_id: str, chore_manager: ChoreDefinitionManager) -> str:
     chore_manager.delete_chore(chore_id)
     return ''
@@ -88,9 +395,17 @@ def delete_chore(chore_id: str, chore_manager: ChoreDefinitionManager) -> str:
 
 routes = [
     Route('/upcoming', get_upcoming, method='GET', name='get-upcoming'),
+    Route('/changes', get_changes, method='GET', name='get-changes'),
     Route('/upcoming/{chore_id}', complete_upcoming, method='POST', name='complete-upcoming'),
+    # molten matches the most recently added route first.
+    Route('/upcoming/complete', complete_upcoming_batch, method='POST', name='complete-upcoming-batch'),
+    Route('/forecast', get_forecast, method='GET', name='get-forecast'),
     Route('/chores', get_chores, method='GET', name='get-chores'),
     Route('/chores', create_chore, method='POST', name='create-chore'),
     Route('/chores/{chore_id}', get_chore, method='GET', name='get-chore'),
+    Route('/chores/{chore_id}/schedule', get_chore_schedule, method='GET', name='get-chore-schedule'),
+    Route('/chores/{chore_id}/history', get_chore_history, method='GET', name='get-chore-history'),
+    Route('/chores/{chore_id}/stats', get_chore_stats, method='GET', name='get-chore-stats'),
+    Route('/chores/bulk', create_chores, method='POST', name='create-chores'),
     Route('/chores/{chore_id}', delete_chore, method='DELETE', name='delete-chore'),
 ]
@@ -0,0 +1,121 @@
+import argparse
+import logging
+import time
+from threading import Event
+from typing import Optional
+
+import pendulum
+from molten import Settings
+from sqlalchemy import literal, or_, select, true
+from sqlalchemy.orm import sessionmaker
+
+from models import ArchivedChoreInstance, ChoreInstance, NotificationLog, PendulumDateTime
+
+
+logger = logging.getLogger('archive')
+
+ARCHIVED_COLUMNS = [
+    'id',
+    'created_at',
+    'updated_at',
+    'deleted',
+    'name',
+    'details',
+    'owner_id',
+    'chore_definition_id',
+    'due_date',
+    'completed',
+]
+
+
+class Archiver:
+    def __init__(self, session_factory: sessionmaker, retention_days: int = 90, batch_size: int = 500):
+        self.session_factory = session_factory
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+
+    def cutoff(self) -> pendulum.DateTime:
+        return pendulum.now('UTC').subtract(days=self.retention_days)
+
+    def archive_batch(self, cutoff: pendulum.DateTime) -> int:
+        # Each batch is its own short transaction, so the live table is only
+        # locked for one batch at a time and an interrupted run simply picks
+        # up whatever is still old enough on the next one.
+        live = ChoreInstance.__table__
+        archive = ArchivedChoreInstance.__table__
+        notification_log = NotificationLog.__table__
+        session = self.session_factory()
+        try:
+            ids = [row[0] for row in session.query(ChoreInstance.id)
+                   .filter(or_(ChoreInstance.completed == true(), ChoreInstance.deleted == true()))
+                   .filter(ChoreInstance.updated_at < cutoff)
+                   .order_by(ChoreInstance.updated_at.asc())
+                   .limit(self.batch_size)]
+            if not ids:
+                return 0
+
+            archived_at = literal(pendulum.now('UTC'), PendulumDateTime(timezone=True))
+            session.execute(archive.insert().from_select(
+                ARCHIVED_COLUMNS + ['archived_at'],
+                select([live.c[name] for name in ARCHIVED_COLUMNS] + [archived_at])
+                .where(live.c.id.in_(ids)),
+            ))
+            session.execute(notification_log.delete().where(notification_log.c.instance_id.in_(ids)))
+            session.execute(live.delete().where(live.c.id.in_(ids)))
+            session.commit()
+            return len(ids)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def run(self, max_batches: Optional[int] = None, pause: float = 0, stop: Optional[Event] = None) -> int:
+        cutoff = self.cutoff()
+        archived = batches = 0
+        while max_batches is None or batches < max_batches:
+            if stop is not None and stop.is_set():
+                break
+
+            count = self.archive_batch(cutoff)
+            archived += count
+            batches += 1
+            if count < self.batch_size:
+                break
+
+            if pause:
+                time.sleep(pause)
+
+        logger.info('archived %d chore instances older than %s', archived, cutoff.isoformat())
+        return archived
+
+
+def create_archiver(settings: Settings, session_factory: sessionmaker) -> Archiver:
+    return Archiver(
+        session_factory,
+        retention_days=settings.get('archive_retention_days', 90),
+        batch_size=settings.get('archive_batch_size', 500),
+    )
+
+
+def main():
+    from factory import get_settings
+    from jobs import create_session_factory
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description='Move old completed and deleted chore instances to the archive.')
+    parser.add_argument('--retention-days', type=int, default=settings.get('archive_retention_days', 90))
+    parser.add_argument('--batch-size', type=int, default=settings.get('archive_batch_size', 500))
+    parser.add_argument('--max-batches', type=int, default=None)
+    parser.add_argument('--pause', type=float, default=settings.get('archive_pause', 0))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    archiver = create_archiver(settings, create_session_factory(settings))
+    archiver.retention_days = args.retention_days
+    archiver.batch_size = args.batch_size
+    archiver.run(max_batches=args.max_batches, pause=args.pause)
+
+
+if __name__ == '__main__':
+    main()
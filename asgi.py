@@ -0,0 +1,5 @@
+from asgi_adapter import ASGIApp
+from factory import create_app
+
+
+app = ASGIApp(create_app())
@@ -0,0 +1,227 @@
+import asyncio
+import io
+import json
+import sys
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional
+
+from molten import App, Settings
+
+from auth import AuthProviderComponent,\
+    IdentityCache,\
+    IdentityRejected,\
+    IDENTITY_USER_PATH,\
+    token_digest,\
+    user_from_identity_response
+from cache import AsyncSingleFlight
+
+
+class AsyncIdentityClient:
+    def __init__(
+        self,
+        identity_host: str,
+        pool_size: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+    ):
+        import httpx
+
+        self.host = identity_host
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+
+    async def get_user_from_token(self, token: str) -> Optional[dict]:
+        resp = await self.client.get(f'{self.host}{IDENTITY_USER_PATH}', headers={
+            'Authorization': f'Bearer {token}'
+        })
+        return user_from_identity_response(resp.status_code, resp.json)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class ASGIApp:
+    def __init__(
+        self,
+        app: App,
+        identity_client: Optional[AsyncIdentityClient] = None,
+        executor: Optional[Executor] = None,
+    ):
+        self.app = app
+        settings = app.injector.get_resolver().resolve(_get_settings)()
+        self.identity_cache = _get_identity_cache(app, settings)
+        if identity_client is None:
+            identity_client = AsyncIdentityClient(
+                settings['identity_server'],
+                pool_size=settings.get('identity_pool_size', 10),
+                connect_timeout=settings.get('identity_connect_timeout', 3.05),
+                read_timeout=settings.get('identity_read_timeout', 10),
+            )
+        self.identity_client = identity_client
+        self.flight = AsyncSingleFlight()
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=settings.get('asgi_thread_pool_size', 8))
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        if scope['type'] != 'http':
+            return
+
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        if scope['method'] == 'OPTIONS' and 'access-control-request-method' in headers:
+            return await self.preflight(headers, send)
+
+        body = await read_body(receive)
+        if scope['method'] == 'POST' and scope['path'] == '/login':
+            await self.prefetch_identity(body)
+
+        await self.call_wsgi(scope, body, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.identity_client.close()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def preflight(self, headers: dict, send):
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': cors_headers() + [
+                (b'access-control-allow-methods', headers['access-control-request-method'].encode('latin-1')),
+                (b'access-control-allow-headers', headers.get('access-control-request-headers', '*').encode('latin-1')),
+                (b'content-length', b'0'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def prefetch_identity(self, body: bytes):
+        # The identity lookup is the only network call /login makes.  Doing it
+        # here, without holding a worker thread, lets the shared login handler
+        # read the result straight out of the identity cache.
+        try:
+            token = json.loads(body.decode('utf-8'))['token']
+        except (ValueError, KeyError, TypeError):
+            return
+
+        if not isinstance(token, str):
+            return
+
+        key = token_digest(token)
+        if self.identity_cache.is_cached(key):
+            return
+
+        async def fetch():
+            try:
+                user = await self.identity_client.get_user_from_token(token)
+            except IdentityRejected:
+                self.identity_cache.reject(key)
+            else:
+                self.identity_cache.store(key, user)
+
+        try:
+            await self.flight.do(key, fetch)
+        except Exception:
+            # Leave the lookup to the synchronous path, which reports errors
+            # the same way it always has.
+            pass
+
+    async def call_wsgi(self, scope, body: bytes, send):
+        loop = asyncio.get_event_loop()
+        environ = to_environ(scope, body)
+        response = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = response_headers
+
+        def start():
+            chunks = self.app(environ, start_response)
+            return chunks, iter(chunks)
+
+        chunks, iterator = await loop.run_in_executor(self.executor, start)
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': response['status'],
+                'headers': [
+                    (name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in response['headers']
+                    if name.lower() != 'transfer-encoding'
+                ] + cors_headers(),
+            })
+            while True:
+                chunk = await loop.run_in_executor(self.executor, next, iterator, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                await loop.run_in_executor(self.executor, close)
+
+
+def cors_headers() -> list:
+    return [(b'access-control-allow-origin', b'*')]
+
+
+async def read_body(receive) -> bytes:
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body', False):
+            return body
+
+
+def to_environ(scope, body: bytes) -> dict:
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def _get_settings(settings: Settings) -> Settings:
+    return settings
+
+
+def _get_identity_cache(app: App, settings: Settings) -> IdentityCache:
+    for component in app.injector.components:
+        if isinstance(component, AuthProviderComponent):
+            return component.get_identity_cache(settings)
+    return IdentityCache()
@@ -1,17 +1,30 @@
-import json
+import hashlib
+from io import BytesIO
 from inspect import Parameter
-from typing import Any, Callable, Optional
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
 
-import requests
 import pendulum
-from jose import jwt, JWTError
-from molten import schema, Settings, HTTP_401, HTTP_403, Response, HTTP_200, Header
+from molten import schema, Settings, HTTP_401, HTTP_403, Response, HTTP_200, Header, Route
 from models import UserProvider, User
+from cache import LRUCache, SingleFlight
+from rendering import dumps
+from timing import phase
+
+if TYPE_CHECKING:
+    import requests
+
+
+IDENTITY_USER_PATH = '/.netlify/identity/user'
 
 
 def auth_middleware(handler: Callable[..., Any]) -> Callable[..., Any]:
-    def middleware(authorization: Optional[Header], auth_provider: AuthProvider, user_provider: UserProvider) -> Any:
-        if getattr(handler, 'exclude_auth', False):
+    def middleware(
+        route: Optional[Route],
+        authorization: Optional[Header],
+        auth_provider: AuthProvider,
+        user_provider: UserProvider,
+    ) -> Any:
+        if getattr(route.handler if route else handler, 'exclude_auth', False):
             return handler()
 
         if not authorization:
@@ -21,35 +34,56 @@ def auth_middleware(handler: Callable[..., Any]) -> Callable[..., Any]:
             return Response(HTTP_403, content='{}')
 
         token = authorization.split(' ')[1]
+        with phase('auth'):
+            user_id = auth_provider.verify_user_token(token) if token else False
 
-        if not token or not auth_provider.verify_user_token(token):
+        if not user_id:
             return Response(HTTP_403, content='{}')
 
-        user_provider.load_user(auth_provider.verify_user_token(token))
+        with phase('user'):
+            user_provider.load_user(user_id, expires_at=auth_provider.get_token_expiry(token))
         return handler()
 
     return middleware
 
 
 class AuthProvider:
-    def __init__(self, session: requests.Session, identity_host: str, secret_key: str):
+    def __init__(
+        self,
+        session: Union['requests.Session', 'IdentitySession'],
+        identity_host: str,
+        secret_key: str,
+        token_cache: Optional[LRUCache] = None,
+        identity_cache: Optional['IdentityCache'] = None,
+    ):
         self.session = session
         self.host = identity_host
         self.secret_key = secret_key
+        self.token_cache = token_cache
+        self.identity_cache = identity_cache
 
     def get_user_from_token(self, token: str) -> Optional[dict]:
-        url = f'{self.host}/.netlify/identity/user'
+        if self.identity_cache is None:
+            try:
+                return self._fetch_user_from_token(token)
+            except IdentityRejected:
+                return None
+
+        return self.identity_cache.get_or_fetch(
+            token_digest(token),
+            lambda: self._fetch_user_from_token(token),
+        )
+
+    def _fetch_user_from_token(self, token: str) -> Optional[dict]:
+        url = f'{self.host}{IDENTITY_USER_PATH}'
         resp = self.session.get(url, headers={
             'Authorization': f'Bearer {token}'
         })
-
-        if resp.status_code != 200:
-            return None
-
-        data = resp.json()
-        return data
+        return user_from_identity_response(resp.status_code, resp.json)
 
     def get_user_token(self, user: User) -> str:
+        from jose import jwt
+
         token = jwt.encode({
             'id': user.id,
             'email': user.email,
@@ -58,22 +92,136 @@ class AuthProvider:
         return token
 
     def verify_user_token(self, token: str) -> bool:
+        if self.token_cache is None:
+            verified = self._decode_user_token(token)
+            return verified[0] if verified else False
+
+        key = token_digest(token)
+        verified = self.token_cache.get(key)
+        if verified is None:
+            verified = self._decode_user_token(token)
+            if not verified:
+                return False
+            self.token_cache.set(key, verified, expires_at=verified[1])
+
+        return verified[0]
+
+    def get_token_expiry(self, token: str) -> Optional[float]:
+        if self.token_cache is None:
+            return None
+
+        verified = self.token_cache.get(token_digest(token), count=False)
+        return verified[1] if verified else None
+
+    def _decode_user_token(self, token: str) -> Optional[tuple]:
+        from jose import JWTError, jwt
+
         try:
             data = jwt.decode(token, self.secret_key, algorithms=['HS256'])
-            if pendulum.parse(data['expiration']) > pendulum.now('UTC'):
-                return data['id']
+            expiration = pendulum.parse(data['expiration'])
+            if expiration > pendulum.now('UTC'):
+                return data['id'], expiration.timestamp()
         except JWTError:
             pass
 
-        return False
+        return None
+
+
+class IdentityRejected(Exception):
+    pass
+
+
+def user_from_identity_response(status_code: int, get_json: Callable[[], dict]) -> Optional[dict]:
+    if status_code in (401, 403):
+        raise IdentityRejected()
+
+    if status_code != 200:
+        return None
+
+    return get_json()
+
+
+class IdentityCache:
+    def __init__(self, ttl: float = 30, negative_ttl: float = 10, max_size: int = 1024):
+        self.users = LRUCache(max_size=max_size, ttl=ttl)
+        self.rejected = LRUCache(max_size=max_size, ttl=negative_ttl)
+        self.flight = SingleFlight()
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Optional[dict]]) -> Optional[dict]:
+        user = self.users.get(key)
+        if user is not None:
+            return user
+
+        if self.rejected.get(key) is not None:
+            return None
+
+        return self.flight.do(key, lambda: self._fetch(key, fetch))
+
+    def is_cached(self, key: str) -> bool:
+        return key in self.users or key in self.rejected
+
+    def store(self, key: str, user: Optional[dict]):
+        if user is not None:
+            self.users.set(key, user)
+
+    def reject(self, key: str):
+        self.rejected.set(key, True)
+
+    def _fetch(self, key: str, fetch: Callable[[], Optional[dict]]) -> Optional[dict]:
+        try:
+            user = fetch()
+        except IdentityRejected:
+            self.reject(key)
+            return None
+
+        self.store(key, user)
+        return user
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class IdentitySession:
+    # Stands in for the shared pooled session, so requests is only imported
+    # once a token actually has to be checked with the identity server.
+    def __init__(self, settings: Settings):
+        self.settings = settings
+
+    def get(self, *args, **kwargs):
+        from session import get_session
+
+        return get_session(self.settings).get(*args, **kwargs)
 
 
 class AuthProviderComponent:
+    def __init__(self):
+        self.token_cache = None
+        self.identity_cache = None
+
     def can_handle_parameter(self, parameter: Parameter) -> bool:
         return parameter.annotation is AuthProvider
 
-    def resolve(self, session: requests.Session, settings: Settings) -> AuthProvider:
-        return AuthProvider(session, settings['identity_server'], settings['secret_key'])
+    def get_identity_cache(self, settings: Settings) -> IdentityCache:
+        if self.identity_cache is None:
+            self.identity_cache = IdentityCache(
+                ttl=settings.get('identity_cache_ttl', 30),
+                negative_ttl=settings.get('identity_negative_cache_ttl', 10),
+                max_size=settings.get('identity_cache_size', 1024),
+            )
+        return self.identity_cache
+
+    def resolve(self, settings: Settings) -> AuthProvider:
+        if self.token_cache is None:
+            self.token_cache = LRUCache(max_size=settings.get('token_cache_size', 4096))
+
+        return AuthProvider(
+            IdentitySession(settings),
+            settings['identity_server'],
+            settings['secret_key'],
+            token_cache=self.token_cache,
+            identity_cache=self.get_identity_cache(settings),
+        )
 
 
 def exclude_auth(f):
@@ -98,7 +246,7 @@ def login(login: Login, auth: AuthProvider, user_manager: UserProvider) -> Respo
 
     return Response(
         HTTP_200,
-        content=json.dumps({'token': token}),
+        stream=BytesIO(dumps({'token': token})),
         headers={
             'Content-Type': 'application/json',
         },
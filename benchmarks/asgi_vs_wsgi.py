@@ -0,0 +1,117 @@
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from molten import Settings  # noqa: E402
+from molten.contrib.sqlalchemy import EngineData  # noqa: E402
+
+from asgi_adapter import ASGIApp, AsyncIdentityClient  # noqa: E402
+from factory import create_app  # noqa: E402
+from models import Model  # noqa: E402
+from session import close_session  # noqa: E402
+from tests.stub_identity import StubIdentityServer  # noqa: E402
+
+
+def build_app(dsn, identity_url):
+    app = create_app(settings=Settings({
+        'database_engine_dsn': dsn,
+        'identity_server': identity_url,
+        'secret_key': 'secret',
+    }))
+
+    def create_schema(engine_data: EngineData):
+        Model.metadata.create_all(engine_data.engine)
+
+    app.injector.get_resolver().resolve(create_schema)()
+    return app
+
+
+def login_environ(token):
+    body = json.dumps({'token': token}).encode('utf-8')
+    return {
+        'REQUEST_METHOD': 'POST',
+        'PATH_INFO': '/login',
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+    }
+
+
+def run_wsgi(app, tokens, workers):
+    def login(token):
+        statuses = []
+        b''.join(app(login_environ(token), lambda status, headers, exc_info=None: statuses.append(status)))
+        return statuses[0]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(login, tokens))
+    return time.perf_counter() - start
+
+
+def run_asgi(app, tokens):
+    async def login(token):
+        messages = [{'type': 'http.request', 'body': json.dumps({'token': token}).encode('utf-8')}]
+
+        async def receive():
+            return messages.pop()
+
+        async def send(message):
+            pass
+
+        await app({
+            'type': 'http',
+            'method': 'POST',
+            'path': '/login',
+            'query_string': b'',
+            'headers': [(b'content-type', b'application/json')],
+        }, receive, send)
+
+    async def login_all():
+        await asyncio.gather(*(login(token) for token in tokens))
+        await app.identity_client.close()
+
+    loop = asyncio.new_event_loop()
+    start = time.perf_counter()
+    loop.run_until_complete(login_all())
+    elapsed = time.perf_counter() - start
+    loop.close()
+    return elapsed
+
+
+def main(logins=400, workers=4, latency=0.05):
+    users = {f'token{i}': {'id': f'ext{i}', 'email': f'user{i}@example.com'} for i in range(logins)}
+    tokens = list(users)
+
+    with StubIdentityServer(users=users, latency=latency) as server, tempfile.TemporaryDirectory() as tmp:
+        wsgi_app = build_app(f'sqlite:///{tmp}/wsgi.db', server.url)
+        elapsed = run_wsgi(wsgi_app, tokens, workers)
+        close_session()
+        print(f'wsgi: {logins / elapsed:8.1f} logins/s with {workers} threads')
+
+        asgi_app = ASGIApp(
+            build_app(f'sqlite:///{tmp}/asgi.db', server.url),
+            identity_client=AsyncIdentityClient(server.url, pool_size=logins),
+            executor=ThreadPoolExecutor(max_workers=workers),
+        )
+        elapsed = run_asgi(asgi_app, tokens)
+        asgi_app.executor.shutdown()
+        close_session()
+        print(f'asgi: {logins / elapsed:8.1f} logins/s with {workers} threads')
+
+
+if __name__ == '__main__':
+    main()
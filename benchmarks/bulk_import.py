@@ -0,0 +1,43 @@
+from common import make_session, seed, timeit, StaticUserProvider
+
+import pendulum
+
+from api import Chore
+from models import ChoreDefinitionManager, FrequencyTypes
+
+
+def make_chores(count):
+    start_date = pendulum.now('UTC')
+    return [Chore(
+        id=None,
+        name=f'imported {i}',
+        details='',
+        frequency_type=FrequencyTypes.DAYS,
+        frequency_amount=1 + i % 7,
+        start_date=start_date,
+    ) for i in range(count)]
+
+
+def main(rows=2000):
+    session = make_session()
+    user_id, = seed(session, definitions=0)
+    manager = ChoreDefinitionManager(session, StaticUserProvider(user_id))
+    chores = make_chores(rows)
+
+    def one_by_one():
+        for chore in chores:
+            manager.persist_chore(chore)
+        session.commit()
+        session.expunge_all()
+
+    def bulk():
+        manager.persist_chores(chores)
+        session.commit()
+
+    for name, fn in (('persist_chore', one_by_one), ('persist_chores', bulk)):
+        elapsed = timeit(fn, repeat=3)
+        print(f'{name:>14}: {rows / elapsed:10.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pendulum  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from models import Model, User, ChoreDefinition, ChoreInstance, FrequencyTypes, get_id  # noqa: E402
+from stats import rebuild_stats  # noqa: E402
+
+
+def make_session(dsn='sqlite://', **engine_params):
+    engine = create_engine(dsn, **engine_params)
+    Model.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def seed(session, users=1, definitions=10, instances_per_definition=1, horizon_days=14):
+    now = pendulum.now('UTC')
+    user_ids = []
+    for u in range(users):
+        user_id = get_id()
+        user_ids.append(user_id)
+        session.bulk_insert_mappings(User, [{
+            'id': user_id,
+            'external_id': get_id(),
+            'email': f'{user_id}@example.com',
+            'created_at': now,
+            'updated_at': now,
+        }])
+
+        definition_rows = []
+        instance_rows = []
+        for d in range(definitions):
+            definition_id = get_id()
+            definition_rows.append({
+                'id': definition_id,
+                'name': f'chore {d}',
+                'details': 'some details',
+                'owner_id': user_id,
+                'frequency_amount': 1 + d % 3,
+                'frequency_type': list(FrequencyTypes)[d % 4],
+                'created_at': now,
+                'updated_at': now,
+            })
+            for i in range(instances_per_definition):
+                instance_rows.append({
+                    'id': get_id(),
+                    'name': f'chore {d}',
+                    'details': 'some details',
+                    'owner_id': user_id,
+                    'chore_definition_id': definition_id,
+                    'due_date': now.add(minutes=(d * instances_per_definition + i) % (horizon_days * 24 * 60)),
+                    'completed': i < instances_per_definition - 1,
+                    'created_at': now,
+                    'updated_at': now,
+                })
+
+        session.bulk_insert_mappings(ChoreDefinition, definition_rows)
+        session.bulk_insert_mappings(ChoreInstance, instance_rows)
+        rebuild_stats(session, [row['id'] for row in definition_rows])
+
+    session.commit()
+    return user_ids
+
+
+class StaticUserProvider:
+    def __init__(self, user_id):
+        self.user = User(id=user_id)
+
+    def get_user(self):
+        return self.user
+
+
+def timeit(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
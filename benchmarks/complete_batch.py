@@ -0,0 +1,31 @@
+from common import make_session, seed, timeit, StaticUserProvider
+
+from models import ChoreInstance, ChoreInstanceManager
+
+
+def open_instance_ids(session, count):
+    rows = session.query(ChoreInstance.id).filter_by(completed=False).limit(count).all()
+    return [row[0] for row in rows]
+
+
+def main(batch_size=12, repeat=20):
+    session = make_session()
+    user_id, = seed(session, definitions=batch_size * repeat * 4)
+    manager = ChoreInstanceManager(session, StaticUserProvider(user_id))
+
+    def sequential():
+        for chore_id in open_instance_ids(session, batch_size):
+            manager.complete_chore(chore_id)
+        session.commit()
+
+    def batched():
+        manager.complete_chores(open_instance_ids(session, batch_size))
+        session.commit()
+
+    for name, fn in (('sequential', sequential), ('batched', batched)):
+        elapsed = timeit(fn, repeat=repeat)
+        print(f'{name:>10}: {elapsed * 1000:7.2f} ms per {batch_size} completions')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import seed, StaticUserProvider
+
+from molten import Settings
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import configure_engine, engine_params, pool_stats
+from models import Model, ChoreInstance, ChoreInstanceManager
+
+
+PROFILES = {
+    # What create_app used before the engine settings existed.
+    'defaults': None,
+    'pooled': {'sqlite_journal_mode': '', 'sqlite_synchronous': '', 'sqlite_mmap_size': None},
+    'tuned': {},
+}
+
+
+def make_engine(dsn, profile):
+    if profile is None:
+        return create_engine(dsn)
+
+    settings = Settings(dict(profile, database_engine_dsn=dsn))
+    return configure_engine(create_engine(dsn, **engine_params(settings)), settings)
+
+
+def run(session_factory, user_id, operations, workers, write_ratio):
+    def work(i):
+        session = session_factory()
+        try:
+            manager = ChoreInstanceManager(session, StaticUserProvider(user_id))
+            if random.random() < write_ratio:
+                chore_id = session.query(ChoreInstance.id)\
+                    .filter_by(owner_id=user_id, completed=False)\
+                    .offset(random.randrange(50))\
+                    .limit(1)\
+                    .scalar()
+                if chore_id:
+                    manager.complete_chore(chore_id)
+                    session.commit()
+            else:
+                manager.get_upcoming_chore_rows(limit=50)
+        finally:
+            session.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(work, range(operations)))
+    return time.perf_counter() - start
+
+
+def main(operations=2000, workers=8, write_ratio=0.2, definitions=500):
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, profile in PROFILES.items():
+            dsn = f'sqlite:///{tmp}/{name}.db'
+            engine = make_engine(dsn, profile)
+            Model.metadata.create_all(engine)
+            session_factory = sessionmaker(bind=engine)
+            user_id, = seed(session_factory(), definitions=definitions)
+
+            elapsed = run(session_factory, user_id, operations, workers, write_ratio)
+            stats = pool_stats(engine) if profile is not None else {}
+            print(f'{name:>9}: {operations / elapsed:8.1f} ops/s, {stats.get("connects", "n/a")} connections opened')
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import tempfile
+import time
+
+from common import seed
+
+import pendulum
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Model, ChoreDefinition, ChoreInstance, configure_ids, get_id
+
+
+COMBINATIONS = [('uuid4', 'hex'), ('uuid7', 'hex'), ('uuid4', 'binary'), ('uuid7', 'binary')]
+
+
+def insert_instances(session, owner_id, definition_ids, rows, batch_size):
+    now = pendulum.now('UTC')
+    start = time.perf_counter()
+    for offset in range(0, rows, batch_size):
+        session.execute(ChoreInstance.__table__.insert(), [{
+            'id': get_id(),
+            'name': 'completed chore',
+            'details': '',
+            'owner_id': owner_id,
+            'chore_definition_id': definition_ids[i % len(definition_ids)],
+            'due_date': now.add(minutes=i),
+            'completed': True,
+            'created_at': now,
+            'updated_at': now,
+            'deleted': False,
+        } for i in range(offset, min(offset + batch_size, rows))])
+        session.commit()
+    return time.perf_counter() - start
+
+
+def sizes(session):
+    # dbstat is compiled into most SQLite builds, including the one Python ships.
+    rows = session.execute(
+        "SELECT name, SUM(pgsize) FROM dbstat WHERE name LIKE '%chore_instance%' GROUP BY name"
+    ).fetchall()
+    return dict(rows)
+
+
+def main(rows=50000, batch_size=10, definitions=50):
+    with tempfile.TemporaryDirectory() as tmp:
+        for strategy, storage in COMBINATIONS:
+            configure_ids(strategy, storage)
+            engine = create_engine(f'sqlite:///{tmp}/{strategy}-{storage}.db')
+            Model.metadata.create_all(engine)
+            session = sessionmaker(bind=engine)()
+            user_id, = seed(session, definitions=definitions, instances_per_definition=0)
+            definition_ids = [row[0] for row in session.query(ChoreDefinition.id)]
+
+            elapsed = insert_instances(session, user_id, definition_ids, rows, batch_size)
+            index_sizes = sizes(session)
+            table = index_sizes.pop('chore_instance', 0)
+            print(
+                f'{strategy:>5}/{storage:<6}: {rows / elapsed:8.0f} rows/s, '
+                f'table {table / 1024:7.0f} KiB, indexes {sum(index_sizes.values()) / 1024:7.0f} KiB'
+            )
+            session.close()
+            engine.dispose()
+    configure_ids()
+
+
+if __name__ == '__main__':
+    main()
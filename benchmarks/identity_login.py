@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from auth import AuthProvider, IdentityCache  # noqa: E402
+from session import PooledSession  # noqa: E402
+from tests.stub_identity import StubIdentityServer  # noqa: E402
+
+
+def run(provider, tokens, workers):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(provider.get_user_from_token, tokens))
+    return time.perf_counter() - start
+
+
+def main(logins=400, distinct_tokens=20, workers=16, latency=0.02):
+    users = {f'token{i}': {'id': f'ext{i}', 'email': f'user{i}@example.com'} for i in range(distinct_tokens)}
+    tokens = [f'token{i % distinct_tokens}' for i in range(logins)]
+
+    with StubIdentityServer(users=users, latency=latency) as server:
+        for name, identity_cache in (('uncached', None), ('cached', IdentityCache())):
+            server.request_count = 0
+            session = PooledSession(pool_size=workers)
+            provider = AuthProvider(session, server.url, 'secret', identity_cache=identity_cache)
+            elapsed = run(provider, tokens, workers)
+            session.close()
+            print(f'{name:>9}: {logins / elapsed:8.1f} logins/s, {server.request_count} upstream calls')
+
+
+if __name__ == '__main__':
+    main()
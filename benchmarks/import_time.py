@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+ENVIRONMENT = {
+    'SQLALCHEMY_URI': 'sqlite://',
+    'IDENTITY_SERVER': 'http://localhost',
+    'SECRET_KEY': 'import-time',
+}
+
+
+def import_times(module):
+    # Each line of -X importtime output is "import time: self | cumulative | name",
+    # with times in microseconds and the name indented by nesting depth.
+    env = dict(ENVIRONMENT, **os.environ)
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stderr
+
+    times = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times.append((name.strip(), int(own), int(cumulative)))
+    return times
+
+
+def main(modules=('app', 'factory', 'api', 'models'), top=15):
+    if sys.version_info < (3, 7):
+        print('-X importtime needs Python 3.7 or later')
+        return
+
+    for module in modules:
+        times = import_times(module)
+        by_package = defaultdict(int)
+        for name, own, _ in times:
+            by_package[name.split('.')[0]] += own
+
+        total = sum(by_package.values())
+        print(f'import {module}: {total / 1000:8.1f} ms, {len(times)} modules')
+        for package, own in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+            print(f'  {package:<24} {own / 1000:8.1f} ms  {own * 100 / total:5.1f}%')
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+from common import make_session, seed, timeit, StaticUserProvider
+
+from molten import HTTP_200, JSONRenderer
+
+from api import Chore, upcoming_chore_to_dict
+from models import ChoreInstanceManager, ChoreDefinitionManager
+from rendering import FastJSONRenderer, configure_json, orjson
+
+
+def main(rows=10000):
+    session = make_session()
+    user_id, = seed(session, definitions=rows)
+    user_provider = StaticUserProvider(user_id)
+    definitions = ChoreDefinitionManager(session, user_provider)
+    instances = ChoreInstanceManager(session, user_provider)
+    chores = [Chore.from_chore_model(c) for c in definitions.get_chore_rows()]
+    upcoming = [upcoming_chore_to_dict(c) for c in instances.get_upcoming_chore_rows()]
+
+    encoders = ['stdlib'] + (['orjson'] if orjson is not None else [])
+    for name, payload in [('chores', chores), ('upcoming', upcoming)]:
+        elapsed = timeit(lambda: JSONRenderer().render(HTTP_200, payload).stream.read())
+        print(f'{name:>9} molten: {len(payload) / elapsed:10.0f} objects/s')
+        for encoder in encoders:
+            configure_json(encoder)
+            elapsed = timeit(lambda: FastJSONRenderer().render(HTTP_200, payload).stream.read())
+            print(f'{name:>9} {encoder:>6}: {len(payload) / elapsed:10.0f} objects/s')
+    configure_json()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,468 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from threading import Thread
+from wsgiref.util import is_hop_by_hop
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from common import seed
+
+import pendulum
+import requests
+from molten import Settings, testing
+from molten.contrib.sqlalchemy import EngineData
+
+from auth import AuthProvider
+from factory import create_app
+from models import Model, User, ChoreDefinition, ChoreInstance
+from session import close_session
+from tests.stub_identity import StubIdentityServer
+
+
+Call = namedtuple('Call', 'method path params headers body')
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+class TestClientTransport:
+    name = 'testclient'
+
+    def __init__(self, app):
+        self.client = testing.TestClient(app)
+
+    def request(self, call: Call):
+        resp = self.client.request(call.method, call.path, headers=call.headers, params=call.params, body=call.body)
+        stream = resp.stream
+        if hasattr(stream, 'read'):
+            stream.seek(0)
+            body = stream.read()
+        else:
+            body = b''.join(stream)
+        return resp.status_code, body
+
+    def close(self):
+        pass
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def without_hop_by_hop_headers(app):
+    # gunicorn frames streamed responses itself; wsgiref refuses the
+    # Transfer-Encoding header molten sets on them.
+    def wrapper(environ, start_response):
+        def start(status, headers, exc_info=None):
+            return start_response(status, [(k, v) for k, v in headers if not is_hop_by_hop(k)], exc_info)
+        return app(environ, start)
+    return wrapper
+
+
+class ServerTransport:
+    name = 'wsgi'
+
+    def __init__(self, app):
+        self.server = make_server('127.0.0.1', 0, without_hop_by_hop_headers(app), _ThreadingWSGIServer, _QuietHandler)
+        self.thread = Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.session = requests.Session()
+        self.session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=64))
+
+    def request(self, call: Call):
+        resp = self.session.request(
+            call.method,
+            self.url + call.path,
+            headers=call.headers,
+            params=call.params,
+            data=call.body,
+        )
+        return resp.status_code, resp.content
+
+    def close(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+TRANSPORTS = {transport.name: transport for transport in (TestClientTransport, ServerTransport)}
+
+
+class Fixture:
+    def __init__(self, app, secret_key):
+        self.app = app
+        self.session = app.injector.get_resolver().resolve(_get_session_factory)()()
+        self.users = self.session.query(User).order_by(User.id).all()
+        provider = AuthProvider(None, '', secret_key)
+        self.auth = [{'Authorization': f'Bearer {provider.get_user_token(user)}'} for user in self.users]
+        self.created = {i: [] for i in range(len(self.users))}
+
+    def identity_users(self):
+        return {f'token{i}': {'id': user.external_id, 'email': user.email} for i, user in enumerate(self.users)}
+
+    def definition_ids(self, user_index):
+        rows = self.session.query(ChoreDefinition.id)\
+            .filter(ChoreDefinition.owner_id == self.users[user_index].id)\
+            .all()
+        return [row[0] for row in rows]
+
+    def open_instances(self, limit):
+        self.session.expire_all()
+        rows = self.session.query(ChoreInstance.owner_id, ChoreInstance.id)\
+            .filter(ChoreInstance.completed == False)  # noqa: E712
+        owners = {user.id: i for i, user in enumerate(self.users)}
+        return [(owners[owner_id], chore_id) for owner_id, chore_id in rows.limit(limit)]
+
+    def close(self):
+        self.session.close()
+
+
+def _get_session_factory(engine_data: EngineData):
+    return engine_data.session_factory
+
+
+def new_chore(i):
+    return {
+        'name': f'load chore {i}',
+        'details': 'created by the load test',
+        'frequencyType': 'days',
+        'frequencyAmount': 1 + i % 7,
+        'startDate': pendulum.now('UTC').add(days=i % 14).isoformat(),
+    }
+
+
+def authed(fixture, i, headers=None):
+    return dict(fixture.auth[i % len(fixture.auth)], **(headers or {}))
+
+
+def login_calls(fixture, count):
+    return [
+        Call('POST', '/login', None, JSON_HEADERS, json.dumps({'token': f'token{i % len(fixture.users)}'}).encode())
+        for i in range(count)
+    ]
+
+
+def read_calls(path, params=None):
+    def calls(fixture, count):
+        return [Call('GET', path, params, authed(fixture, i), None) for i in range(count)]
+    return calls
+
+
+def chore_calls(suffix, params=None):
+    def calls(fixture, count):
+        ids = [fixture.definition_ids(i) for i in range(len(fixture.users))]
+        result = []
+        for i in range(count):
+            user = i % len(fixture.users)
+            if ids[user]:
+                chore_id = ids[user][i // len(fixture.users) % len(ids[user])]
+                result.append(Call('GET', f'/api/chores/{chore_id}{suffix}', params, authed(fixture, user), None))
+        return result
+    return calls
+
+
+def create_chore_calls(fixture, count):
+    return [
+        Call('POST', '/api/chores', None, authed(fixture, i, JSON_HEADERS), json.dumps(new_chore(i)).encode())
+        for i in range(count)
+    ]
+
+
+def bulk_chore_calls(batch_size):
+    def calls(fixture, count):
+        return [
+            Call(
+                'POST',
+                '/api/chores/bulk',
+                None,
+                authed(fixture, i, JSON_HEADERS),
+                json.dumps([new_chore(i * batch_size + j) for j in range(batch_size)]).encode(),
+            )
+            for i in range(count)
+        ]
+    return calls
+
+
+def complete_calls(fixture, count):
+    return [
+        Call('POST', f'/api/upcoming/{chore_id}', None, authed(fixture, user), None)
+        for user, chore_id in fixture.open_instances(count)
+    ]
+
+
+def complete_batch_calls(batch_size):
+    def calls(fixture, count):
+        by_user = {}
+        for user, chore_id in fixture.open_instances(count * batch_size):
+            by_user.setdefault(user, []).append(chore_id)
+
+        result = []
+        for user, ids in by_user.items():
+            for start in range(0, len(ids), batch_size):
+                body = json.dumps({'ids': ids[start:start + batch_size]}).encode()
+                result.append(Call('POST', '/api/upcoming/complete', None, authed(fixture, user, JSON_HEADERS), body))
+        return result[:count]
+    return calls
+
+
+def delete_calls(fixture, count):
+    result = []
+    for user, ids in fixture.created.items():
+        result.extend(Call('DELETE', f'/api/chores/{chore_id}', None, authed(fixture, user), None) for chore_id in ids)
+    return result[:count]
+
+
+SCENARIOS = OrderedDict([
+    ('login', login_calls),
+    ('get-upcoming', read_calls('/api/upcoming')),
+    ('get-upcoming-page', read_calls('/api/upcoming', {'limit': '20'})),
+    ('get-forecast', read_calls('/api/forecast')),
+    ('get-chores', read_calls('/api/chores')),
+    ('get-chores-page', read_calls('/api/chores', {'limit': '20'})),
+    ('get-chore', chore_calls('')),
+    ('get-chore-schedule', chore_calls('/schedule', {'count': '30'})),
+    ('get-chore-history', chore_calls('/history', {'limit': '20'})),
+    ('get-chore-stats', chore_calls('/stats')),
+    # timeout=0 answers from the version stamp without parking the request.
+    ('get-changes', read_calls('/api/changes', {'timeout': '0'})),
+    ('create-chore', create_chore_calls),
+    ('create-chores', bulk_chore_calls(10)),
+    ('complete-upcoming', complete_calls),
+    ('complete-upcoming-batch', complete_batch_calls(5)),
+    ('delete-chore', delete_calls),
+])
+
+
+def replay_scenarios(path):
+    # One JSON object per line: {"method", "path", "params"?, "body"?,
+    # "user"?, "name"?}. "{chore_id}" in a path is filled from the
+    # recorded user's definitions. Lines without a method and path are
+    # skipped so other JSON lines files can be pointed at without failing.
+    recorded = OrderedDict()
+    skipped = 0
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if not isinstance(entry, dict) or 'method' not in entry or 'path' not in entry:
+                skipped += 1
+                continue
+            name = entry.get('name') or f"{entry['method'].upper()} {entry['path']}"
+            recorded.setdefault(name, []).append(entry)
+
+    def make_calls(entries):
+        def calls(fixture, count):
+            result = []
+            for entry in entries[:count]:
+                user = entry.get('user', 0) % len(fixture.users)
+                path = entry['path']
+                if '{chore_id}' in path:
+                    ids = fixture.definition_ids(user)
+                    if not ids:
+                        continue
+                    path = path.replace('{chore_id}', ids[0])
+                body = entry.get('body')
+                headers = authed(fixture, user)
+                if body is not None:
+                    body = json.dumps(body).encode()
+                    headers.update(JSON_HEADERS)
+                result.append(Call(entry['method'].upper(), path, entry.get('params'), headers, body))
+            return result
+        return calls
+
+    return OrderedDict((name, make_calls(entries)) for name, entries in recorded.items()), skipped
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def peak_rss_kb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def run_scenario(transport, fixture, calls, concurrency):
+    statuses = {}
+    latencies = []
+
+    def send(call):
+        start = time.perf_counter()
+        status, body = transport.request(call)
+        elapsed = time.perf_counter() - start
+        if call.method == 'POST' and status == 200 and call.path.startswith('/api/chores'):
+            user = fixture.auth.index({'Authorization': call.headers['Authorization']})
+            data = json.loads(body.decode('utf-8'))
+            fixture.created[user].extend(data['ids'] if 'ids' in data else [data['id']])
+        return status, elapsed
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(send, calls))
+    else:
+        results = [send(call) for call in calls]
+    wall = time.perf_counter() - start
+
+    for status, elapsed in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        latencies.append(elapsed * 1000)
+
+    return OrderedDict([
+        ('requests', len(calls)),
+        ('statuses', statuses),
+        ('p50_ms', percentile(latencies, 0.50)),
+        ('p95_ms', percentile(latencies, 0.95)),
+        ('p99_ms', percentile(latencies, 0.99)),
+        ('throughput_rps', len(calls) / wall if wall else None),
+        ('peak_rss_kb', peak_rss_kb()),
+    ])
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_app(dsn, identity_url, secret_key):
+    app = create_app(settings=Settings({
+        'database_engine_dsn': dsn,
+        'identity_server': identity_url,
+        'secret_key': secret_key,
+    }))
+
+    def create_schema(engine_data: EngineData):
+        Model.metadata.create_all(engine_data.engine)
+
+    app.injector.get_resolver().resolve(create_schema)()
+    return app
+
+
+def compare(previous, current):
+    for name, result in current['results'].items():
+        before = previous.get('results', {}).get(name)
+        if not before or not before.get('p95_ms') or not result['p95_ms']:
+            continue
+        change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+        print(f'{name:>36}: p95 {before["p95_ms"]:8.2f} -> {result["p95_ms"]:8.2f} ms ({change:+.1f}%)')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Drive every route and record latency percentiles.')
+    parser.add_argument('--dsn', help='database to seed; defaults to a temporary SQLite file')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--definitions', type=int, default=50)
+    parser.add_argument('--instances', type=int, default=2, help='instances per definition')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads for the wsgi transport')
+    parser.add_argument('--transport', choices=sorted(TRANSPORTS), action='append')
+    parser.add_argument('--scenario', action='append', help='only run the named scenarios')
+    parser.add_argument('--replay', help='JSON lines file of recorded requests to replay instead')
+    parser.add_argument('--identity-latency', type=float, default=0.0)
+    parser.add_argument('--output', help='where to write the JSON results')
+    parser.add_argument('--compare', help='previous JSON results to compare p95 latencies against')
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        scenarios, skipped = replay_scenarios(args.replay)
+        if skipped:
+            print(f'skipped {skipped} lines without a method and path', file=sys.stderr)
+    else:
+        scenarios = SCENARIOS
+    if args.scenario:
+        scenarios = OrderedDict((name, calls) for name, calls in scenarios.items() if name in args.scenario)
+
+    commit = current_commit()
+    report = OrderedDict([
+        ('commit', commit),
+        ('created_at', pendulum.now('UTC').isoformat()),
+        ('python', sys.version.split()[0]),
+        ('config', {
+            'users': args.users,
+            'definitions': args.definitions,
+            'instances': args.instances,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'identity_latency': args.identity_latency,
+            'replay': args.replay,
+        }),
+        ('results', OrderedDict()),
+    ])
+
+    secret_key = 'load-test-secret'
+    with tempfile.TemporaryDirectory() as tmp, StubIdentityServer(latency=args.identity_latency) as identity:
+        for transport_name in args.transport or ['testclient', 'wsgi']:
+            dsn = args.dsn or f'sqlite:///{tmp}/{transport_name}.db'
+            app = build_app(dsn, identity.url, secret_key)
+            seed(
+                app.injector.get_resolver().resolve(_get_session_factory)()(),
+                users=args.users,
+                definitions=args.definitions,
+                instances_per_definition=args.instances,
+            )
+            fixture = Fixture(app, secret_key)
+            identity.users = fixture.identity_users()
+            transport = TRANSPORTS[transport_name](app)
+            try:
+                for name, make_calls in scenarios.items():
+                    calls = make_calls(fixture, args.requests)
+                    concurrency = args.concurrency if transport_name == 'wsgi' else 1
+                    result = run_scenario(transport, fixture, calls, concurrency)
+                    report['results'][f'{transport_name}:{name}'] = result
+                    print(
+                        f'{transport_name:>10} {name:>24}: {result["requests"]:5d} reqs '
+                        f'p50 {result["p50_ms"] or 0:7.2f} p95 {result["p95_ms"] or 0:7.2f} '
+                        f'p99 {result["p99_ms"] or 0:7.2f} ms {result["throughput_rps"] or 0:8.1f} req/s '
+                        f'{result["statuses"]}'
+                    )
+            finally:
+                transport.close()
+                fixture.close()
+                close_session()
+
+    report['peak_rss_kb'] = peak_rss_kb()
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        'results',
+        f'{commit or "working"}.json',
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'wrote {output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
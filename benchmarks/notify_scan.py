@@ -0,0 +1,65 @@
+import tempfile
+import time
+
+from common import seed
+
+import pendulum
+from sqlalchemy import create_engine, false
+from sqlalchemy.orm import sessionmaker
+
+from models import Model, ChoreInstance, NotificationLog, raw_datetime
+from notify import MemorySink, Scanner
+
+
+def per_user(session, user_ids, start, end):
+    # What a reminder job built on the upcoming query would do: one query per user.
+    sent = 0
+    for user_id in user_ids:
+        sent += len(session.query(ChoreInstance.id, ChoreInstance.name, raw_datetime(ChoreInstance.due_date))
+                    .filter(ChoreInstance.completed == false())
+                    .filter(ChoreInstance.deleted == false())
+                    .filter(ChoreInstance.owner_id == user_id)
+                    .filter(ChoreInstance.due_date > start)
+                    .filter(ChoreInstance.due_date <= end)
+                    .order_by(ChoreInstance.due_date.asc())
+                    .all())
+    return sent
+
+
+def main(users=1000, definitions=100, instances_per_definition=10, lead_minutes=24 * 60):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite:///{tmp}/notify.db')
+        Model.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+
+        start = time.perf_counter()
+        user_ids = seed(session_factory(), users=users, definitions=definitions,
+                        instances_per_definition=instances_per_definition)
+        print(f'seeded {users * definitions * instances_per_definition} instances '
+              f'in {time.perf_counter() - start:.1f}s')
+
+        now = pendulum.now('UTC')
+        session = session_factory()
+        start = time.perf_counter()
+        sent = per_user(session, user_ids, now, now.add(minutes=lead_minutes))
+        print(f'  per user: {sent:7d} notifications in {time.perf_counter() - start:6.2f}s ({len(user_ids)} queries)')
+        session.close()
+
+        for batch_size in (1000, 10000):
+            session = session_factory()
+            session.query(NotificationLog).delete()
+            session.commit()
+            session.close()
+
+            sink = MemorySink()
+            scanner = Scanner(session_factory, sink, lead_minutes=lead_minutes, batch_size=batch_size)
+            start = time.perf_counter()
+            sent = scanner.run(now=now)
+            print(f'    sweep: {sent:7d} notifications in {time.perf_counter() - start:6.2f}s '
+                  f'(batch size {batch_size})')
+
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
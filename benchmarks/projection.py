@@ -0,0 +1,26 @@
+from common import make_session, seed, timeit, StaticUserProvider
+
+from api import Chore, upcoming_chore_to_dict
+from models import ChoreInstanceManager, ChoreDefinitionManager
+
+
+def main(rows=10000):
+    session = make_session()
+    user_id, = seed(session, definitions=rows)
+    user_provider = StaticUserProvider(user_id)
+    instances = ChoreInstanceManager(session, user_provider)
+    definitions = ChoreDefinitionManager(session, user_provider)
+
+    cases = [
+        ('upcoming orm', lambda: [upcoming_chore_to_dict(c) for c in instances.get_upcoming_chores()]),
+        ('upcoming rows', lambda: [upcoming_chore_to_dict(c) for c in instances.get_upcoming_chore_rows()]),
+        ('chores orm', lambda: [Chore.from_chore_model(c) for c in definitions.get_chores()]),
+        ('chores rows', lambda: [Chore.from_chore_model(c) for c in definitions.get_chore_rows()]),
+    ]
+    for name, fn in cases:
+        elapsed = timeit(lambda: (fn(), session.expunge_all()))
+        print(f'{name:>14}: {elapsed * 1000:8.1f} ms for {rows} rows')
+
+
+if __name__ == '__main__':
+    main()
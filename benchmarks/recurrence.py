@@ -0,0 +1,33 @@
+import random
+
+from common import timeit
+
+import pendulum
+
+from models import FrequencyTypes
+from recurrence import project_array
+
+
+def main(definitions=10000, count=10):
+    rng = random.Random(0)
+    base = pendulum.datetime(2020, 1, 1, tz='UTC')
+    starts = [base.add(minutes=rng.randrange(60 * 24 * 365 * 5)) for _ in range(definitions)]
+    frequency_types = [rng.choice(list(FrequencyTypes)) for _ in range(definitions)]
+    amounts = [rng.randrange(1, 12) for _ in range(definitions)]
+
+    def with_pendulum():
+        return [
+            [start.add(**{frequency_type.value: amount * step}) for step in range(1, count + 1)]
+            for start, frequency_type, amount in zip(starts, frequency_types, amounts)
+        ]
+
+    def with_numpy():
+        return project_array(starts, frequency_types, amounts, count)
+
+    for name, fn in (('pendulum', with_pendulum), ('numpy', with_numpy)):
+        elapsed = timeit(fn, repeat=3)
+        print(f'{name:>8}: {elapsed * 1000:8.1f} ms for {definitions * count} projections')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import logging
+import time
+from contextlib import contextmanager
+from inspect import Parameter
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from molten import Settings
+
+import events
+from conditional import make_etag
+from models import VersionStamp
+
+
+logger = logging.getLogger('changes')
+
+
+def change_token(stamp: VersionStamp) -> str:
+    return make_etag('changes', stamp).strip('"')
+
+
+class LocalBroker:
+    def __init__(self):
+        self.listeners: List[Callable[[str], None]] = []
+
+    def publish(self, owner_id: str):
+        for listener in list(self.listeners):
+            listener(owner_id)
+
+    def listen(self, listener: Callable[[str], None]):
+        self.listeners.append(listener)
+
+    def unlisten(self, listener: Callable[[str], None]):
+        self.listeners.remove(listener)
+
+
+class RedisBroker:
+    def __init__(self, client, channel: str = 'changes'):
+        self.client = client
+        self.channel = channel
+        self.listeners: List[Callable[[str], None]] = []
+        self._thread: Optional[Thread] = None
+        self._lock = Lock()
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisBroker':
+        import redis
+        return cls(redis.StrictRedis.from_url(url))
+
+    def publish(self, owner_id: str):
+        self.client.publish(self.channel, owner_id)
+
+    def listen(self, listener: Callable[[str], None]):
+        # One subscription per process, shared by every listener.
+        with self._lock:
+            self.listeners.append(listener)
+            if self._thread is None:
+                self._thread = Thread(target=self._listen, name='change-broker', daemon=True)
+                self._thread.start()
+
+    def unlisten(self, listener: Callable[[str], None]):
+        with self._lock:
+            self.listeners.remove(listener)
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        owner_id = message['data'].decode('utf-8')
+                        for listener in list(self.listeners):
+                            listener(owner_id)
+            except Exception:
+                logger.exception('lost the change broker, reconnecting')
+                time.sleep(1)
+
+
+class ChangeFeed:
+    def __init__(self, broker=None):
+        self.broker = broker
+        self._waiters: Dict[str, Set[Event]] = {}
+        self._lock = Lock()
+        events.subscribe(self.publish)
+        if broker is not None:
+            broker.listen(self.notify)
+
+    def close(self):
+        events.unsubscribe(self.publish)
+        if self.broker is not None:
+            self.broker.unlisten(self.notify)
+
+    def publish(self, owner_id: str):
+        if self.broker is None:
+            self.notify(owner_id)
+        else:
+            self.broker.publish(owner_id)
+
+    def notify(self, owner_id: str):
+        with self._lock:
+            for waiter in self._waiters.get(owner_id, ()):
+                waiter.set()
+
+    @contextmanager
+    def watch(self, owner_id: str) -> Iterator[Event]:
+        # Callers register before reading the current version, so a change
+        # committed in between still wakes them up.
+        waiter = Event()
+        with self._lock:
+            self._waiters.setdefault(owner_id, set()).add(waiter)
+        try:
+            yield waiter
+        finally:
+            with self._lock:
+                waiters = self._waiters[owner_id]
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[owner_id]
+
+
+def create_broker(settings: Settings) -> Optional[RedisBroker]:
+    url = settings.get('change_feed_broker_url')
+    return RedisBroker.from_url(url) if url else None
+
+
+class ChangeFeedComponent:
+    is_cacheable = True
+    is_singleton = True
+
+    def can_handle_parameter(self, parameter: Parameter) -> bool:
+        return parameter.annotation is ChangeFeed
+
+    def resolve(self, settings: Settings) -> ChangeFeed:
+        return ChangeFeed(create_broker(settings))
@@ -0,0 +1,103 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+import pendulum
+from molten import Header, Request, Response, Route, HTTP_200, HTTP_304
+
+from models import VersionManager, VersionStamp
+
+
+def conditional_get(scope: str = 'data'):
+    def decorator(f):
+        f.conditional_get = scope
+        return f
+    return decorator
+
+
+def digest(*parts: Any) -> str:
+    return hashlib.sha1(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def make_etag(*parts: Any) -> str:
+    return f'"{digest(*parts)}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return etag in (tag.strip().lstrip('W/') for tag in if_none_match.split(','))
+
+
+def last_modified(stamp: VersionStamp) -> datetime:
+    return datetime.fromtimestamp(int(stamp.updated_at.timestamp()), timezone.utc)
+
+
+def not_modified_since(if_modified_since: Optional[str], stamp: VersionStamp) -> bool:
+    if not if_modified_since or stamp.updated_at is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    return since.tzinfo is not None and last_modified(stamp) <= since
+
+
+def add_headers(response: Any, headers: dict) -> Any:
+    if isinstance(response, Response):
+        for name, value in headers.items():
+            response.headers.add(name, value)
+        return response
+
+    if isinstance(response, tuple):
+        if len(response) == 3:
+            status, data, extra_headers = response
+            return status, data, dict(extra_headers, **headers)
+        status, data = response
+        return status, data, headers
+
+    return HTTP_200, response, headers
+
+
+def conditional_get_middleware(handler: Callable[..., Any]) -> Callable[..., Any]:
+    def middleware(
+        route: Optional[Route],
+        request: Request,
+        version_manager: VersionManager,
+        if_none_match: Optional[Header],
+        if_modified_since: Optional[Header],
+    ) -> Any:
+        scope = getattr(route.handler, 'conditional_get', None) if route else None
+        if scope is None or request.method != 'GET':
+            return handler()
+
+        stamp = version_manager.get_version_stamp(upcoming=scope == 'upcoming')
+        parts = [request.path, sorted(request.params), stamp]
+        if scope == 'daily':
+            parts.append(pendulum.today('UTC').date())
+
+        headers = {
+            'etag': make_etag(*parts),
+            'cache-control': 'private, no-cache',
+        }
+        # Only data-only resources can be validated by date; the others
+        # also change with the clock.
+        if scope == 'data' and stamp.updated_at is not None:
+            headers['last-modified'] = format_datetime(last_modified(stamp), usegmt=True)
+
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, headers['etag'])
+        else:
+            not_modified = scope == 'data' and not_modified_since(if_modified_since, stamp)
+
+        if not_modified:
+            return Response(HTTP_304, headers=headers)
+
+        return add_headers(handler(), headers)
+
+    return middleware
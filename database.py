@@ -0,0 +1,156 @@
+import os
+import weakref
+from threading import Lock
+from typing import Dict, List
+
+from molten import Settings
+from molten.contrib.sqlalchemy import EngineData, SQLAlchemyEngineComponent
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+
+_engines: 'weakref.WeakKeyDictionary[Engine, PoolStats]' = weakref.WeakKeyDictionary()
+
+
+class PoolStats:
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.forked = 0
+        self._lock = Lock()
+
+    def increment(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+def is_sqlite_file(url) -> bool:
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def engine_params(settings: Settings) -> dict:
+    url = make_url(settings['database_engine_dsn'])
+    params = {}
+    connect_args = {}
+
+    if url.get_backend_name() != 'sqlite':
+        params['pool_pre_ping'] = settings.get('database_pool_pre_ping', True)
+        params['pool_recycle'] = settings.get('database_pool_recycle', 1800)
+
+    if url.get_backend_name() != 'sqlite' or is_sqlite_file(url):
+        params['pool_size'] = settings.get('database_pool_size', 5)
+        params['max_overflow'] = settings.get('database_max_overflow', 10)
+        params['pool_timeout'] = settings.get('database_pool_timeout', 30)
+
+    if is_sqlite_file(url):
+        # SQLAlchemy opens a fresh connection per checkout for SQLite files,
+        # which throws away the per-connection pragmas.  Pooling them is safe
+        # because the pool hands each connection to one thread at a time.
+        params['poolclass'] = QueuePool
+        connect_args['check_same_thread'] = False
+        connect_args['timeout'] = settings.get('sqlite_busy_timeout', 5000) / 1000
+
+    statement_timeout = settings.get('database_statement_timeout')
+    if statement_timeout and url.get_backend_name() == 'postgresql':
+        connect_args['options'] = f'-c statement_timeout={int(statement_timeout)}'
+
+    if connect_args:
+        params['connect_args'] = connect_args
+
+    params.update(settings.get('database_engine_params', {}))
+    return params
+
+
+def sqlite_pragmas(settings: Settings) -> List[str]:
+    pragmas = []
+    if settings.get('sqlite_journal_mode', 'wal'):
+        pragmas.append(f"PRAGMA journal_mode={settings.get('sqlite_journal_mode', 'wal')}")
+    if settings.get('sqlite_synchronous', 'normal'):
+        pragmas.append(f"PRAGMA synchronous={settings.get('sqlite_synchronous', 'normal')}")
+    if settings.get('sqlite_mmap_size', 256 * 1024 * 1024) is not None:
+        pragmas.append(f"PRAGMA mmap_size={int(settings.get('sqlite_mmap_size', 256 * 1024 * 1024))}")
+    return pragmas
+
+
+def configure_engine(engine: Engine, settings: Settings) -> Engine:
+    stats = _engines[engine] = PoolStats()
+    pragmas = sqlite_pragmas(settings) if is_sqlite_file(engine.url) else []
+
+    @event.listens_for(engine, 'connect')
+    def connect(dbapi_connection, connection_record):
+        connection_record.info['pid'] = os.getpid()
+        stats.increment('connects')
+        if pragmas:
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    @event.listens_for(engine, 'checkout')
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.increment('checkouts')
+        if connection_record.info['pid'] != os.getpid():
+            # Inherited from the parent process: drop it without closing,
+            # since closing would end the parent's session too.
+            stats.increment('forked')
+            connection_record.connection = connection_proxy.connection = None
+            raise exc.DisconnectionError('connection belongs to a parent process')
+
+    return engine
+
+
+def reset_after_fork():
+    # Give each engine a fresh pool without closing the inherited
+    # connections, which still belong to the parent process.
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+def pool_stats(engine: Engine) -> Dict[str, int]:
+    pool = engine.pool
+    counters = _engines[engine]
+    stats = {
+        'connects': counters.connects,
+        'checkouts': counters.checkouts,
+        'forked': counters.forked,
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+        })
+    return stats
+
+
+POOL_COUNTERS = ('connects', 'checkouts', 'forked')
+
+
+def render_pool_stats(engine: Engine) -> str:
+    stats = pool_stats(engine)
+    lines = [
+        '# HELP doit_db_pool_events_total Connections opened, checked out and discarded after a fork.',
+        '# TYPE doit_db_pool_events_total counter',
+    ]
+    for name in POOL_COUNTERS:
+        lines.append(f'doit_db_pool_events_total{{event="{name}"}} {stats[name]}')
+
+    lines.append('# HELP doit_db_pool_connections Connection pool utilization.')
+    lines.append('# TYPE doit_db_pool_connections gauge')
+    for name, value in sorted(stats.items()):
+        if name not in POOL_COUNTERS:
+            lines.append(f'doit_db_pool_connections{{state="{name}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class EngineComponent(SQLAlchemyEngineComponent):
+    def resolve(self, settings: Settings) -> EngineData:
+        engine = create_engine(settings.strict_get('database_engine_dsn'), **engine_params(settings))
+        configure_engine(engine, settings)
+        session_factory = sessionmaker()
+        session_factory.configure(bind=engine)
+        return EngineData(engine, session_factory)
@@ -0,0 +1,62 @@
+import weakref
+from typing import Callable, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+_listeners: List[Callable[[], Callable[[str], None]]] = []
+
+
+def _reference(listener: Callable[[str], None]) -> Callable[[], Callable[[str], None]]:
+    # Bound methods are held weakly, so a cache or feed that is thrown away
+    # (a rebuilt app, a test) drops out instead of piling up here.
+    if hasattr(listener, '__self__'):
+        return weakref.WeakMethod(listener)
+    return lambda: listener
+
+
+def subscribe(listener: Callable[[str], None]) -> Callable[[str], None]:
+    _listeners.append(_reference(listener))
+    return listener
+
+
+def _discard(reference: Callable[[], Callable[[str], None]]):
+    try:
+        _listeners.remove(reference)
+    except ValueError:
+        pass
+
+
+def unsubscribe(listener: Callable[[str], None]):
+    for reference in list(_listeners):
+        if reference() in (listener, None):
+            _discard(reference)
+
+
+def listener_count() -> int:
+    return sum(reference() is not None for reference in _listeners)
+
+
+def mark_changed(session: Session, owner_id: str):
+    session.info.setdefault('changed_owners', set()).add(owner_id)
+
+
+def publish(owner_id: str):
+    for reference in list(_listeners):
+        listener = reference()
+        if listener is None:
+            _discard(reference)
+        else:
+            listener(owner_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_changes(session: Session):
+    for owner_id in session.info.pop('changed_owners', ()):
+        publish(owner_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session: Session):
+    session.info.pop('changed_owners', None)
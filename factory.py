@@ -1,65 +1,168 @@
+import gc
 import os
+from typing import Iterator, List
 
-from dotenv import load_dotenv
-from molten.contrib.sqlalchemy import SQLAlchemyEngineComponent,\
-    SQLAlchemyMiddleware,\
+from molten.contrib.sqlalchemy import SQLAlchemyMiddleware,\
     SQLAlchemySessionComponent
 from molten import App,\
     Route,\
     Include,\
     ResponseRendererMiddleware,\
     Settings,\
-    SettingsComponent
+    SettingsComponent,\
+    is_schema
 
 from api import routes
-from session import RequestSessionComponent
+from database import EngineComponent
+from forecast import ForecastCacheComponent
+from upcoming_cache import UpcomingCacheComponent
+from changes import ChangeFeedComponent
+from rendering import FastJSONRenderer, configure_json, schema_fields
 from models import ManagerComponent,\
     ChoreInstanceManager,\
     ChoreDefinitionManager,\
-    UserProviderComponent
-from auth import auth_middleware, login, AuthProviderComponent
+    VersionManager,\
+    UserProviderComponent,\
+    configure_ids,\
+    configure_materialize
+from auth import auth_middleware, exclude_auth, login, AuthProviderComponent
+from conditional import conditional_get_middleware
+from timing import InstrumentationComponent, metrics, phase_middleware, timing_middleware
 
 
-load_dotenv()
+def get_settings() -> Settings:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return Settings({
+        'database_engine_dsn': os.environ['SQLALCHEMY_URI'],
+        'database_pool_size': int(os.environ.get('DATABASE_POOL_SIZE', 5)),
+        'database_max_overflow': int(os.environ.get('DATABASE_MAX_OVERFLOW', 10)),
+        'database_pool_timeout': float(os.environ.get('DATABASE_POOL_TIMEOUT', 30)),
+        'database_pool_recycle': int(os.environ.get('DATABASE_POOL_RECYCLE', 1800)),
+        'database_pool_pre_ping': os.environ.get('DATABASE_POOL_PRE_PING', '1') == '1',
+        'database_statement_timeout': int(os.environ.get('DATABASE_STATEMENT_TIMEOUT', 0)),
+        'sqlite_journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'wal'),
+        'sqlite_synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'normal'),
+        'sqlite_mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'sqlite_busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'identity_server': os.environ['IDENTITY_SERVER'],
+        'secret_key': os.environ['SECRET_KEY'],
+        'identity_pool_size': int(os.environ.get('IDENTITY_POOL_SIZE', 10)),
+        'identity_connect_timeout': float(os.environ.get('IDENTITY_CONNECT_TIMEOUT', 3.05)),
+        'identity_read_timeout': float(os.environ.get('IDENTITY_READ_TIMEOUT', 10)),
+        'upcoming_cache_url': os.environ.get('UPCOMING_CACHE_URL'),
+        'change_feed_broker_url': os.environ.get('CHANGE_FEED_BROKER_URL'),
+        'asgi_thread_pool_size': int(os.environ.get('ASGI_THREAD_POOL_SIZE', 8)),
+        'metrics_token': os.environ.get('METRICS_TOKEN'),
+        'profile_sample_rate': float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+        'profile_keep': int(os.environ.get('PROFILE_KEEP', 10)),
+        'profile_dir': os.environ.get('PROFILE_DIR', 'profiles'),
+        'query_budget_warnings': os.environ.get('QUERY_BUDGET_WARNINGS', '') == '1',
+        'id_strategy': os.environ.get('ID_STRATEGY', 'uuid4'),
+        'id_storage': os.environ.get('ID_STORAGE', 'hex'),
+        'archive_retention_days': int(os.environ.get('ARCHIVE_RETENTION_DAYS', 90)),
+        'archive_batch_size': int(os.environ.get('ARCHIVE_BATCH_SIZE', 500)),
+        'archive_interval': float(os.environ.get('ARCHIVE_INTERVAL', 0)),
+        'archive_pause': float(os.environ.get('ARCHIVE_PAUSE', 0)),
+        'materialize_horizon_days': int(os.environ.get('MATERIALIZE_HORIZON_DAYS', 0)),
+        'materialize_interval': float(os.environ.get('MATERIALIZE_INTERVAL', 0)),
+        'materialize_batch_size': int(os.environ.get('MATERIALIZE_BATCH_SIZE', 500)),
+        'notify_sink': os.environ.get('NOTIFY_SINK'),
+        'notify_interval': float(os.environ.get('NOTIFY_INTERVAL', 0)),
+        'notify_lead_minutes': int(os.environ.get('NOTIFY_LEAD_MINUTES', 60)),
+        'notify_batch_size': int(os.environ.get('NOTIFY_BATCH_SIZE', 1000)),
+        'json_encoder': os.environ.get('JSON_ENCODER', 'stdlib'),
+    })
+
+
+def create_components(settings: Settings) -> list:
+    return [
+        SettingsComponent(settings),
+        EngineComponent(),
+        SQLAlchemySessionComponent(),
+        AuthProviderComponent(),
+        ManagerComponent(ChoreInstanceManager),
+        ManagerComponent(ChoreDefinitionManager),
+        ManagerComponent(VersionManager),
+        UserProviderComponent(),
+        ForecastCacheComponent(),
+        UpcomingCacheComponent(),
+        ChangeFeedComponent(),
+        InstrumentationComponent(),
+    ]
+
+
+def create_routes() -> list:
+    return [
+        Route('/login', login, method='POST', name='login'),
+        Route('/metrics', exclude_auth(metrics), method='GET', name='metrics'),
+        Include(
+            '/api',
+            routes,
+            namespace='api',
+        )
+    ]
+
+
+def route_schemas(route_list: List) -> Iterator[type]:
+    for route in route_list:
+        if isinstance(route, Include):
+            yield from route_schemas(route.routes)
+            continue
+
+        for annotation in getattr(route.handler, '__annotations__', {}).values():
+            if is_schema(annotation):
+                yield annotation
+
+
+def preload():
+    # Run in the gunicorn master with preload_app: whatever is imported or
+    # built here is inherited by every forked worker instead of being
+    # redone in each of them, and the pages stay shared until written to.
+    import jose.jwt  # noqa: F401
+    import session  # noqa: F401
+    from recurrence import numpy
+    from sqlalchemy.orm import configure_mappers
+
+    numpy()
+    configure_mappers()
+    for schema_type in route_schemas(create_routes()):
+        schema_fields(schema_type)
+
+    if hasattr(gc, 'freeze'):
+        # Python 3.7+: keep the collector from touching, and so copying,
+        # the objects built up to now.
+        gc.collect()
+        gc.freeze()
 
 
 def create_app(middleware=None, components=None, settings=None):
     if settings is None:
-        settings = Settings({
-            'database_engine_dsn': os.environ['SQLALCHEMY_URI'],
-            'identity_server': os.environ['IDENTITY_SERVER'],
-            'secret_key': os.environ['SECRET_KEY'],
-        })
+        settings = get_settings()
+
+    configure_ids(settings.get('id_strategy', 'uuid4'), settings.get('id_storage', 'hex'))
+    configure_materialize(settings.get('materialize_horizon_days', 0))
+    configure_json(settings.get('json_encoder', 'stdlib'))
 
     if middleware is None:
         middleware = [
+            timing_middleware,
             ResponseRendererMiddleware(),
+            phase_middleware('app'),
             SQLAlchemyMiddleware(),
             auth_middleware,
+            conditional_get_middleware,
+            phase_middleware('view'),
         ]
 
     if components is None:
-        components = [
-            SettingsComponent(settings),
-            SQLAlchemyEngineComponent(),
-            SQLAlchemySessionComponent(),
-            RequestSessionComponent(),
-            AuthProviderComponent(),
-            ManagerComponent(ChoreInstanceManager),
-            ManagerComponent(ChoreDefinitionManager),
-            UserProviderComponent(),
-        ]
+        components = create_components(settings)
 
     app = App(
-        routes=[
-            Route('/login', login, method='POST', name='login'),
-            Include(
-                '/api',
-                routes,
-                namespace='api',
-            )
-        ],
+        routes=create_routes(),
         middleware=middleware,
         components=components,
+        renderers=[FastJSONRenderer()],
     )
     return app
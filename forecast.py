@@ -0,0 +1,108 @@
+import heapq
+from collections import OrderedDict
+from inspect import Parameter
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import pendulum
+from molten import Settings
+
+import events
+from cache import LRUCache
+from models import FrequencyTypes, ForecastRow, isoformat_utc
+
+
+def first_step(anchor: pendulum.DateTime, frequency_type: FrequencyTypes, amount: int, start: pendulum.DateTime) -> int:
+    if anchor >= start:
+        return 0
+
+    if frequency_type in (FrequencyTypes.DAYS, FrequencyTypes.WEEKS):
+        unit = amount * (7 if frequency_type is FrequencyTypes.WEEKS else 1)
+        return (start - anchor).in_days() // unit
+
+    months = (start.year - anchor.year) * 12 + start.month - anchor.month
+    if frequency_type is FrequencyTypes.YEARS:
+        months //= 12
+    return max(months // amount - 1, 0)
+
+
+def occurrences(row: ForecastRow, start: pendulum.DateTime, end: pendulum.DateTime) -> Iterator[Tuple]:
+    anchor = pendulum.instance(row.due_date, tz='UTC')
+    step = first_step(anchor, row.frequency_type, row.frequency_amount, start)
+    while True:
+        due_date = anchor.add(**{row.frequency_type.value: row.frequency_amount * step})
+        if due_date > end:
+            return
+
+        if due_date >= start:
+            yield due_date, row.id, row.name
+        step += 1
+
+
+def forecast(rows: Iterable[ForecastRow], start: pendulum.DateTime, end: pendulum.DateTime) -> Iterator[dict]:
+    for due_date, chore_id, name in heapq.merge(*(occurrences(row, start, end) for row in rows)):
+        yield {
+            'id': chore_id,
+            'name': name,
+            'dueDate': isoformat_utc(due_date),
+        }
+
+
+class ForecastCache:
+    def __init__(self, max_users: int = 1024, ttl: float = 300, max_occurrences: int = 5000, max_windows: int = 4):
+        self.cache = LRUCache(max_size=max_users, ttl=ttl)
+        self.max_occurrences = max_occurrences
+        self.max_windows = max_windows
+        self.generation = 0
+        events.subscribe(self.invalidate)
+
+    def get(self, owner_id: str, version: str, window: Tuple[str, str]) -> Optional[List[dict]]:
+        # Keyed by the version stamp as well, since other processes' changes
+        # never reach invalidate() in this one.
+        entry = self.cache.get(owner_id)
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1].get(window)
+
+    def record(
+        self,
+        owner_id: str,
+        version: str,
+        window: Tuple[str, str],
+        items: Iterable[dict],
+    ) -> Iterator[dict]:
+        generation = self.generation
+        recorded = []
+        for item in items:
+            if recorded is not None:
+                recorded.append(item)
+                if len(recorded) > self.max_occurrences:
+                    recorded = None
+            yield item
+
+        if recorded is not None and generation == self.generation:
+            entry = self.cache.get(owner_id, count=False)
+            windows = entry[1] if entry is not None and entry[0] == version else OrderedDict()
+            windows.pop(window, None)
+            windows[window] = recorded
+            while len(windows) > self.max_windows:
+                windows.popitem(last=False)
+            self.cache.set(owner_id, (version, windows))
+
+    def invalidate(self, owner_id: str):
+        self.generation += 1
+        self.cache.delete(owner_id)
+
+
+class ForecastCacheComponent:
+    is_cacheable = True
+    is_singleton = True
+
+    def can_handle_parameter(self, parameter: Parameter) -> bool:
+        return parameter.annotation is ForecastCache
+
+    def resolve(self, settings: Settings) -> ForecastCache:
+        return ForecastCache(
+            max_users=settings.get('forecast_cache_size', 1024),
+            ttl=settings.get('forecast_cache_ttl', 300),
+            max_windows=settings.get('forecast_cache_windows', 4),
+        )
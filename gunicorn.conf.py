@@ -0,0 +1,36 @@
+import os
+
+
+# Long-polls on /api/changes park a thread rather than a whole worker.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+
+# Import and build the app once in the master; workers fork from it.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def post_worker_init(worker):
+    from factory import get_settings
+    from session import open_session
+
+    open_session(get_settings())
+
+
+def worker_exit(server, worker):
+    from session import close_session
+
+    close_session()
+
+
+def post_fork(server, worker):
+    from database import reset_after_fork
+
+    reset_after_fork()
+
+
+def when_ready(server):
+    # Background jobs run separately, see `python jobs.py`.
+    from factory import preload
+
+    if server.cfg.preload_app:
+        preload()
@@ -0,0 +1,121 @@
+import argparse
+import logging
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from models import ID_STORAGES
+
+
+logger = logging.getLogger('id_storage')
+
+
+SUPPORTED_DIALECTS = ('postgresql', 'sqlite')
+
+ID_COLUMNS = [
+    ('user', 'id'),
+    ('chore_definition', 'id'),
+    ('chore_definition', 'owner_id'),
+    ('chore_instance', 'id'),
+    ('chore_instance', 'owner_id'),
+    ('chore_instance', 'chore_definition_id'),
+    ('chore_instance_archive', 'id'),
+    ('chore_instance_archive', 'owner_id'),
+    ('chore_instance_archive', 'chore_definition_id'),
+    ('chore_stats', 'chore_definition_id'),
+    ('notification_log', 'instance_id'),
+]
+
+FOREIGN_KEYS = [
+    ('chore_definition', 'owner_id', 'user'),
+    ('chore_instance', 'owner_id', 'user'),
+    ('chore_instance', 'chore_definition_id', 'chore_definition'),
+    ('chore_stats', 'chore_definition_id', 'chore_definition'),
+    ('notification_log', 'instance_id', 'chore_instance'),
+]
+
+
+def stored_id_storage(bind) -> str:
+    if bind.dialect.name == 'postgresql':
+        columns = sa.inspect(bind).get_columns('user')
+        id_type = next(c for c in columns if c['name'] == 'id')['type']
+        return 'binary' if isinstance(id_type, postgresql.UUID) else 'hex'
+    blob = bind.execute(sa.text('SELECT 1 FROM "user" WHERE typeof(id) = \'blob\' LIMIT 1')).scalar()
+    return 'binary' if blob else 'hex'
+
+
+def convert_sqlite(bind, tables, convert):
+    # SQLite keeps BLOB values as they are in a VARCHAR column, so the
+    # values can be rewritten in place without rebuilding the tables and
+    # their partial indexes.
+    for table, column in ID_COLUMNS:
+        if table not in tables:
+            continue
+        values = [row[0] for row in bind.execute(sa.text(f'SELECT DISTINCT {column} FROM "{table}"'))]
+        if values:
+            bind.execute(
+                sa.text(f'UPDATE "{table}" SET {column} = :new WHERE {column} = :old'),
+                [{'old': value, 'new': convert(value)} for value in values],
+            )
+
+
+def alter_postgresql(bind, tables, type_, using):
+    foreign_keys = [fk for fk in FOREIGN_KEYS if fk[0] in tables]
+    for table, column, _ in foreign_keys:
+        bind.execute(sa.text(f'ALTER TABLE "{table}" DROP CONSTRAINT "{table}_{column}_fkey"'))
+    for table, column in ID_COLUMNS:
+        if table in tables:
+            bind.execute(sa.text(
+                f'ALTER TABLE "{table}" ALTER COLUMN {column} TYPE {type_} USING {using.format(column=column)}'
+            ))
+    for table, column, referred in foreign_keys:
+        bind.execute(sa.text(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_{column}_fkey" '
+            f'FOREIGN KEY ({column}) REFERENCES "{referred}" (id) ON DELETE CASCADE'
+        ))
+
+
+def convert_id_storage(bind, storage: str) -> bool:
+    """Rewrite every id column in place to `storage`.
+
+    Returns False when the database already stores ids that way.
+    """
+    if storage not in ID_STORAGES:
+        raise ValueError(f'unknown id storage {storage!r}')
+    if bind.dialect.name not in SUPPORTED_DIALECTS:
+        raise NotImplementedError(f'binary ids are not supported on {bind.dialect.name}')
+    if stored_id_storage(bind) == storage:
+        return False
+
+    tables = set(sa.inspect(bind).get_table_names())
+    if bind.dialect.name == 'postgresql':
+        if storage == 'binary':
+            alter_postgresql(bind, tables, 'UUID', '{column}::uuid')
+        else:
+            alter_postgresql(bind, tables, 'VARCHAR(32)', "upper(replace({column}::text, '-', ''))")
+    elif storage == 'binary':
+        convert_sqlite(bind, tables, bytes.fromhex)
+    else:
+        convert_sqlite(bind, tables, lambda value: value.hex().upper())
+    return True
+
+
+def main():
+    from factory import get_settings
+
+    parser = argparse.ArgumentParser(description='Convert stored ids to the configured ID_STORAGE.')
+    parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+    storage = settings.get('id_storage', 'hex')
+    engine = sa.create_engine(settings['database_engine_dsn'])
+    with engine.begin() as bind:
+        if convert_id_storage(bind, storage):
+            logger.info('converted ids to %s storage', storage)
+        else:
+            logger.info('ids are already stored as %s', storage)
+
+
+if __name__ == '__main__':
+    main()
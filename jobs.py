@@ -0,0 +1,121 @@
+import argparse
+import logging
+import signal
+from threading import Event, Thread
+from typing import Any, Callable, List
+
+from molten import Settings
+from sqlalchemy.orm import sessionmaker
+
+import events
+from models import configure_ids, configure_materialize
+
+
+logger = logging.getLogger('jobs')
+
+
+class PeriodicJob(Thread):
+    def __init__(self, name: str, target: Callable[[Event], Any], interval: float):
+        super().__init__(name=name, daemon=True)
+        self.target = target
+        self.interval = interval
+        self.stopped = Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.target(self.stopped)
+            except Exception:
+                logger.exception('%s failed', self.name)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def create_session_factory(settings: Settings) -> sessionmaker:
+    from database import EngineComponent
+
+    configure_ids(settings.get('id_strategy', 'uuid4'), settings.get('id_storage', 'hex'))
+    configure_materialize(settings.get('materialize_horizon_days', 0))
+    return EngineComponent().resolve(settings).session_factory
+
+
+def create_jobs(settings: Settings) -> List[PeriodicJob]:
+    from archive import create_archiver
+    from materialize import create_materializer
+    from notify import create_scanner, create_sink
+
+    archive_interval = settings.get('archive_interval', 0)
+    materialize_interval = settings.get('materialize_interval', 0)
+    notify_interval = settings.get('notify_interval', 0)
+    if settings.get('materialize_horizon_days', 0) <= 0:
+        materialize_interval = 0
+    if not settings.get('notify_sink'):
+        notify_interval = 0
+    if archive_interval <= 0 and materialize_interval <= 0 and notify_interval <= 0:
+        return []
+
+    session_factory = create_session_factory(settings)
+    jobs = []
+    if archive_interval > 0:
+        archiver = create_archiver(settings, session_factory)
+        pause = settings.get('archive_pause', 0)
+        jobs.append(PeriodicJob('archive', lambda stop: archiver.run(pause=pause, stop=stop), archive_interval))
+
+    if materialize_interval > 0:
+        materializer = create_materializer(settings, session_factory)
+        jobs.append(PeriodicJob('materialize', lambda stop: materializer.run(stop=stop), materialize_interval))
+
+    if notify_interval > 0:
+        scanner = create_scanner(settings, session_factory, create_sink(settings.get('notify_sink')))
+        jobs.append(PeriodicJob('notify', lambda stop: scanner.run(stop=stop), notify_interval))
+
+    return jobs
+
+
+def run_jobs(jobs: List[PeriodicJob], stop: Event):
+    for job in jobs:
+        job.start()
+    try:
+        while not stop.wait(1):
+            pass
+    finally:
+        for job in jobs:
+            job.stop()
+
+
+def main():
+    # The jobs get a process of their own rather than threads in the gunicorn
+    # master: the master forks workers at any time, and a fork taken while a
+    # job thread holds a lock (logging, the import lock, a pool) can leave
+    # that lock held forever in the child.
+    from changes import create_broker
+    from factory import get_settings
+
+    parser = argparse.ArgumentParser(description='Run the archive, materialize and notify jobs until stopped.')
+    parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+    jobs = create_jobs(settings)
+    if not jobs:
+        parser.error('no jobs enabled: set ARCHIVE_INTERVAL, MATERIALIZE_INTERVAL or NOTIFY_INTERVAL')
+
+    # Changes committed here (materialized instances) only reach the web
+    # workers' change feed through the broker.  Cached bodies don't depend
+    # on it: they are keyed on the version stamp.
+    broker = create_broker(settings)
+    if broker is not None:
+        events.subscribe(broker.publish)
+    else:
+        logger.warning('CHANGE_FEED_BROKER_URL is not set: /api/changes waiters will not hear about job changes')
+
+    stop = Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop.set())
+    run_jobs(jobs, stop)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import logging
+from collections import defaultdict
+from threading import Event
+from typing import Dict, List, Optional, Tuple
+
+import pendulum
+from molten import Settings
+from sqlalchemy import and_, case, false, func, type_coerce
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from events import mark_changed
+from models import ChoreDefinition, ChoreInstance, FrequencyTypes, PendulumDateTime, get_id
+from recurrence import project
+
+
+logger = logging.getLogger('materialize')
+
+# Shortest possible length of each period, used to size the projection.
+MIN_PERIOD_DAYS = {
+    FrequencyTypes.DAYS: 1,
+    FrequencyTypes.WEEKS: 7,
+    FrequencyTypes.MONTHS: 28,
+    FrequencyTypes.YEARS: 365,
+}
+
+
+def insert_ignoring_duplicates(dialect_name: str):
+    # The unique (chore_definition_id, due_date) index makes concurrent runs
+    # on several hosts safe: whichever inserts an occurrence first wins and
+    # the others skip it.
+    table = ChoreInstance.__table__
+    if dialect_name == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing(index_elements=['chore_definition_id', 'due_date'])
+    if dialect_name == 'sqlite':
+        return table.insert().prefix_with('OR IGNORE')
+    raise NotImplementedError(f'materializing is not supported on {dialect_name}')
+
+
+class Materializer:
+    def __init__(self, session_factory: sessionmaker, horizon_days: int = 30, batch_size: int = 500):
+        self.session_factory = session_factory
+        self.horizon_days = horizon_days
+        self.batch_size = batch_size
+
+    def materialize_batch(self, after: Optional[str], now: pendulum.DateTime) -> Tuple[Optional[str], int]:
+        session = self.session_factory()
+        try:
+            query = session.query(
+                ChoreDefinition.id,
+                ChoreDefinition.name,
+                ChoreDefinition.details,
+                ChoreDefinition.owner_id,
+                ChoreDefinition.frequency_type,
+                ChoreDefinition.frequency_amount,
+            )\
+                .filter(ChoreDefinition.deleted == false())\
+                .filter(ChoreDefinition.frequency_amount > 0)\
+                .order_by(ChoreDefinition.id.asc())
+            if after is not None:
+                query = query.filter(ChoreDefinition.id > after)
+
+            definitions = query.limit(self.batch_size).all()
+            if not definitions:
+                return None, 0
+
+            is_open = and_(ChoreInstance.completed == false(), ChoreInstance.deleted == false())
+            latest = session.query(
+                ChoreInstance.chore_definition_id,
+                type_coerce(func.max(ChoreInstance.due_date), PendulumDateTime(timezone=True)),
+                func.sum(case([(is_open, 1)], else_=0)),
+            )\
+                .filter(ChoreInstance.chore_definition_id.in_([definition.id for definition in definitions]))\
+                .group_by(ChoreInstance.chore_definition_id)\
+                .all()
+
+            rows = self.occurrences(definitions, {row[0]: row[1:] for row in latest}, now)
+            if rows:
+                session.execute(insert_ignoring_duplicates(session.get_bind().dialect.name), rows)
+                for owner_id in {row['owner_id'] for row in rows}:
+                    mark_changed(session, owner_id)
+            session.commit()
+            return definitions[-1].id, len(rows)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def occurrences(self, definitions: List, latest: Dict[str, Tuple], now: pendulum.DateTime) -> List[dict]:
+        horizon_end = now.add(days=self.horizon_days)
+        groups = defaultdict(list)
+        for definition in definitions:
+            if definition.id not in latest:
+                continue
+
+            last_due, open_count = latest[definition.id]
+            if last_due >= horizon_end and open_count:
+                continue
+
+            # Enough steps to pass the horizon even at the shortest period length.
+            period = MIN_PERIOD_DAYS[definition.frequency_type] * definition.frequency_amount
+            count = max(int((horizon_end - last_due).total_seconds() // (period * 86400)) + 1, 1)
+            groups[count].append((definition, last_due, open_count))
+
+        rows = []
+        for count, group in groups.items():
+            projected = project(
+                [last_due for _, last_due, _ in group],
+                [definition.frequency_type for definition, _, _ in group],
+                [definition.frequency_amount for definition, _, _ in group],
+                count,
+            )
+            for (definition, _, open_count), due_dates in zip(group, projected):
+                due_dates = [due_date for due_date in due_dates if due_date > now]
+                pending = [due_date for due_date in due_dates if due_date <= horizon_end]
+                if not pending and not open_count:
+                    # Always keep one open occurrence, however far away.
+                    pending = due_dates[:1]
+
+                rows.extend({
+                    'id': get_id(),
+                    'name': definition.name,
+                    'details': definition.details,
+                    'owner_id': definition.owner_id,
+                    'chore_definition_id': definition.id,
+                    'due_date': due_date,
+                    'completed': False,
+                } for due_date in pending)
+
+        # Same insert order on every host, so concurrent runs can't deadlock.
+        rows.sort(key=lambda row: (row['chore_definition_id'], row['due_date']))
+        return rows
+
+    def run(self, max_batches: Optional[int] = None, stop: Optional[Event] = None) -> int:
+        now = pendulum.now('UTC')
+        after = None
+        materialized = batches = 0
+        while max_batches is None or batches < max_batches:
+            if stop is not None and stop.is_set():
+                break
+
+            after, count = self.materialize_batch(after, now)
+            materialized += count
+            batches += 1
+            if after is None:
+                break
+
+        horizon_end = now.add(days=self.horizon_days)
+        logger.info('materialized %d chore instances up to %s', materialized, horizon_end.isoformat())
+        return materialized
+
+
+def create_materializer(settings: Settings, session_factory: sessionmaker) -> Materializer:
+    return Materializer(
+        session_factory,
+        horizon_days=settings.get('materialize_horizon_days', 0),
+        batch_size=settings.get('materialize_batch_size', 500),
+    )
+
+
+def main():
+    from factory import get_settings
+    from jobs import create_session_factory
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description='Create chore instances ahead of time, up to the horizon.')
+    parser.add_argument('--batch-size', type=int, default=settings.get('materialize_batch_size', 500))
+    parser.add_argument('--max-batches', type=int, default=None)
+    args = parser.parse_args()
+    if settings.get('materialize_horizon_days', 0) <= 0:
+        parser.error('MATERIALIZE_HORIZON_DAYS must be set, or completions will keep creating instances too')
+
+    logging.basicConfig(level=logging.INFO)
+    materializer = create_materializer(settings, create_session_factory(settings))
+    materializer.batch_size = args.batch_size
+    materializer.run(max_batches=args.max_batches)
+
+
+if __name__ == '__main__':
+    main()
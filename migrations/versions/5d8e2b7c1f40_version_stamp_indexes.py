@@ -0,0 +1,37 @@
+"""version stamp indexes
+
+Revision ID: 5d8e2b7c1f40
+Revises: a3c51f0d9e27
+Create Date: 2026-10-18 14:21:07.530126
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8e2b7c1f40'
+down_revision = 'a3c51f0d9e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_chore_definition_owner_updated',
+        'chore_definition',
+        ['owner_id', 'updated_at'],
+        unique=False,
+    )
+    op.drop_index('ix_chore_definition_owner_id', table_name='chore_definition')
+    op.create_index(
+        'ix_chore_instance_owner_updated',
+        'chore_instance',
+        ['owner_id', 'updated_at'],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_chore_instance_owner_updated', table_name='chore_instance')
+    op.create_index('ix_chore_definition_owner_id', 'chore_definition', ['owner_id'], unique=False)
+    op.drop_index('ix_chore_definition_owner_updated', table_name='chore_definition')
@@ -0,0 +1,100 @@
+"""binary ids
+
+Revision ID: 8c4f1e2a9b73
+Revises: 5d8e2b7c1f40
+Create Date: 2026-10-18 16:02:44.118203
+
+Only converts anything when the app is configured with ID_STORAGE=binary.
+To switch an existing database later, change ID_STORAGE and run
+`python id_storage.py` at any revision: it converts every id column in
+place, including chore_instance_archive and chore_stats, so nothing has
+to be downgraded.  Both it and this migration check what is actually
+stored first.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from models import id_storage
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4f1e2a9b73'
+down_revision = '5d8e2b7c1f40'
+branch_labels = None
+depends_on = None
+
+
+SUPPORTED_DIALECTS = ('postgresql', 'sqlite')
+
+ID_COLUMNS = [
+    ('user', 'id'),
+    ('chore_definition', 'id'),
+    ('chore_definition', 'owner_id'),
+    ('chore_instance', 'id'),
+    ('chore_instance', 'owner_id'),
+    ('chore_instance', 'chore_definition_id'),
+]
+
+FOREIGN_KEYS = [
+    ('chore_definition', 'owner_id', 'user'),
+    ('chore_instance', 'owner_id', 'user'),
+    ('chore_instance', 'chore_definition_id', 'chore_definition'),
+]
+
+
+def is_binary(bind) -> bool:
+    if bind.dialect.name == 'postgresql':
+        columns = sa.inspect(bind).get_columns('user')
+        return isinstance(next(c for c in columns if c['name'] == 'id')['type'], postgresql.UUID)
+    return bool(bind.execute(sa.text('SELECT 1 FROM "user" WHERE typeof(id) = \'blob\' LIMIT 1')).scalar())
+
+
+def convert_sqlite(bind, convert):
+    # SQLite keeps BLOB values as they are in a VARCHAR column, so the
+    # values can be rewritten in place without rebuilding the tables and
+    # their partial indexes.
+    for table, column in ID_COLUMNS:
+        values = [row[0] for row in bind.execute(sa.text(f'SELECT DISTINCT {column} FROM "{table}"'))]
+        if values:
+            bind.execute(
+                sa.text(f'UPDATE "{table}" SET {column} = :new WHERE {column} = :old'),
+                [{'old': value, 'new': convert(value)} for value in values],
+            )
+
+
+def alter_postgresql(type_, using):
+    for table, column, _ in FOREIGN_KEYS:
+        op.drop_constraint(f'{table}_{column}_fkey', table, type_='foreignkey')
+    for table, column in ID_COLUMNS:
+        op.alter_column(table, column, type_=type_, postgresql_using=using.format(column=column))
+    for table, column, referred in FOREIGN_KEYS:
+        op.create_foreign_key(f'{table}_{column}_fkey', table, referred, [column], ['id'], ondelete='CASCADE')
+
+
+def upgrade():
+    bind = op.get_bind()
+    if id_storage() != 'binary':
+        return
+
+    if bind.dialect.name not in SUPPORTED_DIALECTS:
+        raise NotImplementedError(f'binary ids are not supported on {bind.dialect.name}')
+
+    if is_binary(bind):
+        return
+
+    if bind.dialect.name == 'postgresql':
+        alter_postgresql(postgresql.UUID(), '{column}::uuid')
+    else:
+        convert_sqlite(bind, bytes.fromhex)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name not in SUPPORTED_DIALECTS or not is_binary(bind):
+        return
+
+    if bind.dialect.name == 'postgresql':
+        alter_postgresql(sa.String(length=32), "upper(replace({column}::text, '-', ''))")
+    else:
+        convert_sqlite(bind, lambda value: value.hex().upper())
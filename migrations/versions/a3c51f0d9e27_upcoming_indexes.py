@@ -0,0 +1,46 @@
+"""upcoming indexes
+
+Revision ID: a3c51f0d9e27
+Revises: 647105091bf6
+Create Date: 2026-10-18 10:02:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c51f0d9e27'
+down_revision = '647105091bf6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    open_instances = sa.and_(sa.column('completed') == sa.false(), sa.column('deleted') == sa.false())
+    op.create_index(
+        'ix_chore_instance_open_owner_due',
+        'chore_instance',
+        ['owner_id', 'due_date'],
+        unique=False,
+        sqlite_where=open_instances,
+        postgresql_where=open_instances,
+    )
+    op.create_index(
+        'ix_chore_instance_chore_definition_id',
+        'chore_instance',
+        ['chore_definition_id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_chore_definition_owner_id',
+        'chore_definition',
+        ['owner_id'],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_chore_definition_owner_id', table_name='chore_definition')
+    op.drop_index('ix_chore_instance_chore_definition_id', table_name='chore_instance')
+    op.drop_index('ix_chore_instance_open_owner_due', table_name='chore_instance')
@@ -0,0 +1,110 @@
+"""chore stats
+
+Revision ID: b5a9d3e6f214
+Revises: e71b0c4d5a28
+Create Date: 2026-10-18 18:27:53.604117
+
+"""
+from datetime import timezone
+from itertools import groupby
+
+from alembic import op
+import sqlalchemy as sa
+
+import models
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5a9d3e6f214'
+down_revision = 'e71b0c4d5a28'
+branch_labels = None
+depends_on = None
+
+
+# The tables as they are at this revision.  Ids are copied across as
+# stored, so their columns are left untyped.
+chore_definition = sa.table('chore_definition', sa.column('id'))
+
+
+def completions_table(name):
+    return sa.table(
+        name,
+        sa.column('id'),
+        sa.column('chore_definition_id'),
+        sa.column('due_date', sa.DateTime(timezone=True)),
+        sa.column('updated_at', sa.DateTime(timezone=True)),
+        sa.column('completed', sa.Boolean()),
+    )
+
+
+chore_instance = completions_table('chore_instance')
+chore_instance_archive = completions_table('chore_instance_archive')
+chore_stats = sa.table(
+    'chore_stats',
+    sa.column('chore_definition_id'),
+    sa.column('completions', sa.Integer()),
+    sa.column('on_time', sa.Integer()),
+    sa.column('total_lateness', sa.Float()),
+    sa.column('current_streak', sa.Integer()),
+    sa.column('last_completed_at', sa.DateTime(timezone=True)),
+)
+
+
+def utc(value):
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def backfill(bind):
+    completions = sa.union_all(*[
+        sa.select([table.c.chore_definition_id, table.c.due_date, table.c.updated_at, table.c.id])
+        .where(table.c.completed == sa.true())
+        for table in (chore_instance, chore_instance_archive)
+    ]).alias('completions')
+    rows = bind.execute(sa.select([completions]).order_by(
+        completions.c.chore_definition_id,
+        completions.c.updated_at,
+        completions.c.due_date,
+        completions.c.id,
+    ))
+
+    stats = {row[0]: {
+        'chore_definition_id': row[0],
+        'completions': 0,
+        'on_time': 0,
+        'total_lateness': 0.0,
+        'current_streak': 0,
+        'last_completed_at': None,
+    } for row in bind.execute(sa.select([chore_definition.c.id]))}
+    for definition_id, completed in groupby(rows, key=lambda row: row[0]):
+        folded = stats.get(definition_id)
+        if folded is None:
+            continue
+        for _, due_date, completed_at, _ in completed:
+            late_by = max((utc(completed_at) - utc(due_date)).total_seconds(), 0.0)
+            folded['completions'] += 1
+            folded['on_time'] += late_by == 0
+            folded['total_lateness'] += late_by
+            folded['current_streak'] = folded['current_streak'] + 1 if late_by == 0 else 0
+            folded['last_completed_at'] = completed_at
+
+    if stats:
+        bind.execute(chore_stats.insert(), list(stats.values()))
+
+
+def upgrade():
+    op.create_table(
+        'chore_stats',
+        sa.Column('chore_definition_id', models.HexId(), nullable=False),
+        sa.Column('completions', sa.Integer(), server_default=sa.literal(0), nullable=False),
+        sa.Column('on_time', sa.Integer(), server_default=sa.literal(0), nullable=False),
+        sa.Column('total_lateness', sa.Float(), server_default=sa.literal(0), nullable=False),
+        sa.Column('current_streak', sa.Integer(), server_default=sa.literal(0), nullable=False),
+        sa.Column('last_completed_at', models.PendulumDateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['chore_definition_id'], ['chore_definition.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('chore_definition_id'),
+    )
+    backfill(op.get_bind())
+
+
+def downgrade():
+    op.drop_table('chore_stats')
@@ -0,0 +1,35 @@
+"""unique instance due date
+
+Revision ID: c8e2f47a1d95
+Revises: b5a9d3e6f214
+Create Date: 2026-10-18 19:12:37.240619
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e2f47a1d95'
+down_revision = 'b5a9d3e6f214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_chore_instance_definition_due',
+        'chore_instance',
+        ['chore_definition_id', 'due_date'],
+        unique=True,
+    )
+    op.drop_index('ix_chore_instance_chore_definition_id', table_name='chore_instance')
+
+
+def downgrade():
+    op.create_index(
+        'ix_chore_instance_chore_definition_id',
+        'chore_instance',
+        ['chore_definition_id'],
+        unique=False,
+    )
+    op.drop_index('ix_chore_instance_definition_due', table_name='chore_instance')
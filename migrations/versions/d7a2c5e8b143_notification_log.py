@@ -0,0 +1,60 @@
+"""notification log
+
+Revision ID: d7a2c5e8b143
+Revises: f3d6a0b9c182
+Create Date: 2026-10-18 22:14:37.402918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+import models
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a2c5e8b143'
+down_revision = 'f3d6a0b9c182'
+branch_labels = None
+depends_on = None
+
+
+notification_checkpoint = sa.table('notification_checkpoint', sa.column('kind'), sa.column('position'))
+chore_instance = sa.table(
+    'chore_instance',
+    sa.column('id'),
+    sa.column('due_date'),
+    sa.column('completed', sa.Boolean()),
+    sa.column('deleted', sa.Boolean()),
+)
+notification_log = sa.table('notification_log', sa.column('kind'), sa.column('instance_id'), sa.column('sent_at'))
+
+
+def upgrade():
+    op.create_table(
+        'notification_log',
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('instance_id', models.HexId(), nullable=False),
+        sa.Column('sent_at', models.PendulumDateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['instance_id'], ['chore_instance.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('kind', 'instance_id'),
+    )
+    # Open instances the checkpoints had already passed were sent; log them
+    # so the first sweep doesn't remind everyone again.
+    op.execute(notification_log.insert().from_select(
+        ['kind', 'instance_id', 'sent_at'],
+        sa.select([notification_checkpoint.c.kind, chore_instance.c.id, notification_checkpoint.c.position])
+        .where(chore_instance.c.due_date <= notification_checkpoint.c.position)
+        .where(chore_instance.c.completed == sa.false())
+        .where(chore_instance.c.deleted == sa.false()),
+    ))
+    op.drop_table('notification_checkpoint')
+
+
+def downgrade():
+    op.create_table(
+        'notification_checkpoint',
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('position', models.PendulumDateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('kind'),
+    )
+    op.drop_table('notification_log')
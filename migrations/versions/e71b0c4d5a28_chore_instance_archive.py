@@ -0,0 +1,57 @@
+"""chore instance archive
+
+Revision ID: e71b0c4d5a28
+Revises: 8c4f1e2a9b73
+Create Date: 2026-10-18 17:41:09.532871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+import models
+
+
+# revision identifiers, used by Alembic.
+revision = 'e71b0c4d5a28'
+down_revision = '8c4f1e2a9b73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'chore_instance_archive',
+        sa.Column('id', models.HexId(), nullable=False),
+        sa.Column('created_at', models.PendulumDateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', models.PendulumDateTime(timezone=True), nullable=False),
+        sa.Column('deleted', sa.Boolean(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('details', sa.Text(), nullable=False),
+        sa.Column('owner_id', models.HexId(), nullable=False),
+        sa.Column('chore_definition_id', models.HexId(), nullable=False),
+        sa.Column('due_date', models.PendulumDateTime(timezone=True), nullable=False),
+        sa.Column('completed', sa.Boolean(), nullable=False),
+        sa.Column('archived_at', models.PendulumDateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_chore_instance_archive_owner_definition_due',
+        'chore_instance_archive',
+        ['owner_id', 'chore_definition_id', 'due_date'],
+        unique=False,
+    )
+    archivable = sa.or_(sa.column('completed') == sa.true(), sa.column('deleted') == sa.true())
+    op.create_index(
+        'ix_chore_instance_archivable',
+        'chore_instance',
+        ['updated_at'],
+        unique=False,
+        sqlite_where=archivable,
+        postgresql_where=archivable,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_chore_instance_archivable', table_name='chore_instance')
+    op.drop_index('ix_chore_instance_archive_owner_definition_due', table_name='chore_instance_archive')
+    op.drop_table('chore_instance_archive')
@@ -0,0 +1,41 @@
+"""notification checkpoints
+
+Revision ID: f3d6a0b9c182
+Revises: c8e2f47a1d95
+Create Date: 2026-10-18 20:03:15.881472
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+import models
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3d6a0b9c182'
+down_revision = 'c8e2f47a1d95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notification_checkpoint',
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('position', models.PendulumDateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('kind'),
+    )
+    open_instances = sa.and_(sa.column('completed') == sa.false(), sa.column('deleted') == sa.false())
+    op.create_index(
+        'ix_chore_instance_open_due',
+        'chore_instance',
+        ['due_date'],
+        unique=False,
+        sqlite_where=open_instances,
+        postgresql_where=open_instances,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_chore_instance_open_due', table_name='chore_instance')
+    op.drop_table('notification_checkpoint')
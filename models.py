@@ -1,11 +1,17 @@
 import enum
+import os
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
 from uuid import uuid4
 from inspect import Parameter
-from typing import List
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 import pendulum
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import make_transient_to_detached, relationship
 from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.dialects import postgresql
 from sqlalchemy import types,\
     Column,\
     String,\
@@ -15,21 +21,119 @@ from sqlalchemy import types,\
     CheckConstraint,\
     Enum,\
     Boolean,\
-    literal
+    Float,\
+    Index,\
+    and_,\
+    or_,\
+    bindparam,\
+    case,\
+    column,\
+    false,\
+    func,\
+    literal,\
+    select,\
+    true,\
+    type_coerce,\
+    union_all
+from molten import Settings
 from molten.contrib.sqlalchemy import Session
 
+from cache import LRUCache
+from events import mark_changed
+from recurrence import next_due_date
+
+
+UPCOMING_HORIZON_DAYS = 14
+
+
+ID_STRATEGIES = ('uuid4', 'uuid7')
+ID_STORAGES = ('hex', 'binary')
+
+_ids = {'strategy': 'uuid4', 'storage': 'hex'}
+
+
+def configure_ids(strategy: str = 'uuid4', storage: str = 'hex'):
+    if strategy not in ID_STRATEGIES:
+        raise ValueError(f'unknown id strategy {strategy!r}')
+    if storage not in ID_STORAGES:
+        raise ValueError(f'unknown id storage {storage!r}')
+    _ids.update(strategy=strategy, storage=storage)
+
+
+def id_storage() -> str:
+    return _ids['storage']
+
+
+_materialize = {'horizon_days': 0}
+
+
+def configure_materialize(horizon_days: int = 0):
+    _materialize['horizon_days'] = horizon_days
+
+
+def materialize_horizon_days() -> int:
+    return _materialize['horizon_days']
+
+
+def uuid7_hex() -> str:
+    # 48 bits of Unix milliseconds, then the version and variant bits around
+    # 74 random bits, so ids sort by creation time.
+    value = int(time.time() * 1000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    value = value & ~(0xF << 76) | 0x7 << 76
+    value = value & ~(0x3 << 62) | 0x2 << 62
+    return f'{value:032X}'
+
 
 def get_id():
+    if _ids['strategy'] == 'uuid7':
+        return uuid7_hex()
     return uuid4().hex.upper()
 
 
+class HexId(types.TypeDecorator):
+    impl = types.String(32)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if _ids['storage'] == 'binary':
+            if dialect.name == 'postgresql':
+                return dialect.type_descriptor(postgresql.UUID())
+            return dialect.type_descriptor(types.LargeBinary(16))
+        return dialect.type_descriptor(types.String(32))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or _ids['storage'] != 'binary' or dialect.name == 'postgresql':
+            return value
+        return bytes.fromhex(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str) and len(value) == 32:
+            return value
+        if isinstance(value, bytes):
+            return value.hex().upper()
+        return str(value).replace('-', '').upper()
+
+
 class PendulumDateTime(types.TypeDecorator):
     impl = types.DateTime
+    cache_ok = True
 
     def process_result_value(self, value, dialect):
+        if value is None:
+            return None
         return pendulum.instance(value)
 
 
+def isoformat_utc(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+def raw_datetime(column):
+    return type_coerce(column, types.DateTime(timezone=True)).label(column.key)
+
+
 class FrequencyTypes(enum.Enum):
     DAYS = 'days'
     WEEKS = 'weeks'
@@ -43,7 +147,7 @@ Model = declarative_base()
 class Base(Model):
     __abstract__ = True
     id = Column(
-        String(32),
+        HexId(),
         nullable=False,
         primary_key=True,
         default=get_id,
@@ -82,8 +186,17 @@ class ChoreDefinition(Base):
     frequency_amount = Column(Integer, nullable=False)
     frequency_type = Column(Enum(FrequencyTypes), nullable=False)
 
-    __table_args = (
+    owner = relationship(User, lazy='raise_on_sql')
+    instances = relationship(
+        'ChoreInstance',
+        back_populates='chore_definition',
+        lazy='raise_on_sql',
+        passive_deletes=True,
+    )
+
+    __table_args__ = (
         CheckConstraint(frequency_amount >= 0, name='check_frequency_amount_positive'),
+        Index('ix_chore_definition_owner_updated', 'owner_id', 'updated_at'),
     )
 
 
@@ -97,6 +210,38 @@ class ChoreInstance(Base):
     due_date = Column(PendulumDateTime(timezone=True), nullable=False, default=lambda: pendulum.now('UTC'))
     completed = Column(Boolean, nullable=False, default=False)
 
+    owner = relationship(User, lazy='raise_on_sql')
+    chore_definition = relationship(
+        ChoreDefinition,
+        back_populates='instances',
+        lazy='joined',
+        innerjoin=True,
+    )
+
+    __table_args__ = (
+        Index(
+            'ix_chore_instance_open_owner_due',
+            'owner_id',
+            'due_date',
+            sqlite_where=and_(column('completed') == false(), column('deleted') == false()),
+            postgresql_where=and_(column('completed') == false(), column('deleted') == false()),
+        ),
+        Index(
+            'ix_chore_instance_open_due',
+            'due_date',
+            sqlite_where=and_(column('completed') == false(), column('deleted') == false()),
+            postgresql_where=and_(column('completed') == false(), column('deleted') == false()),
+        ),
+        Index('ix_chore_instance_definition_due', 'chore_definition_id', 'due_date', unique=True),
+        Index('ix_chore_instance_owner_updated', 'owner_id', 'updated_at'),
+        Index(
+            'ix_chore_instance_archivable',
+            'updated_at',
+            sqlite_where=or_(column('completed') == true(), column('deleted') == true()),
+            postgresql_where=or_(column('completed') == true(), column('deleted') == true()),
+        ),
+    )
+
     @classmethod
     def from_definition(cls, chore_definition: ChoreDefinition, due_date: pendulum.DateTime):
         return cls(
@@ -108,13 +253,118 @@ class ChoreInstance(Base):
         )
 
 
+class ArchivedChoreInstance(Model):
+    __tablename__ = 'chore_instance_archive'
+
+    id = Column(HexId(), nullable=False, primary_key=True)
+    created_at = Column(PendulumDateTime(timezone=True), nullable=False)
+    updated_at = Column(PendulumDateTime(timezone=True), nullable=False)
+    deleted = Column(Boolean, nullable=False)
+    name = Column(String(255), nullable=False)
+    details = Column(Text, nullable=False)
+    owner_id = Column(HexId(), nullable=False)
+    chore_definition_id = Column(HexId(), nullable=False)
+    due_date = Column(PendulumDateTime(timezone=True), nullable=False)
+    completed = Column(Boolean, nullable=False)
+    archived_at = Column(PendulumDateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index('ix_chore_instance_archive_owner_definition_due', 'owner_id', 'chore_definition_id', 'due_date'),
+    )
+
+
+class ChoreStats(Model):
+    __tablename__ = 'chore_stats'
+
+    chore_definition_id = Column(
+        ForeignKey('chore_definition.id', ondelete='CASCADE'),
+        nullable=False,
+        primary_key=True,
+    )
+    completions = Column(Integer, nullable=False, default=0, server_default=literal(0))
+    on_time = Column(Integer, nullable=False, default=0, server_default=literal(0))
+    total_lateness = Column(Float, nullable=False, default=0, server_default=literal(0))
+    current_streak = Column(Integer, nullable=False, default=0, server_default=literal(0))
+    last_completed_at = Column(PendulumDateTime(timezone=True), nullable=True)
+
+
+class NotificationLog(Model):
+    __tablename__ = 'notification_log'
+
+    kind = Column(String(32), nullable=False, primary_key=True)
+    instance_id = Column(ForeignKey('chore_instance.id', ondelete='CASCADE'), nullable=False, primary_key=True)
+    sent_at = Column(PendulumDateTime(timezone=True), nullable=False)
+
+
+def lateness_seconds(due_date: datetime, completed_at: datetime) -> float:
+    return max((completed_at - due_date).total_seconds(), 0.0)
+
+
+def next_instance_due_date(
+    due_date: datetime,
+    frequency_type: FrequencyTypes,
+    amount: int,
+    completed_at: pendulum.DateTime,
+) -> pendulum.DateTime:
+    if not materialize_horizon_days():
+        return next_due_date(completed_at, frequency_type, amount)
+
+    # Stay on the materializer's schedule, so whichever of the two creates
+    # an occurrence first, the other's insert is a duplicate it ignores.
+    step = 1
+    while True:
+        next_date = next_due_date(due_date, frequency_type, amount * step)
+        if next_date > completed_at:
+            return next_date
+        step += 1
+
+
+_stats_table = ChoreStats.__table__
+
+RECORD_COMPLETION = _stats_table.update()\
+    .where(_stats_table.c.chore_definition_id == bindparam('definition_id'))\
+    .values(
+        completions=_stats_table.c.completions + 1,
+        on_time=_stats_table.c.on_time + case([(bindparam('late_by') == 0, 1)], else_=0),
+        total_lateness=_stats_table.c.total_lateness + bindparam('late_by'),
+        current_streak=case([(bindparam('late_by') == 0, _stats_table.c.current_streak + 1)], else_=0),
+        last_completed_at=bindparam('completed_at', type_=PendulumDateTime(timezone=True)),
+    )
+
+
+UpcomingChoreRow = namedtuple('UpcomingChoreRow', 'id name due_date details')
+ChoreRow = namedtuple('ChoreRow', 'id name details frequency_type frequency_amount created_at')
+VersionStamp = namedtuple('VersionStamp', 'definitions instances updated_at upcoming')
+ForecastRow = namedtuple('ForecastRow', 'id name frequency_type frequency_amount due_date')
+HistoryRow = namedtuple('HistoryRow', 'id due_date completed_at')
+StatsRow = namedtuple('StatsRow', 'id completions on_time total_lateness current_streak last_completed_at')
+
+
 class UserProvider:
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, user_cache: Optional[LRUCache] = None):
         self.session = session
+        self.user_cache = user_cache
         self._user = None
 
-    def load_user(self, user_id: str):
+    def load_user(self, user_id: str, expires_at: Optional[float] = None):
+        if self.user_cache is None:
+            self._user = self.session.query(User).get(user_id)
+            return
+
+        values = self.user_cache.get(user_id)
+        if values is not None:
+            user = User(**values)
+            make_transient_to_detached(user)
+            self._user = self.session.merge(user, load=False)
+            return
+
         self._user = self.session.query(User).get(user_id)
+        if self._user is not None:
+            values = {
+                column.key: getattr(self._user, column.key)
+                for column in User.__table__.columns
+            }
+            self.user_cache.set(user_id, values, expires_at=expires_at)
 
     def get_user(self) -> User:
         return self._user
@@ -141,18 +391,87 @@ class Manager:
         self.session = session
         self.user_provider = user_provider
 
+    def _keyset(self, query, sort_column, id_column, limit: Optional[int], after: Optional[Tuple]):
+        if after is not None:
+            sort_value, row_id = after
+            query = query.filter(or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, id_column > row_id),
+            ))
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        return query
+
+    def _stream(self, query, batch_size: int) -> Iterator:
+        # Streamed rows are consumed after SQLAlchemyMiddleware has already
+        # committed and closed the session, so the generator owns the
+        # connection it reopens and releases it when it is done.
+        try:
+            for row in query.yield_per(batch_size):
+                yield row
+        finally:
+            self.session.close()
+
 
 class ChoreInstanceManager(Manager):
 
-    def get_upcoming_chores(self) -> List[ChoreInstance]:
+    def get_upcoming_chores(self, limit: Optional[int] = None, after: Optional[Tuple] = None) -> List[ChoreInstance]:
+        user = self.user_provider.get_user()
+        query = self.upcoming_chores_query(user.id)
+        return self._keyset(query, ChoreInstance.due_date, ChoreInstance.id, limit, after).all()
+
+    def iter_upcoming_chores(self, batch_size: int = 500) -> Iterator[ChoreInstance]:
+        user = self.user_provider.get_user()
+        return self._stream(self.upcoming_chores_query(user.id), batch_size)
+
+    def get_upcoming_chore_rows(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[Tuple] = None,
+    ) -> List[UpcomingChoreRow]:
         user = self.user_provider.get_user()
+        query = self.upcoming_chore_rows_query(user.id)
+        rows = self._keyset(query, ChoreInstance.due_date, ChoreInstance.id, limit, after)
+        return [UpcomingChoreRow(*row) for row in rows]
+
+    def iter_upcoming_chore_rows(self, batch_size: int = 500) -> Iterator[UpcomingChoreRow]:
+        user = self.user_provider.get_user()
+        rows = self._stream(self.upcoming_chore_rows_query(user.id), batch_size)
+        return (UpcomingChoreRow(*row) for row in rows)
+
+    def upcoming_chore_rows_query(self, owner_id: str):
+        return self.upcoming_chores_query(owner_id).with_entities(
+            ChoreInstance.id,
+            ChoreInstance.name,
+            raw_datetime(ChoreInstance.due_date),
+            ChoreInstance.details,
+        )
+
+    def upcoming_chores_query(self, owner_id: str):
         return self.session.query(ChoreInstance)\
-            .filter_by(completed=False)\
-            .filter_by(deleted=False)\
+            .filter(ChoreInstance.completed == false())\
+            .filter(ChoreInstance.deleted == false())\
+            .filter_by(owner_id=owner_id)\
+            .filter(ChoreInstance.due_date <= pendulum.now('UTC').add(days=UPCOMING_HORIZON_DAYS))\
+            .order_by(ChoreInstance.due_date.asc(), ChoreInstance.id.asc())
+
+    def seconds_until_upcoming_changes(self) -> Optional[float]:
+        user = self.user_provider.get_user()
+        horizon = pendulum.now('UTC').add(days=UPCOMING_HORIZON_DAYS)
+        row = self.session.query(raw_datetime(ChoreInstance.due_date))\
+            .filter(ChoreInstance.completed == false())\
+            .filter(ChoreInstance.deleted == false())\
             .filter_by(owner_id=user.id)\
-            .filter(ChoreInstance.due_date <= pendulum.now('UTC').add(days=14))\
+            .filter(ChoreInstance.due_date > horizon)\
             .order_by(ChoreInstance.due_date.asc())\
-            .all()
+            .first()
+        if row is None:
+            return None
+
+        due_date = row[0] if row[0].tzinfo else row[0].replace(tzinfo=timezone.utc)
+        return (due_date - horizon).total_seconds()
 
     def complete_chore(self, chore_id: str):
         user = self.user_provider.get_user()
@@ -160,25 +479,131 @@ class ChoreInstanceManager(Manager):
             instance = self.session.query(ChoreInstance)\
                 .filter_by(owner_id=user.id)\
                 .filter_by(id=chore_id)\
+                .filter_by(completed=False)\
                 .filter_by(deleted=False)\
                 .one()
         except NoResultFound:
             return
 
-        chore_definition = self.session.query(ChoreDefinition).get(instance.chore_definition_id)
+        now = pendulum.now('UTC')
+        if not self._complete_open([instance.id], now):
+            return
 
-        instance.completed = True
-        self.session.add(instance)
-        amount = chore_definition.frequency_amount
-        frequency_type = chore_definition.frequency_type.value
+        chore_definition = instance.chore_definition
+        self._insert_next_instances([{
+            'id': get_id(),
+            'name': chore_definition.name,
+            'details': chore_definition.details,
+            'owner_id': user.id,
+            'chore_definition_id': chore_definition.id,
+            'due_date': next_instance_due_date(
+                instance.due_date, chore_definition.frequency_type, chore_definition.frequency_amount, now),
+            'completed': False,
+        }])
+        self._record_completions([(chore_definition.id, instance.due_date)], now)
+        mark_changed(self.session, user.id)
+
+    def complete_chores(self, chore_ids: List[str]) -> Dict[str, bool]:
+        user = self.user_provider.get_user()
+        chore_ids = list(dict.fromkeys(chore_ids))
+        rows = self.session.query(
+            ChoreInstance.id,
+            ChoreDefinition.id,
+            ChoreDefinition.name,
+            ChoreDefinition.details,
+            ChoreDefinition.frequency_type,
+            ChoreDefinition.frequency_amount,
+            ChoreInstance.due_date,
+        )\
+            .join(ChoreDefinition, ChoreDefinition.id == ChoreInstance.chore_definition_id)\
+            .filter(ChoreInstance.id.in_(chore_ids))\
+            .filter(ChoreInstance.owner_id == user.id)\
+            .filter(ChoreInstance.completed == false())\
+            .filter(ChoreInstance.deleted == false())\
+            .order_by(ChoreInstance.due_date.asc(), ChoreInstance.id.asc())\
+            .all()
 
-        date_kwargs = {
-            frequency_type: amount,
+        results = dict.fromkeys(chore_ids, False)
+        if not rows:
+            return results
+
+        now = pendulum.now('UTC')
+        completed = self._complete_open([row[0] for row in rows], now)
+        rows = [row for row in rows if row[0] in completed]
+        if not rows:
+            return results
+
+        new_instances = {}
+        for instance_id, definition_id, name, details, frequency_type, frequency_amount, due_date in rows:
+            results[instance_id] = True
+            new_instances[definition_id] = {
+                'id': get_id(),
+                'name': name,
+                'details': details,
+                'owner_id': user.id,
+                'chore_definition_id': definition_id,
+                'due_date': next_instance_due_date(due_date, frequency_type, frequency_amount, now),
+                'completed': False,
+            }
+
+        self._insert_next_instances(list(new_instances.values()))
+        self._record_completions([(row[1], row[6]) for row in rows], now)
+        mark_changed(self.session, user.id)
+        return results
+
+    def _complete_open(self, instance_ids: List[str], completed_at: pendulum.DateTime) -> Set[str]:
+        # Only rows still open when the UPDATE runs change, so two requests
+        # completing the same instance record it and spawn its successor once.
+        table = ChoreInstance.__table__
+        update = table.update()\
+            .where(table.c.id.in_(instance_ids))\
+            .where(table.c.completed == false())\
+            .values(completed=True, updated_at=completed_at)
+        if self.session.get_bind().dialect.name == 'postgresql':
+            return {row[0] for row in self.session.execute(update.returning(table.c.id))}
+
+        # Without RETURNING the rowcount can't say which rows changed, so the
+        # batch only goes through while all of it is still open.  Otherwise
+        # another request got to some of it first: the failed UPDATE already
+        # holds SQLite's write lock, so settle them one at a time.
+        other = table.alias()
+        open_count = select([func.count()])\
+            .where(other.c.id.in_(instance_ids))\
+            .where(other.c.completed == false())\
+            .scalar_subquery()
+        if self.session.execute(update.where(open_count == len(instance_ids))).rowcount:
+            return set(instance_ids)
+
+        return {
+            instance_id for instance_id in instance_ids
+            if self.session.execute(update.where(table.c.id == instance_id)).rowcount
         }
-        new_due_date = pendulum.now('UTC').add(**date_kwargs)
-        new_instance = ChoreInstance.from_definition(chore_definition, new_due_date)
-        self.session.add(new_instance)
-        self.session.flush()
+
+    def _insert_next_instances(self, rows: List[dict]):
+        if not materialize_horizon_days():
+            self.session.execute(ChoreInstance.__table__.insert(), rows)
+            return
+
+        # The materializer keeps the schedule filled ahead of time, but a
+        # definition must never be left without an open instance until its
+        # next run, so completions still fill in for those.
+        from materialize import insert_ignoring_duplicates
+
+        still_open = {row[0] for row in self.session.query(ChoreInstance.chore_definition_id)
+                      .filter(ChoreInstance.chore_definition_id.in_([row['chore_definition_id'] for row in rows]))
+                      .filter(ChoreInstance.completed == false())
+                      .filter(ChoreInstance.deleted == false())
+                      .distinct()}
+        rows = [row for row in rows if row['chore_definition_id'] not in still_open]
+        if rows:
+            self.session.execute(insert_ignoring_duplicates(self.session.get_bind().dialect.name), rows)
+
+    def _record_completions(self, completions: List[Tuple[str, datetime]], completed_at: pendulum.DateTime):
+        self.session.execute(RECORD_COMPLETION, [{
+            'definition_id': definition_id,
+            'late_by': lateness_seconds(due_date, completed_at),
+            'completed_at': completed_at,
+        } for definition_id, due_date in completions])
 
 
 class ChoreDefinitionManager(Manager):
@@ -194,15 +619,74 @@ class ChoreDefinitionManager(Manager):
         )
         self.session.add(chore_definition)
         self.session.add(ChoreInstance.from_definition(chore_definition, chore_data.start_date))
+        self.session.add(ChoreStats(chore_definition_id=chore_definition.id))
         self.session.flush()
+        mark_changed(self.session, user.id)
         return chore_definition
 
-    def get_chores(self) -> List[ChoreDefinition]:
+    def persist_chores(self, chores: list, batch_size: int = 1000) -> List[str]:
+        user = self.user_provider.get_user()
+        definition_ids = [get_id() for _ in chores]
+        for start in range(0, len(chores), batch_size):
+            batch = list(zip(definition_ids[start:start + batch_size], chores[start:start + batch_size]))
+            self.session.execute(ChoreDefinition.__table__.insert(), [{
+                'id': definition_id,
+                'name': chore_data.name,
+                'details': chore_data.details,
+                'frequency_amount': chore_data.frequency_amount,
+                'frequency_type': chore_data.frequency_type,
+                'owner_id': user.id,
+            } for definition_id, chore_data in batch])
+            self.session.execute(ChoreInstance.__table__.insert(), [{
+                'id': get_id(),
+                'name': chore_data.name,
+                'details': chore_data.details,
+                'owner_id': user.id,
+                'chore_definition_id': definition_id,
+                'due_date': chore_data.start_date,
+                'completed': False,
+            } for definition_id, chore_data in batch])
+            self.session.execute(ChoreStats.__table__.insert(), [{
+                'chore_definition_id': definition_id,
+            } for definition_id, _ in batch])
+        mark_changed(self.session, user.id)
+        return definition_ids
+
+    def get_chores(self, limit: Optional[int] = None, after: Optional[Tuple] = None) -> List[ChoreDefinition]:
+        user = self.user_provider.get_user()
+        query = self.chores_query(user.id)
+        return self._keyset(query, ChoreDefinition.created_at, ChoreDefinition.id, limit, after).all()
+
+    def iter_chores(self, batch_size: int = 500) -> Iterator[ChoreDefinition]:
+        user = self.user_provider.get_user()
+        return self._stream(self.chores_query(user.id), batch_size)
+
+    def get_chore_rows(self, limit: Optional[int] = None, after: Optional[Tuple] = None) -> List[ChoreRow]:
         user = self.user_provider.get_user()
+        query = self.chore_rows_query(user.id)
+        rows = self._keyset(query, ChoreDefinition.created_at, ChoreDefinition.id, limit, after)
+        return [ChoreRow(*row) for row in rows]
+
+    def iter_chore_rows(self, batch_size: int = 500) -> Iterator[ChoreRow]:
+        user = self.user_provider.get_user()
+        rows = self._stream(self.chore_rows_query(user.id), batch_size)
+        return (ChoreRow(*row) for row in rows)
+
+    def chore_rows_query(self, owner_id: str):
+        return self.chores_query(owner_id).with_entities(
+            ChoreDefinition.id,
+            ChoreDefinition.name,
+            ChoreDefinition.details,
+            ChoreDefinition.frequency_type,
+            ChoreDefinition.frequency_amount,
+            raw_datetime(ChoreDefinition.created_at),
+        )
+
+    def chores_query(self, owner_id: str):
         return self.session.query(ChoreDefinition)\
-            .filter_by(owner_id=user.id)\
+            .filter_by(owner_id=owner_id)\
             .filter_by(deleted=False)\
-            .all()
+            .order_by(ChoreDefinition.created_at.asc(), ChoreDefinition.id.asc())
 
     def get_chore(self, chore_id: str) -> ChoreDefinition:
         user = self.user_provider.get_user()
@@ -217,6 +701,82 @@ class ChoreDefinitionManager(Manager):
 
         return instance
 
+    def get_history_rows(
+        self,
+        chore_id: str,
+        limit: Optional[int] = None,
+        after: Optional[Tuple] = None,
+    ) -> List[HistoryRow]:
+        user = self.user_provider.get_user()
+        selects = []
+        for model in (ChoreInstance, ArchivedChoreInstance):
+            completed = self.session.query(
+                model.id,
+                raw_datetime(model.due_date),
+                raw_datetime(model.updated_at).label('completed_at'),
+            )\
+                .filter(model.owner_id == user.id)\
+                .filter(model.chore_definition_id == chore_id)\
+                .filter(model.completed == true())
+            selects.append(completed.statement)
+
+        history = union_all(*selects).alias('history')
+        query = self.session.query(history)\
+            .order_by(history.c.due_date.asc(), history.c.id.asc())
+        rows = self._keyset(query, history.c.due_date, history.c.id, limit, after)
+        return [HistoryRow(*row) for row in rows]
+
+    def get_stats_row(self, chore_id: str) -> Optional[StatsRow]:
+        user = self.user_provider.get_user()
+        row = self.session.query(
+            ChoreDefinition.id,
+            ChoreStats.completions,
+            ChoreStats.on_time,
+            ChoreStats.total_lateness,
+            ChoreStats.current_streak,
+            raw_datetime(ChoreStats.last_completed_at),
+        )\
+            .join(ChoreStats, ChoreStats.chore_definition_id == ChoreDefinition.id)\
+            .filter(ChoreDefinition.owner_id == user.id)\
+            .filter(ChoreDefinition.id == chore_id)\
+            .filter(ChoreDefinition.deleted == false())\
+            .first()
+        return StatsRow(*row) if row else None
+
+    def get_forecast_rows(self) -> List[ForecastRow]:
+        user = self.user_provider.get_user()
+        next_due = self.session.query(
+            ChoreInstance.chore_definition_id,
+            type_coerce(func.min(ChoreInstance.due_date), types.DateTime(timezone=True)).label('due_date'),
+        )\
+            .filter(ChoreInstance.completed == false())\
+            .filter(ChoreInstance.deleted == false())\
+            .filter_by(owner_id=user.id)\
+            .group_by(ChoreInstance.chore_definition_id)\
+            .subquery()
+
+        rows = self.session.query(
+            ChoreDefinition.id,
+            ChoreDefinition.name,
+            ChoreDefinition.frequency_type,
+            ChoreDefinition.frequency_amount,
+            next_due.c.due_date,
+        )\
+            .join(next_due, next_due.c.chore_definition_id == ChoreDefinition.id)\
+            .filter(ChoreDefinition.owner_id == user.id)\
+            .filter(ChoreDefinition.deleted == false())\
+            .all()
+        return [ForecastRow(*row) for row in rows]
+
+    def get_next_due_date(self, chore_definition: ChoreDefinition) -> Optional[pendulum.DateTime]:
+        row = self.session.query(ChoreInstance.due_date)\
+            .filter_by(chore_definition_id=chore_definition.id)\
+            .filter(ChoreInstance.completed == false())\
+            .filter(ChoreInstance.deleted == false())\
+            .order_by(ChoreInstance.due_date.asc())\
+            .first()
+        return row[0] if row else None
+
     def delete_chore(self, chore_id: str):
         user = self.user_provider.get_user()
         try:
@@ -233,6 +793,42 @@ class ChoreDefinitionManager(Manager):
         self.session.query(ChoreInstance)\
             .filter_by(chore_definition_id=instance.id)\
             .update({'deleted': True}, synchronize_session=False)
+        mark_changed(self.session, user.id)
+
+
+class VersionManager(Manager):
+    def __init__(self, session: Session, user_provider: UserProvider):
+        super().__init__(session, user_provider)
+        self._stamps: Dict[bool, VersionStamp] = {}
+
+    def current_version_stamp(self, upcoming: bool = False) -> VersionStamp:
+        # The stamp the conditional GET middleware already validated this
+        # request against, so a body cached under it matches the ETag sent.
+        stamp = self._stamps.get(upcoming)
+        return stamp if stamp is not None else self.get_version_stamp(upcoming)
+
+    def get_version_stamp(self, upcoming: bool = False) -> VersionStamp:
+        user = self.user_provider.get_user()
+        columns = [
+            self._owned(func.count(ChoreDefinition.owner_id), ChoreDefinition, user.id).label('definitions'),
+            self._owned(func.count(ChoreInstance.owner_id), ChoreInstance, user.id).label('instances'),
+            self._owned(func.max(ChoreDefinition.updated_at), ChoreDefinition, user.id).label('definitions_updated'),
+            self._owned(func.max(ChoreInstance.updated_at), ChoreInstance, user.id).label('instances_updated'),
+        ]
+        if upcoming:
+            columns.append(self._owned(func.count(ChoreInstance.owner_id), ChoreInstance, user.id)
+                           .filter(ChoreInstance.completed == false())
+                           .filter(ChoreInstance.deleted == false())
+                           .filter(ChoreInstance.due_date <= pendulum.now('UTC').add(days=UPCOMING_HORIZON_DAYS))
+                           .label('upcoming'))
+
+        row = self.session.query(*columns).one()
+        updated_at = max((value for value in (row[2], row[3]) if value is not None), default=None)
+        stamp = self._stamps[upcoming] = VersionStamp(row[0], row[1], updated_at, row[4] if upcoming else None)
+        return stamp
+
+    def _owned(self, column, model, owner_id: str):
+        return self.session.query(column).filter(model.owner_id == owner_id)
 
 
 class ManagerComponent:
@@ -247,8 +843,17 @@ class ManagerComponent:
 
 
 class UserProviderComponent:
+    def __init__(self):
+        self.user_cache = None
+
     def can_handle_parameter(self, parameter: Parameter) -> bool:
         return parameter.annotation is UserProvider
 
-    def resolve(self, session: Session) -> Manager:
-        return UserProvider(session)
+    def resolve(self, session: Session, settings: Settings) -> Manager:
+        if self.user_cache is None:
+            self.user_cache = LRUCache(
+                max_size=settings.get('user_cache_size', 4096),
+                ttl=settings.get('user_cache_ttl', 300),
+            )
+
+        return UserProvider(session, user_cache=self.user_cache)
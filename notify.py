@@ -0,0 +1,192 @@
+import argparse
+import json
+import logging
+from collections import OrderedDict, namedtuple
+from itertools import groupby
+from threading import Event, Lock
+from typing import Dict, List, Optional, Tuple
+
+import pendulum
+import requests
+from molten import Settings
+from sqlalchemy import false
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from models import ChoreInstance, NotificationLog, isoformat_utc, raw_datetime
+from session import PooledSession
+
+
+logger = logging.getLogger('notify')
+
+Notification = namedtuple('Notification', 'kind instance_id owner_id name due_date')
+
+
+def notification_payload(owner_id: str, notifications: List[Notification]) -> dict:
+    return {
+        'ownerId': owner_id,
+        'notifications': [{
+            # Stable across retries, so receivers can drop a redelivered bucket.
+            'key': f'{notification.kind}:{notification.instance_id}',
+            'kind': notification.kind,
+            'id': notification.instance_id,
+            'name': notification.name,
+            'dueDate': isoformat_utc(notification.due_date),
+        } for notification in notifications],
+    }
+
+
+class MemorySink:
+    def __init__(self):
+        self.sent: List[Tuple[str, List[Notification]]] = []
+
+    def send(self, owner_id: str, notifications: List[Notification]):
+        self.sent.append((owner_id, notifications))
+
+
+class FileSink:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+
+    def send(self, owner_id: str, notifications: List[Notification]):
+        line = json.dumps(notification_payload(owner_id, notifications)) + '\n'
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line)
+
+
+class WebhookSink:
+    def __init__(self, url: str, session: Optional[requests.Session] = None):
+        self.url = url
+        self.session = session or PooledSession(pool_size=1)
+
+    def send(self, owner_id: str, notifications: List[Notification]):
+        response = self.session.post(self.url, json=notification_payload(owner_id, notifications))
+        response.raise_for_status()
+
+
+def create_sink(target: str):
+    if target == 'memory':
+        return MemorySink()
+    if target.startswith(('http://', 'https://')):
+        return WebhookSink(target)
+    return FileSink(target)
+
+
+class Scanner:
+    def __init__(self, session_factory: sessionmaker, sink, lead_minutes: int = 60, batch_size: int = 1000):
+        self.session_factory = session_factory
+        self.sink = sink
+        self.lead_minutes = lead_minutes
+        self.batch_size = batch_size
+
+    def sweep_windows(self, now: pendulum.DateTime) -> Dict[str, Tuple[Optional[pendulum.DateTime], pendulum.DateTime]]:
+        return OrderedDict([
+            ('overdue', (None, now)),
+            ('due_soon', (now, now.add(minutes=self.lead_minutes))),
+        ])
+
+    def sweep_batch(
+        self,
+        kind: str,
+        start: Optional[pendulum.DateTime],
+        end: pendulum.DateTime,
+        now: pendulum.DateTime,
+    ) -> Tuple[int, bool]:
+        # The log, not a position in time, records what went out, so chores
+        # created late or already past due are still picked up.  Each owner's
+        # rows are logged before they're sent and committed right after: a
+        # failed send rolls its log rows back to be retried, and a second
+        # scanner on the same rows conflicts on the log's key instead of
+        # sending them again.
+        session = self.session_factory()
+        try:
+            notified = session.query(NotificationLog.instance_id)\
+                .filter(NotificationLog.kind == kind)\
+                .filter(NotificationLog.instance_id == ChoreInstance.id)
+            query = session.query(
+                ChoreInstance.id,
+                ChoreInstance.owner_id,
+                ChoreInstance.name,
+                raw_datetime(ChoreInstance.due_date),
+            )\
+                .filter(ChoreInstance.completed == false())\
+                .filter(ChoreInstance.deleted == false())\
+                .filter(ChoreInstance.due_date <= end)\
+                .filter(~notified.exists())
+            if start is not None:
+                query = query.filter(ChoreInstance.due_date > start)
+
+            rows = query\
+                .order_by(ChoreInstance.owner_id.asc(), ChoreInstance.due_date.asc(), ChoreInstance.id.asc())\
+                .limit(self.batch_size)\
+                .all()
+
+            sent = 0
+            for owner_id, owner_rows in groupby(rows, key=lambda row: row[1]):
+                notifications = [
+                    Notification(kind, instance_id, owner_id, name, due_date)
+                    for instance_id, _, name, due_date in owner_rows
+                ]
+                try:
+                    session.execute(NotificationLog.__table__.insert(), [
+                        {'kind': kind, 'instance_id': notification.instance_id, 'sent_at': now}
+                        for notification in notifications
+                    ])
+                except IntegrityError:
+                    session.rollback()
+                    continue
+
+                self.sink.send(owner_id, notifications)
+                session.commit()
+                sent += len(notifications)
+
+            return sent, len(rows) < self.batch_size
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def run(self, stop: Optional[Event] = None, now: Optional[pendulum.DateTime] = None) -> int:
+        now = now or pendulum.now('UTC')
+        sent = 0
+        for kind, (start, end) in self.sweep_windows(now).items():
+            done = False
+            while not done:
+                if stop is not None and stop.is_set():
+                    return sent
+
+                count, done = self.sweep_batch(kind, start, end, now)
+                sent += count
+
+        logger.info('sent %d notifications', sent)
+        return sent
+
+
+def create_scanner(settings: Settings, session_factory: sessionmaker, sink) -> Scanner:
+    return Scanner(
+        session_factory,
+        sink,
+        lead_minutes=settings.get('notify_lead_minutes', 60),
+        batch_size=settings.get('notify_batch_size', 1000),
+    )
+
+
+def main():
+    from factory import get_settings
+    from jobs import create_session_factory
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description='Send reminders for overdue and soon-due chores.')
+    parser.add_argument('--sink', default=settings.get('notify_sink'), help='a file path or a webhook URL')
+    args = parser.parse_args()
+    if not args.sink:
+        parser.error('--sink or NOTIFY_SINK is required')
+
+    logging.basicConfig(level=logging.INFO)
+    create_scanner(settings, create_session_factory(settings), create_sink(args.sink)).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import base64
+import json
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlencode
+
+import pendulum
+from molten import HTTPError, HTTP_400
+
+from rendering import dumps
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+STREAM_CHUNK_SIZE = 4096
+
+
+def encode_cursor(sort_value: pendulum.DateTime, row_id: str) -> str:
+    data = json.dumps([sort_value.isoformat(), row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[pendulum.DateTime, str]:
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return pendulum.parse(sort_value), row_id
+    except (ValueError, TypeError):
+        raise HTTPError(HTTP_400, {'errors': {'cursor': 'invalid cursor'}})
+
+
+class Page:
+    def __init__(self, limit: Optional[int], after: Optional[Tuple[pendulum.DateTime, str]]):
+        self.limit = limit
+        self.after = after
+
+    @property
+    def fetch_limit(self) -> Optional[int]:
+        if self.limit is None:
+            return None
+        return self.limit + 1
+
+    @classmethod
+    def from_params(cls, limit: Optional[str], cursor: Optional[str]) -> 'Page':
+        if limit is None and cursor is None:
+            return cls(None, None)
+
+        if limit is None:
+            limit = DEFAULT_PAGE_SIZE
+        else:
+            try:
+                limit = int(limit)
+            except ValueError:
+                raise HTTPError(HTTP_400, {'errors': {'limit': 'must be an integer'}})
+
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                raise HTTPError(HTTP_400, {'errors': {'limit': f'must be between 1 and {MAX_PAGE_SIZE}'}})
+
+        return cls(limit, decode_cursor(cursor) if cursor else None)
+
+    def paginate(
+        self,
+        rows: list,
+        uri: str,
+        key: Callable[[Any], Tuple[pendulum.DateTime, str]],
+    ) -> Tuple[list, dict]:
+        if self.limit is None or len(rows) <= self.limit:
+            return rows, {}
+
+        rows = rows[:self.limit]
+        next_cursor = encode_cursor(*key(rows[-1]))
+        query = urlencode({'limit': self.limit, 'cursor': next_cursor})
+        return rows, {
+            'Link': f'<{uri}?{query}>; rel="next"',
+            'X-Next-Cursor': next_cursor,
+        }
+
+
+def stream_json_array(items: Iterable[Any]) -> Iterator[bytes]:
+    # molten's GenStream drops buffered bytes once the generator is exhausted,
+    # so no chunk may be larger than the WSGI file wrapper's read size.
+    separator = b'['
+    for item in items:
+        data = separator + dumps(item)
+        for start in range(0, len(data), STREAM_CHUNK_SIZE):
+            yield data[start:start + STREAM_CHUNK_SIZE]
+        separator = b','
+
+    yield b'[]' if separator == b'[' else b']'
@@ -0,0 +1,88 @@
+import enum
+from datetime import datetime
+from typing import List, Sequence
+
+import pendulum
+
+_np = None
+
+
+def numpy():
+    # Imported on first use: it's only needed by the materializer and the
+    # forecast, and costs more to import than the rest of the app.
+    global _np
+    if _np is None:
+        try:
+            import numpy as np
+        except ImportError:  # pragma: no cover
+            np = False
+        _np = np
+    return _np or None
+
+
+def next_due_date(start: datetime, frequency_type: enum.Enum, amount: int) -> pendulum.DateTime:
+    return pendulum.instance(start).add(**{frequency_type.value: amount})
+
+
+def project(
+    starts: Sequence[datetime],
+    frequency_types: Sequence[enum.Enum],
+    amounts: Sequence[int],
+    count: int,
+) -> List[List[pendulum.DateTime]]:
+    if numpy() is None or not starts:
+        return [
+            [pendulum.instance(start).add(**{frequency_type.value: amount * step}) for step in range(1, count + 1)]
+            for start, frequency_type, amount in zip(starts, frequency_types, amounts)
+        ]
+
+    projected = project_array(starts, frequency_types, amounts, count)
+    return [
+        [pendulum.instance(value.item(), tz='UTC') for value in row]
+        for row in projected
+    ]
+
+
+def project_array(
+    starts: Sequence[datetime],
+    frequency_types: Sequence[enum.Enum],
+    amounts: Sequence[int],
+    count: int,
+):
+    np = numpy()
+    start = np.array([_to_naive_utc(value) for value in starts], dtype='datetime64[us]')[:, None]
+    kinds = np.array([frequency_type.value for frequency_type in frequency_types])[:, None]
+    steps = np.asarray(amounts, dtype=np.int64)[:, None] * np.arange(1, count + 1, dtype=np.int64)
+
+    days = np.where(kinds == 'weeks', steps * 7, steps)
+    result = start + days.astype('timedelta64[D]')
+
+    months = np.where(kinds == 'years', steps * 12, steps)
+    calendar = np.isin(kinds, ('months', 'years'))[:, 0]
+    if calendar.any():
+        result[calendar] = add_months(start[calendar], months[calendar])
+
+    return result
+
+
+def add_months(start, months):
+    np = numpy()
+    start_day = start.astype('datetime64[D]')
+    start_month = start.astype('datetime64[M]')
+    time_of_day = start - start_day
+    day_of_month = start_day - start_month.astype('datetime64[D]')
+
+    month = start_month + months.astype('timedelta64[M]')
+    first_day = month.astype('datetime64[D]')
+    month_length = (month + np.timedelta64(1, 'M')).astype('datetime64[D]') - first_day
+    day = np.minimum(day_of_month, month_length - np.timedelta64(1, 'D'))
+    return first_day + day + time_of_day
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = pendulum.instance(value).in_timezone('UTC')
+    return datetime(
+        value.year, value.month, value.day,
+        value.hour, value.minute, value.second, value.microsecond,
+    )
@@ -0,0 +1,77 @@
+import enum
+import json
+from datetime import datetime
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Tuple
+
+from molten import JSONRenderer, Response, is_schema
+
+from models import isoformat_utc
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+_schema_fields: Dict[type, List[Tuple[str, str]]] = {}
+
+
+def schema_fields(schema_type: type) -> List[Tuple[str, str]]:
+    # The same fields, order and response names dump_schema walks, worked out
+    # once per schema instead of once per rendered object.
+    fields = _schema_fields.get(schema_type)
+    if fields is None:
+        fields = _schema_fields[schema_type] = [
+            (field.name, field.response_name or field.name)
+            for field in schema_type._FIELDS.values()
+            if not field.request_only
+        ]
+    return fields
+
+
+def encode_default(ob: Any) -> Any:
+    ob_type = type(ob)
+    if is_schema(ob_type):
+        return {response_name: getattr(ob, name) for name, response_name in schema_fields(ob_type)}
+    if isinstance(ob, datetime):
+        return isoformat_utc(ob)
+    if isinstance(ob, enum.Enum):
+        return ob.value
+    raise TypeError(f'Object of type {ob_type.__name__} is not JSON serializable')
+
+
+_encoder = json.JSONEncoder(default=encode_default)
+
+
+def stdlib_dumps(ob: Any) -> bytes:
+    return _encoder.encode(ob).encode('utf-8')
+
+
+def orjson_dumps(ob: Any) -> bytes:
+    # Compact and not ASCII-escaped, so the bytes differ from stdlib_dumps.
+    return orjson.dumps(ob, default=encode_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+_dumps: Callable[[Any], bytes] = stdlib_dumps
+
+
+def configure_json(encoder: str = 'stdlib'):
+    global _dumps
+    if encoder == 'orjson' and orjson is not None:
+        _dumps = orjson_dumps
+    elif encoder in ('stdlib', 'orjson'):
+        _dumps = stdlib_dumps
+    else:
+        raise ValueError(f'unknown JSON encoder {encoder!r}')
+
+
+def dumps(ob: Any) -> bytes:
+    return _dumps(ob)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, status: str, response_data: Any) -> Response:
+        return Response(status, stream=BytesIO(dumps(response_data)), headers={
+            'content-type': 'application/json; charset=utf-8',
+        })
@@ -1,11 +1,54 @@
-from inspect import Parameter
+from threading import Lock
 
 import requests
+from requests.adapters import HTTPAdapter
+from molten import Settings
 
 
-class RequestSessionComponent:
-    def can_handle_parameter(self, parameter: Parameter) -> bool:
-        return parameter.annotation is requests.Session
+class PooledSession(requests.Session):
+    def __init__(
+        self,
+        pool_size: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+    ):
+        super().__init__()
+        self.timeout = (connect_timeout, read_timeout)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
 
-    def resolve(self) -> requests.Session:
-        return requests.Session()
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+_session = None
+_session_lock = Lock()
+
+
+def get_session(settings: Settings) -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = PooledSession(
+                    pool_size=settings.get('identity_pool_size', 10),
+                    connect_timeout=settings.get('identity_connect_timeout', 3.05),
+                    read_timeout=settings.get('identity_read_timeout', 10),
+                )
+    return _session
+
+
+def open_session(settings: Settings) -> requests.Session:
+    close_session()
+    return get_session(settings)
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+
+    if session is not None:
+        session.close()
@@ -0,0 +1,98 @@
+import argparse
+import logging
+from itertools import groupby
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select, true, union_all
+from sqlalchemy.orm import Session
+
+from models import ArchivedChoreInstance,\
+    ChoreDefinition,\
+    ChoreInstance,\
+    ChoreStats,\
+    lateness_seconds
+
+
+logger = logging.getLogger('stats')
+
+
+def completions_query(definition_ids: Optional[List[str]] = None):
+    selects = []
+    for model in (ChoreInstance, ArchivedChoreInstance):
+        query = select([model.chore_definition_id, model.due_date, model.updated_at, model.id])\
+            .where(model.completed == true())
+        if definition_ids is not None:
+            query = query.where(model.chore_definition_id.in_(definition_ids))
+        selects.append(query)
+
+    completions = union_all(*selects).alias('completions')
+    return select([completions]).order_by(
+        completions.c.chore_definition_id,
+        completions.c.updated_at,
+        completions.c.due_date,
+        completions.c.id,
+    )
+
+
+def fold_completions(definition_id: str, completions: Iterable) -> dict:
+    # Mirrors RECORD_COMPLETION, one completion at a time in the order
+    # they were recorded, so both paths end up with identical values.
+    stats = {
+        'chore_definition_id': definition_id,
+        'completions': 0,
+        'on_time': 0,
+        'total_lateness': 0.0,
+        'current_streak': 0,
+        'last_completed_at': None,
+    }
+    for _, due_date, completed_at, _ in completions:
+        late_by = lateness_seconds(due_date, completed_at)
+        stats['completions'] += 1
+        stats['on_time'] += late_by == 0
+        stats['total_lateness'] += late_by
+        stats['current_streak'] = stats['current_streak'] + 1 if late_by == 0 else 0
+        stats['last_completed_at'] = completed_at
+    return stats
+
+
+def rebuild_stats(session: Session, definition_ids: Optional[List[str]] = None, batch_size: int = 1000) -> int:
+    if definition_ids is None:
+        definition_ids = [row[0] for row in session.execute(select([ChoreDefinition.id]))]
+
+    table = ChoreStats.__table__
+    rebuilt = 0
+    for start in range(0, len(definition_ids), batch_size):
+        batch = definition_ids[start:start + batch_size]
+        folded = {
+            definition_id: fold_completions(definition_id, rows)
+            for definition_id, rows in groupby(session.execute(completions_query(batch)), key=lambda row: row[0])
+        }
+        session.execute(table.delete().where(table.c.chore_definition_id.in_(batch)))
+        session.execute(table.insert(), [
+            folded.get(definition_id) or fold_completions(definition_id, [])
+            for definition_id in batch
+        ])
+        rebuilt += len(batch)
+    return rebuilt
+
+
+def main():
+    from factory import get_settings
+    from jobs import create_session_factory
+
+    parser = argparse.ArgumentParser(description='Recompute chore completion stats from the raw instances.')
+    parser.add_argument('chore_ids', nargs='*', help='only rebuild these chore definitions')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    session = create_session_factory(get_settings())()
+    try:
+        rebuilt = rebuild_stats(session, args.chore_ids or None)
+        session.commit()
+    finally:
+        session.close()
+    logger.info('rebuilt stats for %d chore definitions', rebuilt)
+
+
+if __name__ == '__main__':
+    main()
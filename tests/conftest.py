@@ -1,12 +1,18 @@
+from contextlib import contextmanager
 from unittest.mock import MagicMock
 
 import pytest
-from molten import testing, Settings, SettingsComponent
-from molten.contrib.sqlalchemy import SQLAlchemyEngineComponent,\
-    SQLAlchemySessionComponent
-from auth import AuthProviderComponent
+from sqlalchemy import event
+from molten import testing, Settings
+from molten.contrib.sqlalchemy import EngineData
+from archive import Archiver
+from auth import AuthProvider, AuthProviderComponent
+from cache import LRUCache
+from models import Model,\
+    User,\
+    get_id
 
-from factory import create_app
+from factory import create_app, create_components
 
 
 class MockProvider:
@@ -36,20 +42,93 @@ def test_app():
         'database_engine_dsn': 'sqlite://',
         'identity_server': 'http://localhost',
         'secret_key': 'fake_secret',
+        'metrics_token': 'metrics_secret',
     })
     app = create_app(
         settings=settings,
         components=[
-            SettingsComponent(settings),
-            SQLAlchemyEngineComponent(),
-            SQLAlchemySessionComponent(),
-            # RequestSessionComponent(),
-            MockProvider(AuthProviderComponent),
+            MockProvider(AuthProviderComponent) if isinstance(component, AuthProviderComponent) else component
+            for component in create_components(settings)
         ],
     )
+
+    def create_schema(engine_data: EngineData):
+        Model.metadata.create_all(engine_data.engine)
+
+    app.injector.get_resolver().resolve(create_schema)()
     yield app
 
 
+@pytest.fixture
+def db_session(test_app):
+    def get_session(engine_data: EngineData):
+        return engine_data.session_factory()
+
+    session = test_app.injector.get_resolver().resolve(get_session)()
+    yield session
+    session.rollback()
+    session.close()
+
+
+@pytest.fixture
+def max_queries(test_app):
+    def get_engine(engine_data: EngineData):
+        return engine_data.engine
+
+    engine = test_app.injector.get_resolver().resolve(get_engine)()
+
+    @contextmanager
+    def check(limit):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+
+        assert len(statements) <= limit, \
+            f'{len(statements)} queries, expected at most {limit}:\n' + '\n'.join(statements)
+
+    return check
+
+
+@pytest.fixture
+def archiver(test_app):
+    def get_archiver(engine_data: EngineData) -> Archiver:
+        return Archiver(engine_data.session_factory, retention_days=30, batch_size=2)
+
+    return test_app.injector.get_resolver().resolve(get_archiver)()
+
+
+@pytest.fixture
+def metrics_headers():
+    return {'Authorization': 'Bearer metrics_secret'}
+
+
+@pytest.fixture
+def auth_provider(mock_provider_factory):
+    provider = AuthProvider(None, 'http://localhost', 'fake_secret', token_cache=LRUCache())
+    mock_provider_factory(AuthProviderComponent).set_mock(provider)
+    yield provider
+
+
+@pytest.fixture
+def user(db_session):
+    user = User(external_id=get_id(), email=f'{get_id()}@example.com')
+    db_session.add(user)
+    db_session.commit()
+    yield user
+
+
+@pytest.fixture
+def auth_headers(auth_provider, user):
+    return {'Authorization': f'Bearer {auth_provider.get_user_token(user)}'}
+
+
 @pytest.fixture(scope='session')
 def client(test_app):
     return testing.TestClient(test_app)
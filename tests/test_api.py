@@ -0,0 +1,124 @@
+import json
+
+import pendulum
+
+
+def create_chores(client, auth_headers, count):
+    for i in range(count):
+        resp = client.post('/api/chores', headers=auth_headers, json={
+            'name': f'chore {i}',
+            'details': '',
+            'frequencyType': 'days',
+            'frequencyAmount': 1,
+            'startDate': pendulum.now('UTC').add(days=i % 3).isoformat(),
+        })
+        assert resp.status_code == 200
+
+
+def test_get_upcoming_paginates_with_cursor(client, auth_headers):
+    create_chores(client, auth_headers, 5)
+    everything = client.get('/api/upcoming', headers=auth_headers).json()
+
+    pages = []
+    params = {'limit': '2'}
+    while True:
+        resp = client.get('/api/upcoming', headers=auth_headers, params=params)
+        assert resp.status_code == 200
+        pages.append(resp.json())
+        next_cursor = resp.headers.get('x-next-cursor')
+        if next_cursor is None:
+            break
+        params = {'limit': '2', 'cursor': next_cursor}
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [chore['id'] for page in pages for chore in page] == [chore['id'] for chore in everything]
+
+
+def test_get_chores_streams_json(client, auth_headers):
+    create_chores(client, auth_headers, 3)
+    expected = client.get('/api/chores', headers=auth_headers).json()
+    resp = client.get('/api/chores', headers=auth_headers, params={'stream': '1'})
+
+    assert resp.status_code == 200
+    assert json.loads(b''.join(resp.stream)) == expected
+
+
+def test_invalid_limit_is_rejected(client, auth_headers):
+    resp = client.get('/api/chores', headers=auth_headers, params={'limit': 'lots'})
+    assert resp.status_code == 400
+
+
+def test_complete_upcoming_batch(client, auth_headers):
+    create_chores(client, auth_headers, 3)
+    upcoming = client.get('/api/upcoming', headers=auth_headers).json()
+    ids = [chore['id'] for chore in upcoming[:2]]
+
+    resp = client.post('/api/upcoming/complete', headers=auth_headers, json={'ids': ids + ['missing']})
+    assert resp.status_code == 200
+    assert resp.json() == {'results': [
+        {'id': ids[0], 'completed': True},
+        {'id': ids[1], 'completed': True},
+        {'id': 'missing', 'completed': False},
+    ]}
+
+    remaining = client.get('/api/upcoming', headers=auth_headers).json()
+    remaining_ids = {chore['id'] for chore in remaining}
+    assert not remaining_ids & set(ids)
+    assert len(remaining) == 3
+
+
+def chore_payload(i):
+    return {
+        'name': f'bulk {i}',
+        'details': '',
+        'frequencyType': 'weeks',
+        'frequencyAmount': 2,
+        'startDate': pendulum.now('UTC').add(days=1).isoformat(),
+    }
+
+
+def test_create_chores_bulk(client, auth_headers):
+    resp = client.post('/api/chores/bulk', headers=auth_headers, json=[chore_payload(i) for i in range(3)])
+    assert resp.status_code == 200
+    ids = resp.json()['ids']
+
+    chores = client.get('/api/chores', headers=auth_headers).json()
+    upcoming = client.get('/api/upcoming', headers=auth_headers).json()
+    assert sorted(chore['id'] for chore in chores) == sorted(ids)
+    assert sorted(chore['name'] for chore in upcoming) == ['bulk 0', 'bulk 1', 'bulk 2']
+
+
+def test_create_chores_bulk_ndjson(client, auth_headers):
+    body = '\n'.join(json.dumps(chore_payload(i)) for i in range(2))
+    resp = client.post('/api/chores/bulk', headers=dict(auth_headers, **{
+        'content-type': 'application/x-ndjson',
+    }), body=body.encode('utf-8'))
+    assert resp.status_code == 200
+    assert len(resp.json()['ids']) == 2
+
+
+def test_create_chores_bulk_validates_everything_first(client, auth_headers):
+    invalid = dict(chore_payload(1), frequencyAmount=0)
+    resp = client.post('/api/chores/bulk', headers=auth_headers, json=[chore_payload(0), invalid])
+    assert resp.status_code == 400
+    assert list(resp.json()['errors']) == ['1']
+    assert client.get('/api/chores', headers=auth_headers).json() == []
+
+
+def test_get_chore_schedule(client, auth_headers):
+    resp = client.post('/api/chores', headers=auth_headers, json={
+        'name': 'rent',
+        'details': '',
+        'frequencyType': 'months',
+        'frequencyAmount': 1,
+        'startDate': '2030-01-31T08:00:00+00:00',
+    })
+    chore_id = resp.json()['id']
+
+    resp = client.get(f'/api/chores/{chore_id}/schedule', headers=auth_headers, params={'count': '3'})
+    assert resp.status_code == 200
+    assert resp.json() == {'id': chore_id, 'occurrences': [
+        '2030-01-31T08:00:00+00:00',
+        '2030-02-28T08:00:00+00:00',
+        '2030-03-31T08:00:00+00:00',
+    ]}
@@ -1,5 +1,16 @@
+import gc
+import os
+import subprocess
+import sys
 from unittest.mock import MagicMock
-from auth import AuthProviderComponent
+
+import rendering
+from api import Chore
+from auth import AuthProviderComponent, Login
+from factory import preload
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
 def test_login(client, mock_provider_factory):
@@ -14,3 +25,22 @@ def test_login(client, mock_provider_factory):
     mock_auth_provider.set_mock(m)
     resp = client.post('/login', json={'token': 'sometoken'})
     assert resp.status_code == 200
+
+
+def test_importing_the_app_leaves_heavy_dependencies_unloaded():
+    env = dict(os.environ, SQLALCHEMY_URI='sqlite://', IDENTITY_SERVER='http://localhost', SECRET_KEY='fake_secret')
+    script = 'import sys, app; print(" ".join(sorted({"jose", "requests", "numpy"} & set(sys.modules))))'
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=ROOT, env=env, universal_newlines=True)
+    assert output.strip() == ''
+
+
+def test_preload_loads_what_workers_share():
+    try:
+        preload()
+    finally:
+        if hasattr(gc, 'unfreeze'):
+            gc.unfreeze()
+
+    assert 'jose.jwt' in sys.modules
+    assert Chore in rendering._schema_fields
+    assert Login in rendering._schema_fields
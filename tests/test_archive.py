@@ -0,0 +1,73 @@
+import pendulum
+from sqlalchemy import true
+
+from models import ArchivedChoreInstance, ChoreInstance
+from tests.test_api import create_chores
+
+
+def complete_all(client, auth_headers):
+    upcoming = client.get('/api/upcoming', headers=auth_headers).json()
+    for chore in upcoming:
+        assert client.post(f"/api/upcoming/{chore['id']}", headers=auth_headers).status_code == 200
+    return upcoming
+
+
+def backdate(db_session, user, days):
+    db_session.query(ChoreInstance)\
+        .filter(ChoreInstance.owner_id == user.id)\
+        .filter(ChoreInstance.completed == true())\
+        .update({'updated_at': pendulum.now('UTC').subtract(days=days)}, synchronize_session=False)
+    db_session.commit()
+
+
+def test_archives_old_completed_instances_in_batches(db_session, client, auth_headers, user, archiver):
+    create_chores(client, auth_headers, 5)
+    completed = complete_all(client, auth_headers)
+    backdate(db_session, user, 60)
+
+    assert archiver.run(max_batches=1) == 2
+    assert archiver.run() == 3
+    assert archiver.run() == 0
+
+    archived = db_session.query(ArchivedChoreInstance).filter_by(owner_id=user.id).all()
+    assert sorted(row.id for row in archived) == sorted(chore['id'] for chore in completed)
+    assert all(row.completed and row.archived_at for row in archived)
+    assert db_session.query(ChoreInstance)\
+        .filter_by(owner_id=user.id, completed=True)\
+        .count() == 0
+    assert len(client.get('/api/upcoming', headers=auth_headers).json()) == 5
+
+
+def test_keeps_instances_inside_retention_window(db_session, client, auth_headers, user, archiver):
+    create_chores(client, auth_headers, 2)
+    complete_all(client, auth_headers)
+    backdate(db_session, user, 10)
+
+    archiver.run()
+    assert db_session.query(ArchivedChoreInstance).filter_by(owner_id=user.id).count() == 0
+
+
+def test_history_includes_archived_and_live_completions(db_session, client, auth_headers, user, archiver):
+    create_chores(client, auth_headers, 1)
+    chore_id = client.get('/api/chores', headers=auth_headers).json()[0]['id']
+    first = complete_all(client, auth_headers)
+    backdate(db_session, user, 60)
+    archiver.run()
+    second = complete_all(client, auth_headers)
+
+    resp = client.get(f'/api/chores/{chore_id}/history', headers=auth_headers)
+    assert resp.status_code == 200
+    assert [row['id'] for row in resp.json()] == [first[0]['id'], second[0]['id']]
+    assert [row['dueDate'] for row in resp.json()] == [first[0]['dueDate'], second[0]['dueDate']]
+
+    page = client.get(f'/api/chores/{chore_id}/history', headers=auth_headers, params={'limit': '1'})
+    assert [row['id'] for row in page.json()] == [first[0]['id']]
+    rest = client.get(f'/api/chores/{chore_id}/history', headers=auth_headers, params={
+        'limit': '1',
+        'cursor': page.headers['x-next-cursor'],
+    })
+    assert [row['id'] for row in rest.json()] == [second[0]['id']]
+
+
+def test_history_of_unknown_chore_is_404(client, auth_headers):
+    assert client.get('/api/chores/ABC/history', headers=auth_headers).status_code == 404
@@ -0,0 +1,140 @@
+import asyncio
+import json
+from concurrent.futures import Executor, Future
+
+import pytest
+
+from auth import AuthProvider, AuthProviderComponent
+from cache import LRUCache
+from tests.stub_identity import StubIdentityServer
+
+httpx = pytest.importorskip('httpx')
+
+from asgi_adapter import ASGIApp, AsyncIdentityClient  # noqa: E402
+
+JSON = {'Content-Type': 'application/json'}
+
+
+class InlineExecutor(Executor):
+    # The in-memory test database only exists on the thread that created it.
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def call(app, method, path, headers=None, body=b'', query_string=b''):
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query_string,
+        'headers': [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        await app(scope, receive, send)
+        return sent
+
+    return run()
+
+
+def response_of(sent):
+    start = sent[0]
+    headers = {name.decode(): value.decode() for name, value in start['headers']}
+    return start['status'], headers, b''.join(message.get('body', b'') for message in sent[1:])
+
+
+@pytest.fixture
+def identity_server():
+    with StubIdentityServer(users={'good': {'id': 'extid', 'email': 'asgi@example.com'}}) as server:
+        yield server
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def asgi_app(test_app, identity_server, loop):
+    app = ASGIApp(
+        test_app,
+        identity_client=AsyncIdentityClient(identity_server.url),
+        executor=InlineExecutor(),
+    )
+    yield app
+    loop.run_until_complete(app.identity_client.close())
+    app.executor.shutdown()
+
+
+def test_preflight_is_answered_natively(asgi_app, loop):
+    sent = loop.run_until_complete(call(asgi_app, 'OPTIONS', '/api/chores', headers={
+        'Origin': 'http://example.com',
+        'Access-Control-Request-Method': 'POST',
+        'Access-Control-Request-Headers': 'authorization',
+    }))
+
+    status, headers, _ = response_of(sent)
+    assert status == 200
+    assert headers['access-control-allow-origin'] == '*'
+    assert headers['access-control-allow-methods'] == 'POST'
+    assert headers['access-control-allow-headers'] == 'authorization'
+
+
+def test_requests_reach_the_shared_routes(asgi_app, loop, auth_headers):
+    sent = loop.run_until_complete(call(asgi_app, 'GET', '/api/chores', headers=auth_headers))
+
+    status, headers, body = response_of(sent)
+    assert status == 200
+    assert headers['access-control-allow-origin'] == '*'
+    assert json.loads(body.decode()) == []
+
+
+def test_logins_resolve_identity_without_blocking_workers(
+    asgi_app,
+    loop,
+    identity_server,
+    mock_provider_factory,
+):
+    # No requests session: the sync provider can only answer from the cache
+    # the async client filled in.
+    provider = AuthProvider(
+        None,
+        identity_server.url,
+        'fake_secret',
+        token_cache=LRUCache(),
+        identity_cache=asgi_app.identity_cache,
+    )
+    mock_provider_factory(AuthProviderComponent).set_mock(provider)
+    identity_server.latency = 0.1
+
+    async def login_many():
+        return await asyncio.gather(*(
+            call(asgi_app, 'POST', '/login', headers=JSON, body=json.dumps({'token': 'good'}).encode())
+            for _ in range(8)
+        ))
+
+    results = loop.run_until_complete(login_many())
+
+    for sent in results:
+        status, _, body = response_of(sent)
+        assert status == 200
+        assert 'token' in json.loads(body.decode())
+    assert identity_server.request_count == 1
+
+    sent = loop.run_until_complete(call(asgi_app, 'POST', '/login', headers=JSON, body=b'{"token": "bad"}'))
+    assert response_of(sent)[0] == 401
@@ -0,0 +1,69 @@
+from unittest.mock import patch
+
+import pendulum
+from jose import jwt
+
+from auth import AuthProvider
+from cache import LRUCache
+
+
+def test_verify_user_token_decodes_once():
+    provider = AuthProvider(None, 'http://localhost', 'fake_secret', token_cache=LRUCache())
+    token = jwt.encode({
+        'id': 'someid',
+        'email': 'fake',
+        'expiration': pendulum.now('UTC').add(hours=1).isoformat(),
+    }, 'fake_secret', algorithm='HS256')
+
+    with patch('jose.jwt.decode', wraps=jwt.decode) as decode:
+        assert provider.verify_user_token(token) == 'someid'
+        assert provider.verify_user_token(token) == 'someid'
+
+    assert decode.call_count == 1
+    assert provider.token_cache.hits == 1
+    assert provider.token_cache.misses == 1
+
+
+def test_verify_user_token_respects_expiration():
+    clock = [1000.0]
+    cache = LRUCache(clock=lambda: clock[0])
+    provider = AuthProvider(None, 'http://localhost', 'fake_secret', token_cache=cache)
+    expiration = pendulum.now('UTC').add(seconds=30)
+    token = jwt.encode({
+        'id': 'someid',
+        'email': 'fake',
+        'expiration': expiration.isoformat(),
+    }, 'fake_secret', algorithm='HS256')
+
+    assert provider.verify_user_token(token) == 'someid'
+    clock[0] = expiration.timestamp() + 1
+    with patch('auth.pendulum.now', return_value=expiration.add(seconds=1)):
+        assert provider.verify_user_token(token) is False
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.evictions == 1
+
+
+def test_repeat_requests_skip_user_lookup(client, auth_headers, test_app):
+    user_provider_component = next(
+        component for component in test_app.injector.components
+        if type(component).__name__ == 'UserProviderComponent'
+    )
+
+    resp = client.get('/api/chores', headers=auth_headers)
+    assert resp.status_code == 200
+    misses = user_provider_component.user_cache.misses
+
+    resp = client.get('/api/chores', headers=auth_headers)
+    assert resp.status_code == 200
+    assert user_provider_component.user_cache.misses == misses
@@ -0,0 +1,80 @@
+import time
+from threading import Timer
+
+import events
+from changes import ChangeFeed, LocalBroker
+from tests.test_api import create_chores
+
+
+def poll(client, auth_headers, **params):
+    resp = client.get('/api/changes', headers=auth_headers, params=params)
+    assert resp.status_code == 200
+    assert resp.headers['cache-control'] == 'no-store'
+    return resp.json()
+
+
+def test_returns_current_version(client, auth_headers):
+    first = poll(client, auth_headers)
+    assert first['changed'] is False
+    assert poll(client, auth_headers, since=first['version'], timeout='0') == first
+
+
+def test_reports_changes_immediately(client, auth_headers):
+    version = poll(client, auth_headers)['version']
+    create_chores(client, auth_headers, 1)
+
+    start = time.perf_counter()
+    changes = poll(client, auth_headers, since=version, timeout='5')
+    assert time.perf_counter() - start < 1
+    assert changes['changed'] is True
+    assert changes['version'] != version
+
+
+def test_waits_until_timeout(client, auth_headers, max_queries):
+    version = poll(client, auth_headers)['version']
+
+    start = time.perf_counter()
+    with max_queries(3):
+        changes = poll(client, auth_headers, since=version, timeout='0.2')
+    assert time.perf_counter() - start >= 0.2
+    assert changes == {'version': version, 'changed': False}
+
+
+def test_published_change_wakes_the_poll(client, auth_headers, user):
+    version = poll(client, auth_headers)['version']
+
+    timer = Timer(0.1, events.publish, args=(user.id,))
+    timer.start()
+    start = time.perf_counter()
+    poll(client, auth_headers, since=version, timeout='10')
+    timer.join()
+    assert time.perf_counter() - start < 5
+
+
+def test_rejects_invalid_timeout(client, auth_headers):
+    for timeout in ('soon', '-1', '600'):
+        resp = client.get('/api/changes', headers=auth_headers, params={'timeout': timeout})
+        assert resp.status_code == 400
+
+
+def test_broker_fans_out_across_feeds():
+    broker = LocalBroker()
+    feeds = [ChangeFeed(broker), ChangeFeed(broker)]
+    try:
+        with feeds[1].watch('OWNER') as changed, feeds[1].watch('OTHER') as unrelated:
+            feeds[0].publish('OWNER')
+            assert changed.is_set()
+            assert not unrelated.is_set()
+    finally:
+        for feed in feeds:
+            feed.close()
+
+
+def test_closed_feeds_stop_listening():
+    broker = LocalBroker()
+    before = events.listener_count()
+    feed = ChangeFeed(broker)
+    feed.close()
+
+    assert events.listener_count() == before
+    assert broker.listeners == []
@@ -0,0 +1,129 @@
+import json
+from unittest.mock import patch
+
+import pendulum
+import pytest
+from molten import Settings, testing
+from molten.contrib.sqlalchemy import EngineData
+
+from auth import AuthProvider, AuthProviderComponent
+from cache import LRUCache
+from factory import create_app, create_components
+from models import ChoreDefinitionManager, Model, User, get_id
+
+
+def create_chore(client, auth_headers, name='laundry'):
+    return client.post('/api/chores', headers=auth_headers, json={
+        'name': name,
+        'details': '',
+        'frequencyType': 'weeks',
+        'frequencyAmount': 1,
+        'startDate': '2030-01-01T10:00:00+00:00',
+    }).json()
+
+
+def test_not_modified_skips_the_handler(client, auth_headers):
+    create_chore(client, auth_headers)
+    first = client.get('/api/chores', headers=auth_headers)
+    assert first.headers['cache-control'] == 'private, no-cache'
+    assert first.headers['last-modified']
+
+    with patch.object(ChoreDefinitionManager, 'get_chore_rows') as get_chore_rows:
+        resp = client.get('/api/chores', headers=dict(auth_headers, **{'if-none-match': first.headers['etag']}))
+
+    assert resp.status_code == 304
+    assert resp.headers['etag'] == first.headers['etag']
+    get_chore_rows.assert_not_called()
+
+    resp = client.get('/api/chores', headers=dict(auth_headers, **{
+        'if-modified-since': first.headers['last-modified'],
+    }))
+    assert resp.status_code == 304
+
+
+def test_etag_changes_with_data_and_query(client, auth_headers):
+    chore = create_chore(client, auth_headers)
+    etag = client.get('/api/chores', headers=auth_headers).headers['etag']
+
+    assert client.get('/api/chores', headers=auth_headers, params={'limit': '1'}).headers['etag'] != etag
+
+    client.delete(f"/api/chores/{chore['id']}", headers=auth_headers)
+    resp = client.get('/api/chores', headers=dict(auth_headers, **{'if-none-match': etag}))
+    assert resp.status_code == 200
+    assert resp.headers['etag'] != etag
+
+
+def read_json(resp):
+    if resp.headers.get('transfer-encoding') == 'chunked':
+        return json.loads(b''.join(resp.stream))
+    return resp.json()
+
+
+class StaticAuthProviderComponent(AuthProviderComponent):
+    def __init__(self, provider: AuthProvider):
+        super().__init__()
+        self.provider = provider
+
+    def resolve(self) -> AuthProvider:
+        return self.provider
+
+
+@pytest.fixture
+def worker_clients(tmp_path):
+    # Two apps over one database file stand in for two gunicorn workers,
+    # each with its own in-process caches.
+    settings = Settings({
+        'database_engine_dsn': f'sqlite:///{tmp_path}/shared.db',
+        'identity_server': 'http://localhost',
+        'secret_key': 'fake_secret',
+    })
+    provider = AuthProvider(None, 'http://localhost', 'fake_secret', token_cache=LRUCache())
+    apps = [
+        create_app(settings=settings, components=[
+            StaticAuthProviderComponent(provider) if isinstance(component, AuthProviderComponent) else component
+            for component in create_components(settings)
+        ])
+        for _ in range(2)
+    ]
+
+    def create_user(engine_data: EngineData) -> User:
+        Model.metadata.create_all(engine_data.engine)
+        session = engine_data.session_factory()
+        user = User(external_id=get_id(), email='shared@example.com')
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        session.close()
+        return user
+
+    user = apps[0].injector.get_resolver().resolve(create_user)()
+    headers = {'Authorization': f'Bearer {provider.get_user_token(user)}'}
+    yield [testing.TestClient(app) for app in apps], headers
+
+
+def test_cached_bodies_follow_changes_from_other_workers(worker_clients):
+    (first, second), headers = worker_clients
+    create_daily_chore = {
+        'details': '',
+        'frequencyType': 'days',
+        'frequencyAmount': 1,
+        'startDate': pendulum.now('UTC').add(days=1).isoformat(),
+    }
+    first.post('/api/chores', headers=headers, json=dict(create_daily_chore, name='dishes'))
+
+    etags = {}
+    for path in ('/api/upcoming', '/api/forecast'):
+        first.get(path, headers=headers)
+        cached = first.get(path, headers=headers)
+        assert len(read_json(cached)) >= 1
+        etags[path] = cached.headers['etag']
+
+    # Committed by the other worker, whose events never reach this one.
+    with patch('events.publish'):
+        second.post('/api/chores', headers=headers, json=dict(create_daily_chore, name='laundry'))
+
+    for path, etag in etags.items():
+        resp = first.get(path, headers=dict(headers, **{'if-none-match': etag}))
+        assert resp.status_code == 200
+        assert resp.headers['etag'] != etag
+        assert 'laundry' in {item['name'] for item in read_json(resp)}
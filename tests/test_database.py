@@ -0,0 +1,90 @@
+import os
+
+import pytest
+from molten import Settings
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from database import configure_engine, engine_params, pool_stats, reset_after_fork
+
+
+def make_engine(dsn, **settings):
+    settings = Settings(dict(settings, database_engine_dsn=dsn))
+    return configure_engine(create_engine(dsn, **engine_params(settings)), settings)
+
+
+def test_postgres_gets_pool_and_statement_timeout():
+    params = engine_params(Settings({
+        'database_engine_dsn': 'postgresql://localhost/doit',
+        'database_pool_size': 20,
+        'database_statement_timeout': 5000,
+    }))
+
+    assert params['pool_size'] == 20
+    assert params['pool_pre_ping'] is True
+    assert params['connect_args'] == {'options': '-c statement_timeout=5000'}
+
+
+def test_sqlite_files_are_pooled_and_tuned(tmp_path):
+    engine = make_engine(f'sqlite:///{tmp_path}/tuned.db', sqlite_mmap_size=1024 * 1024)
+    assert isinstance(engine.pool, QueuePool)
+
+    with engine.connect() as conn:
+        assert conn.execute('PRAGMA journal_mode').scalar() == 'wal'
+        assert conn.execute('PRAGMA synchronous').scalar() == 1
+        assert conn.execute('PRAGMA mmap_size').scalar() == 1024 * 1024
+
+    stats = pool_stats(engine)
+    assert stats['connects'] == 1
+    assert stats['checked_out'] == 0
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_forked_children_do_not_reuse_parent_connections(tmp_path):
+    engine = make_engine(f'sqlite:///{tmp_path}/forked.db')
+    with engine.connect() as conn:
+        conn.execute('SELECT 1')
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            with engine.connect() as conn:
+                conn.execute('SELECT 1')
+            os._exit(0 if pool_stats(engine)['forked'] == 1 else 1)
+        except BaseException:
+            os._exit(2)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    with engine.connect() as conn:
+        assert conn.execute('SELECT 1').scalar() == 1
+    assert pool_stats(engine)['forked'] == 0
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_reset_after_fork_leaves_parent_connections_open(tmp_path):
+    engine = make_engine(f'sqlite:///{tmp_path}/reset.db')
+    with engine.connect() as conn:
+        conn.execute('SELECT 1')
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            reset_after_fork()
+            with engine.connect() as conn:
+                conn.execute('SELECT 1')
+            stats = pool_stats(engine)
+            os._exit(0 if stats['forked'] == 0 and stats['connects'] == 2 else 1)
+        except BaseException:
+            os._exit(2)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert pool_stats(engine)['checked_in'] == 1
+    with engine.connect() as conn:
+        assert conn.execute('SELECT 1').scalar() == 1
+    assert pool_stats(engine)['connects'] == 1
+
+
+def test_metrics_include_pool_state(client, metrics_headers):
+    assert 'doit_db_pool_events_total{event="checkouts"}' in client.get('/metrics', headers=metrics_headers).data
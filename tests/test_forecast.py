@@ -0,0 +1,81 @@
+import gc
+import json
+from datetime import datetime
+
+import pendulum
+
+import events
+from forecast import ForecastCache, forecast
+from models import ForecastRow, FrequencyTypes
+
+
+def read_json(resp):
+    if resp.headers.get('transfer-encoding') == 'chunked':
+        return json.loads(b''.join(resp.stream))
+    return resp.json()
+
+
+def test_forecast_merges_definitions_in_order():
+    rows = [
+        ForecastRow('a', 'daily', FrequencyTypes.DAYS, 2, datetime(2019, 12, 1, 8)),
+        ForecastRow('b', 'monthly', FrequencyTypes.MONTHS, 1, datetime(2019, 1, 31, 9)),
+    ]
+    start, end = pendulum.datetime(2020, 1, 1), pendulum.datetime(2020, 2, 1)
+    items = list(forecast(rows, start, end))
+
+    assert [item['dueDate'] for item in items] == sorted(item['dueDate'] for item in items)
+    assert [item['dueDate'] for item in items if item['id'] == 'b'] == ['2020-01-31T09:00:00+00:00']
+    assert [item['dueDate'] for item in items if item['id'] == 'a'][:2] == [
+        '2020-01-02T08:00:00+00:00',
+        '2020-01-04T08:00:00+00:00',
+    ]
+
+
+def test_forecast_endpoint_is_cached_and_invalidated(client, auth_headers):
+    def create_chore(name):
+        client.post('/api/chores', headers=auth_headers, json={
+            'name': name,
+            'details': '',
+            'frequencyType': 'weeks',
+            'frequencyAmount': 1,
+            'startDate': '2030-01-01T10:00:00+00:00',
+        })
+
+    create_chore('first')
+    params = {'from': '2030-01-01T00:00:00+00:00', 'to': '2030-01-31T00:00:00+00:00'}
+
+    first = client.get('/api/forecast', headers=auth_headers, params=params)
+    assert first.headers.get('transfer-encoding') == 'chunked'
+    occurrences = read_json(first)
+    assert len(occurrences) == 5
+
+    cached = client.get('/api/forecast', headers=auth_headers, params=params)
+    assert cached.headers.get('transfer-encoding') is None
+    assert cached.json() == occurrences
+
+    create_chore('second')
+    refreshed = client.get('/api/forecast', headers=auth_headers, params=params)
+    assert len(read_json(refreshed)) == 10
+
+
+def test_forecast_cache_keeps_a_bounded_number_of_windows():
+    cache = ForecastCache(max_windows=2)
+    for day in range(1, 4):
+        window = (f'2030-01-0{day}', '2030-02-01')
+        list(cache.record('owner', 'v1', window, [{'id': day}]))
+
+    assert cache.get('owner', 'v1', ('2030-01-01', '2030-02-01')) is None
+    assert cache.get('owner', 'v1', ('2030-01-02', '2030-02-01')) == [{'id': 2}]
+    assert cache.get('owner', 'v1', ('2030-01-03', '2030-02-01')) == [{'id': 3}]
+    assert cache.get('owner', 'v2', ('2030-01-03', '2030-02-01')) is None
+
+
+def test_discarded_caches_stop_listening():
+    before = events.listener_count()
+    cache = ForecastCache()
+    assert events.listener_count() == before + 1
+
+    del cache
+    gc.collect()
+    assert events.listener_count() == before
+    events.publish('owner')
@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from auth import AuthProvider, IdentityCache
+from session import PooledSession
+from tests.stub_identity import StubIdentityServer
+
+
+@pytest.fixture
+def identity_server():
+    with StubIdentityServer(users={'good': {'id': 'extid', 'email': 'e@example.com'}}) as server:
+        yield server
+
+
+@pytest.fixture
+def identity_provider(identity_server):
+    session = PooledSession()
+    yield AuthProvider(session, identity_server.url, 'fake_secret', identity_cache=IdentityCache())
+    session.close()
+
+
+def test_identity_responses_are_cached(identity_server, identity_provider):
+    assert identity_provider.get_user_from_token('good')['id'] == 'extid'
+    assert identity_provider.get_user_from_token('good')['id'] == 'extid'
+    assert identity_server.request_count == 1
+
+
+def test_rejected_tokens_are_negatively_cached(identity_server, identity_provider):
+    assert identity_provider.get_user_from_token('bad') is None
+    assert identity_provider.get_user_from_token('bad') is None
+    assert identity_server.request_count == 1
+
+
+def test_concurrent_logins_share_one_upstream_call(identity_server, identity_provider):
+    identity_server.latency = 0.2
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        users = list(executor.map(identity_provider.get_user_from_token, ['good'] * 8))
+
+    assert all(user['id'] == 'extid' for user in users)
+    assert identity_server.request_count == 1
+
+
+def test_uncached_provider_rejects_bad_tokens(identity_server):
+    session = PooledSession()
+    provider = AuthProvider(session, identity_server.url, 'fake_secret')
+    try:
+        assert provider.get_user_from_token('bad') is None
+    finally:
+        session.close()
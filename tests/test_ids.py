@@ -0,0 +1,93 @@
+import time
+
+import pendulum
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from id_storage import convert_id_storage
+from models import Model, User, ChoreDefinition, ArchivedChoreInstance, ChoreStats, FrequencyTypes,\
+    configure_ids, get_id, uuid7_hex
+
+
+@pytest.fixture
+def binary_ids():
+    configure_ids('uuid7', 'binary')
+    yield
+    configure_ids()
+
+
+def test_uuid7_ids_are_time_ordered():
+    ids = []
+    for _ in range(3):
+        ids.append(uuid7_hex())
+        time.sleep(0.002)
+
+    assert ids == sorted(ids)
+    assert all(len(chore_id) == 32 and chore_id == chore_id.upper() for chore_id in ids)
+    assert all(chore_id[12] == '7' and chore_id[16] in '89AB' for chore_id in ids)
+
+
+def test_binary_ids_round_trip_as_hex(binary_ids):
+    engine = create_engine('sqlite://')
+    Model.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    user = User(external_id=get_id(), email='binary@example.com')
+    session.add(user)
+    session.flush()
+    definition = ChoreDefinition(
+        name='binary',
+        owner_id=user.id,
+        frequency_amount=1,
+        frequency_type=FrequencyTypes.DAYS,
+    )
+    session.add(definition)
+    session.commit()
+    user_id, definition_id = user.id, definition.id
+    session.close()
+
+    stored = engine.execute('SELECT typeof(id), length(id) FROM chore_definition').fetchone()
+    assert tuple(stored) == ('blob', 16)
+
+    session = sessionmaker(bind=engine)()
+    loaded = session.query(ChoreDefinition).filter_by(owner_id=user_id).one()
+    assert loaded.id == definition_id
+    assert loaded.owner_id == user_id
+    assert len(loaded.id) == 32
+
+
+def test_id_storage_conversion_covers_archive_and_stats(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/ids.db')
+    Model.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    user = User(external_id=get_id(), email='ids@example.com')
+    session.add(user)
+    session.flush()
+    definition = ChoreDefinition(name='ids', owner_id=user.id, frequency_amount=1, frequency_type=FrequencyTypes.DAYS)
+    session.add(definition)
+    session.flush()
+    now = pendulum.now('UTC')
+    archived = ArchivedChoreInstance(
+        id=get_id(), created_at=now, updated_at=now, deleted=False, name='ids', details='',
+        owner_id=user.id, chore_definition_id=definition.id, due_date=now, completed=True, archived_at=now,
+    )
+    session.add_all([archived, ChoreStats(chore_definition_id=definition.id)])
+    session.commit()
+    user_id, definition_id, archived_id = user.id, definition.id, archived.id
+    session.close()
+
+    with engine.begin() as conn:
+        assert convert_id_storage(conn, 'binary')
+        assert not convert_id_storage(conn, 'binary')
+
+    stored = engine.execute('SELECT id, owner_id, chore_definition_id FROM chore_instance_archive').fetchone()
+    assert tuple(stored) == tuple(bytes.fromhex(value) for value in (archived_id, user_id, definition_id))
+    assert engine.execute('SELECT chore_definition_id FROM chore_stats').scalar() == bytes.fromhex(definition_id)
+
+    with engine.begin() as conn:
+        assert convert_id_storage(conn, 'hex')
+
+    assert engine.execute('SELECT id FROM chore_instance_archive').scalar() == archived_id
+    assert engine.execute('SELECT chore_definition_id FROM chore_stats').scalar() == definition_id
@@ -0,0 +1,21 @@
+from threading import Event, Timer
+
+from molten import Settings
+
+from jobs import PeriodicJob, create_jobs, run_jobs
+
+
+def test_no_jobs_unless_an_interval_is_set():
+    assert create_jobs(Settings({'database_engine_dsn': 'sqlite://'})) == []
+
+
+def test_run_jobs_stops_every_job():
+    runs = []
+    jobs = [PeriodicJob(name, lambda stop, name=name: runs.append(name), 0.01) for name in ('first', 'second')]
+    stop = Event()
+    Timer(0.1, stop.set).start()
+
+    run_jobs(jobs, stop)
+
+    assert {'first', 'second'} <= set(runs)
+    assert not any(job.is_alive() for job in jobs)
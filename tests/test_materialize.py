@@ -0,0 +1,121 @@
+import pendulum
+import pytest
+from molten.contrib.sqlalchemy import EngineData
+
+from materialize import Materializer, insert_ignoring_duplicates
+from models import ChoreDefinition, ChoreInstance, configure_materialize
+
+
+@pytest.fixture
+def materializer(test_app):
+    configure_materialize(30)
+
+    def get_materializer(engine_data: EngineData) -> Materializer:
+        return Materializer(engine_data.session_factory, horizon_days=30, batch_size=2)
+
+    yield test_app.injector.get_resolver().resolve(get_materializer)()
+    configure_materialize()
+
+
+def create_chore(client, auth_headers, frequency_type, start_date):
+    resp = client.post('/api/chores', headers=auth_headers, json={
+        'name': f'every {frequency_type}',
+        'details': '',
+        'frequencyType': frequency_type,
+        'frequencyAmount': 1,
+        'startDate': start_date.isoformat(),
+    })
+    assert resp.status_code == 200
+    return resp.json()['id']
+
+
+def due_dates(db_session, chore_id, **filters):
+    db_session.expire_all()
+    return [row[0] for row in db_session.query(ChoreInstance.due_date)
+            .filter_by(chore_definition_id=chore_id, **filters)
+            .order_by(ChoreInstance.due_date)]
+
+
+def test_materializes_up_to_horizon(db_session, client, auth_headers, materializer):
+    start = pendulum.now('UTC').add(hours=1)
+    weekly = create_chore(client, auth_headers, 'weeks', start)
+    yearly = create_chore(client, auth_headers, 'years', start)
+
+    materializer.run()
+
+    assert due_dates(db_session, weekly) == [start.add(weeks=week) for week in range(5)]
+    assert due_dates(db_session, yearly) == [start]
+    upcoming = client.get('/api/upcoming', headers=auth_headers).json()
+    assert len([chore for chore in upcoming if chore['name'] == 'every weeks']) == 2
+
+
+def test_runs_are_idempotent(db_session, client, auth_headers, materializer):
+    chore_id = create_chore(client, auth_headers, 'days', pendulum.now('UTC').add(hours=1))
+    materializer.run()
+    expected = due_dates(db_session, chore_id)
+
+    assert materializer.run() == 0
+    assert due_dates(db_session, chore_id) == expected
+
+
+def test_concurrent_inserts_are_ignored(db_session, client, auth_headers, materializer):
+    chore_id = create_chore(client, auth_headers, 'days', pendulum.now('UTC').add(hours=1))
+    definitions = db_session.query(
+        ChoreDefinition.id,
+        ChoreDefinition.name,
+        ChoreDefinition.details,
+        ChoreDefinition.owner_id,
+        ChoreDefinition.frequency_type,
+        ChoreDefinition.frequency_amount,
+    ).filter_by(id=chore_id).all()
+    latest = {chore_id: (pendulum.instance(due_dates(db_session, chore_id)[0]), 1)}
+
+    # Two hosts that read the same state compute the same occurrences.
+    now = pendulum.now('UTC')
+    for _ in range(2):
+        rows = materializer.occurrences(definitions, latest, now)
+        db_session.execute(insert_ignoring_duplicates('sqlite'), rows)
+    db_session.commit()
+
+    assert len(due_dates(db_session, chore_id)) == len(rows) + 1
+
+
+def test_completion_creates_the_next_occurrence_without_a_materializer_run(
+        db_session, client, auth_headers, materializer):
+    chore_id = create_chore(client, auth_headers, 'years', pendulum.now('UTC').add(hours=1))
+    instance_id = client.get('/api/upcoming', headers=auth_headers).json()[0]['id']
+
+    assert client.post(f'/api/upcoming/{instance_id}', headers=auth_headers).status_code == 200
+    first, = due_dates(db_session, chore_id, completed=True)
+    assert due_dates(db_session, chore_id, completed=False) == [first.add(years=1)]
+
+    # On the materializer's schedule, so its next run has nothing to add.
+    assert materializer.run() == 0
+    assert due_dates(db_session, chore_id, completed=False) == [first.add(years=1)]
+
+
+def test_late_batch_completion_resumes_the_schedule(db_session, client, auth_headers, materializer):
+    start = pendulum.now('UTC').subtract(days=3, hours=1)
+    chore_id = create_chore(client, auth_headers, 'days', start)
+    instance_id = client.get('/api/upcoming', headers=auth_headers).json()[0]['id']
+
+    assert client.post('/api/upcoming/complete', headers=auth_headers, json={'ids': [instance_id]}).status_code == 200
+    assert due_dates(db_session, chore_id, completed=False) == [start.add(days=4)]
+
+
+def test_completion_leaves_materialized_occurrences_alone(db_session, client, auth_headers, materializer):
+    chore_id = create_chore(client, auth_headers, 'weeks', pendulum.now('UTC').add(hours=1))
+    materializer.run()
+    open_due_dates = due_dates(db_session, chore_id, completed=False)
+    instance_id = client.get('/api/upcoming', headers=auth_headers).json()[0]['id']
+
+    assert client.post('/api/upcoming/complete', headers=auth_headers, json={'ids': [instance_id]}).status_code == 200
+    assert due_dates(db_session, chore_id, completed=False) == open_due_dates[1:]
+
+
+def test_deleted_chores_are_skipped(db_session, client, auth_headers, materializer):
+    chore_id = create_chore(client, auth_headers, 'days', pendulum.now('UTC').add(hours=1))
+    client.delete(f'/api/chores/{chore_id}', headers=auth_headers)
+
+    materializer.run()
+    assert len(due_dates(db_session, chore_id)) == 1
@@ -0,0 +1,38 @@
+import pendulum
+
+from models import ChoreInstanceManager, UserProvider, isoformat_utc
+
+
+def explain(session, query):
+    statement = query.statement.compile(dialect=session.bind.dialect)
+    params = tuple(str(statement.params[name]) for name in statement.positiontup)
+    cursor = session.connection().connection.cursor()
+    rows = cursor.execute(f'EXPLAIN QUERY PLAN {statement}', params).fetchall()
+    return ' '.join(row[-1] for row in rows)
+
+
+def test_upcoming_chores_query_uses_open_instance_index(db_session):
+    manager = ChoreInstanceManager(db_session, None)
+    plan = explain(db_session, manager.upcoming_chores_query('someuser'))
+
+    assert 'USING INDEX ix_chore_instance_open_owner_due' in plan
+    assert 'USE TEMP B-TREE FOR ORDER BY' not in plan
+
+
+def test_upcoming_chore_rows_match_orm_path(client, auth_headers, db_session, user):
+    for days in (3, 1, 2):
+        client.post('/api/chores', headers=auth_headers, json={
+            'name': f'chore {days}',
+            'details': 'details',
+            'frequencyType': 'days',
+            'frequencyAmount': 1,
+            'startDate': pendulum.now('UTC').add(days=days).isoformat(),
+        })
+
+    manager = ChoreInstanceManager(db_session, UserProvider(db_session))
+    manager.user_provider.load_user(user.id)
+    instances = manager.get_upcoming_chores()
+    rows = manager.get_upcoming_chore_rows()
+
+    assert [row.id for row in rows] == [instance.id for instance in instances]
+    assert [isoformat_utc(row.due_date) for row in rows] == [instance.due_date.isoformat() for instance in instances]
@@ -0,0 +1,166 @@
+import json
+
+import pendulum
+import pytest
+from molten.contrib.sqlalchemy import EngineData
+
+from models import NotificationLog
+from notify import FileSink, MemorySink, Notification, Scanner, WebhookSink
+from tests.test_archive import backdate
+from tests.test_materialize import create_chore
+
+
+class FailingSink(MemorySink):
+    def send(self, owner_id, notifications):
+        raise ConnectionError('webhook is down')
+
+
+@pytest.fixture
+def make_scanner(test_app, db_session):
+    db_session.query(NotificationLog).delete()
+    db_session.commit()
+
+    def get_session_factory(engine_data: EngineData):
+        return engine_data.session_factory
+
+    session_factory = test_app.injector.get_resolver().resolve(get_session_factory)()
+
+    def make(sink, batch_size=2):
+        return Scanner(session_factory, sink, lead_minutes=60, batch_size=batch_size)
+
+    return make
+
+
+def sent_to(sink, user):
+    return [
+        (notification.kind, notification.name)
+        for owner_id, notifications in sink.sent if owner_id == user.id
+        for notification in notifications
+    ]
+
+
+def test_sweeps_due_soon_then_overdue(client, auth_headers, user, make_scanner):
+    now = pendulum.now('UTC')
+    for minutes in (10, 50, 100, 180):
+        create_chore(client, auth_headers, 'weeks', now.add(minutes=minutes))
+    upcoming = client.get('/api/upcoming', headers=auth_headers).json()
+    client.post(f"/api/upcoming/{upcoming[1]['id']}", headers=auth_headers)
+
+    sink = MemorySink()
+    scanner = make_scanner(sink)
+    scanner.run(now=now)
+    assert sent_to(sink, user) == [('due_soon', 'every weeks')]
+
+    scanner.run(now=now)
+    assert len(sent_to(sink, user)) == 1
+
+    sink.sent.clear()
+    scanner.run(now=now.add(minutes=90))
+    assert sorted(sent_to(sink, user)) == [('due_soon', 'every weeks'), ('overdue', 'every weeks')]
+
+
+def test_groups_notifications_by_owner(client, auth_headers, user, make_scanner):
+    now = pendulum.now('UTC')
+    for minutes in (5, 6, 7):
+        create_chore(client, auth_headers, 'days', now.add(minutes=minutes))
+
+    sink = MemorySink()
+    make_scanner(sink, batch_size=1000).run(now=now)
+
+    batches = [notifications for owner_id, notifications in sink.sent if owner_id == user.id]
+    assert len(batches) == 1
+    assert [notification.due_date for notification in batches[0]] == sorted(
+        notification.due_date for notification in batches[0]
+    )
+
+
+def test_sent_notifications_are_not_repeated(client, auth_headers, user, make_scanner):
+    now = pendulum.now('UTC')
+    create_chore(client, auth_headers, 'days', now.add(minutes=20))
+
+    make_scanner(MemorySink()).run(now=now)
+
+    sink = MemorySink()
+    make_scanner(sink).run(now=now.add(minutes=1))
+    assert sent_to(sink, user) == []
+
+
+def test_chores_created_inside_the_window_are_notified(client, auth_headers, user, make_scanner):
+    now = pendulum.now('UTC')
+    make_scanner(MemorySink()).run(now=now)
+
+    create_chore(client, auth_headers, 'days', now.add(minutes=20))
+    sink = MemorySink()
+    make_scanner(sink).run(now=now.add(minutes=1))
+    assert sent_to(sink, user) == [('due_soon', 'every days')]
+
+
+def test_chores_starting_in_the_past_are_overdue(client, auth_headers, user, make_scanner):
+    now = pendulum.now('UTC')
+    create_chore(client, auth_headers, 'weeks', now.subtract(days=2))
+
+    sink = MemorySink()
+    make_scanner(sink).run(now=now)
+    assert sent_to(sink, user) == [('overdue', 'every weeks')]
+
+    sink.sent.clear()
+    make_scanner(sink).run(now=now.add(minutes=1))
+    assert sent_to(sink, user) == []
+
+
+def test_archived_instances_leave_the_log(db_session, client, auth_headers, user, make_scanner, archiver):
+    now = pendulum.now('UTC')
+    create_chore(client, auth_headers, 'weeks', now.subtract(days=2))
+    make_scanner(MemorySink()).run(now=now)
+    instance_id = client.get('/api/upcoming', headers=auth_headers).json()[0]['id']
+    client.post(f'/api/upcoming/{instance_id}', headers=auth_headers)
+    assert db_session.query(NotificationLog).filter_by(instance_id=instance_id).count() == 1
+    backdate(db_session, user, 120)
+
+    archiver.run()
+    assert db_session.query(NotificationLog).filter_by(instance_id=instance_id).count() == 0
+
+
+def test_failed_dispatch_is_retried(client, auth_headers, user, make_scanner):
+    now = pendulum.now('UTC')
+    create_chore(client, auth_headers, 'days', now.add(minutes=20))
+
+    with pytest.raises(ConnectionError):
+        make_scanner(FailingSink()).run(now=now)
+
+    sink = MemorySink()
+    make_scanner(sink).run(now=now)
+    assert sent_to(sink, user) == [('due_soon', 'every days')]
+
+
+def test_file_and_webhook_sinks_send_json(tmp_path, make_scanner):
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+    class FakeSession:
+        def __init__(self):
+            self.posts = []
+
+        def post(self, url, json):
+            self.posts.append((url, json))
+            return FakeResponse()
+
+    notification = Notification('overdue', 'ABC', 'OWNER', 'dishes', pendulum.datetime(2026, 1, 1))
+    expected = {
+        'ownerId': 'OWNER',
+        'notifications': [{
+            'key': 'overdue:ABC',
+            'kind': 'overdue',
+            'id': 'ABC',
+            'name': 'dishes',
+            'dueDate': '2026-01-01T00:00:00+00:00',
+        }],
+    }
+
+    FileSink(str(tmp_path / 'notifications.jsonl')).send('OWNER', [notification])
+    assert json.loads((tmp_path / 'notifications.jsonl').read_text()) == expected
+
+    session = FakeSession()
+    WebhookSink('http://hooks.example.com/chores', session).send('OWNER', [notification])
+    assert session.posts == [('http://hooks.example.com/chores', expected)]
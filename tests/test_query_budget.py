@@ -0,0 +1,77 @@
+import logging
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+
+import api
+from models import ChoreDefinition, ChoreInstance
+from timing import Instrumentation
+from tests.test_api import create_chores
+
+
+def get_instrumentation(instrumentation: Instrumentation) -> Instrumentation:
+    return instrumentation
+
+
+@pytest.fixture
+def chores(client, auth_headers):
+    create_chores(client, auth_headers, 20)
+    return client.get('/api/chores', headers=auth_headers).json()
+
+
+def test_reads_stay_within_budget(client, auth_headers, max_queries, chores):
+    chore_id = chores[0]['id']
+    for path, handler in (
+        ('/api/upcoming', api.get_upcoming),
+        ('/api/upcoming?limit=5', api.get_upcoming),
+        ('/api/forecast', api.get_forecast),
+        ('/api/chores', api.get_chores),
+        ('/api/chores?limit=5', api.get_chores),
+        (f'/api/chores/{chore_id}', api.get_chore),
+        (f'/api/chores/{chore_id}/schedule', api.get_chore_schedule),
+        (f'/api/chores/{chore_id}/history', api.get_chore_history),
+        (f'/api/chores/{chore_id}/stats', api.get_chore_stats),
+    ):
+        path, _, query = path.partition('?')
+        params = dict([query.split('=')]) if query else None
+        with max_queries(handler.query_budget):
+            assert client.get(path, headers=auth_headers, params=params).status_code == 200
+
+
+def test_writes_stay_within_budget(client, auth_headers, max_queries, chores):
+    with max_queries(api.create_chore.query_budget):
+        create_chores(client, auth_headers, 1)
+
+    upcoming = client.get('/api/upcoming', headers=auth_headers).json()
+
+    with max_queries(api.complete_upcoming.query_budget):
+        client.post(f"/api/upcoming/{upcoming[0]['id']}", headers=auth_headers)
+
+    with max_queries(api.complete_upcoming_batch.query_budget):
+        client.post('/api/upcoming/complete', headers=auth_headers, json={
+            'ids': [chore['id'] for chore in upcoming[1:]],
+        })
+
+    with max_queries(api.delete_chore.query_budget):
+        client.delete(f"/api/chores/{chores[0]['id']}", headers=auth_headers)
+
+
+def test_lazy_loads_must_be_explicit(db_session, client, auth_headers, chores):
+    instance = db_session.query(ChoreInstance).first()
+    assert isinstance(instance.chore_definition, ChoreDefinition)
+
+    definition = db_session.query(ChoreDefinition).first()
+    with pytest.raises(InvalidRequestError):
+        definition.instances
+
+
+def test_over_budget_requests_are_logged(test_app, client, auth_headers, caplog):
+    instrumentation = test_app.injector.get_resolver().resolve(get_instrumentation)()
+    with patch.object(instrumentation, 'warn_over_budget', True), \
+            patch.object(api.get_chores, 'query_budget', 0), \
+            caplog.at_level(logging.WARNING, logger='timing'):
+        client.get('/api/chores', headers=auth_headers)
+
+    assert 'GET api:get-chores ran' in caplog.text
+    assert 'over its budget of 0' in caplog.text
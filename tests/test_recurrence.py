@@ -0,0 +1,46 @@
+import calendar
+import random
+from datetime import datetime, timedelta
+
+import pendulum
+import pytest
+
+from models import FrequencyTypes
+from recurrence import project, project_array
+
+
+def random_start(rng):
+    start = datetime(2000, 1, 1) + timedelta(days=rng.randrange(365 * 40), microseconds=rng.randrange(86400 * 10 ** 6))
+    if rng.random() < 0.3:
+        # Bias towards month ends, where clamping happens.
+        last_day = calendar.monthrange(start.year, start.month)[1]
+        start = start.replace(day=last_day - rng.randrange(3))
+    return start
+
+
+def test_project_matches_pendulum():
+    pytest.importorskip('numpy')
+    rng = random.Random(1234)
+    starts, frequency_types, amounts = [], [], []
+    for _ in range(1000):
+        starts.append(random_start(rng))
+        frequency_types.append(rng.choice(list(FrequencyTypes)))
+        amounts.append(rng.randrange(1, 30))
+
+    projected = project_array(starts, frequency_types, amounts, 12)
+    for start, frequency_type, amount, row in zip(starts, frequency_types, amounts, projected):
+        expected = [
+            pendulum.instance(start).add(**{frequency_type.value: amount * step}).naive()
+            for step in range(1, 13)
+        ]
+        assert [value.item() for value in row] == expected
+
+
+def test_project_returns_utc_datetimes():
+    start = pendulum.datetime(2020, 1, 31, 9, 30, tz='UTC')
+    occurrences, = project([start], [FrequencyTypes.MONTHS], [1], 3)
+    assert occurrences == [
+        pendulum.datetime(2020, 2, 29, 9, 30, tz='UTC'),
+        pendulum.datetime(2020, 3, 31, 9, 30, tz='UTC'),
+        pendulum.datetime(2020, 4, 30, 9, 30, tz='UTC'),
+    ]
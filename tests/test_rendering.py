@@ -0,0 +1,134 @@
+import json
+import os
+from unittest.mock import MagicMock
+
+import pendulum
+import pytest
+from molten import HTTP_200, JSONRenderer, dump_schema
+
+from api import Chore
+from auth import AuthProviderComponent
+from models import ChoreDefinition, ChoreInstance, FrequencyTypes
+from rendering import FastJSONRenderer, configure_json, dumps, orjson
+
+
+def chores():
+    return [
+        Chore(id='a' * 32, name='dishes', details='', frequency_type='days', frequency_amount=1, start_date=None),
+        Chore(id=None, name='ménage ✓ "quoted"', details='line\nbreak', frequency_type='weeks',
+              frequency_amount=2, start_date=pendulum.now('UTC')),
+    ]
+
+
+GOLDEN_PAYLOADS = [
+    chores(),
+    chores()[0],
+    {'chores': chores(), 'next': None},
+    {'errors': {'name': 'this field is required'}},
+    [{'id': 'b' * 32, 'name': 'mop', 'dueDate': '2018-06-01T08:00:00+00:00', 'details': 'ünïcode'}],
+    [],
+]
+
+
+# Responses of the app before the encoder changes, recorded with the
+# locked dependencies (pendulum 2.0.3) from the rows baseline_rows adds.
+BASELINE = os.path.join(os.path.dirname(__file__), 'fixtures', 'baseline')
+
+
+def baseline(name):
+    with open(os.path.join(BASELINE, f'{name}.json'), 'rb') as f:
+        return f.read()
+
+
+def baseline_rows(db_session, user):
+    created = pendulum.datetime(2018, 5, 1, tz='UTC')
+    rows = [
+        ('0000000000000000000000000000000A', 'dishes', '', FrequencyTypes.DAYS, 1,
+         pendulum.datetime(2018, 6, 1, 8, tz='UTC'), False),
+        ('0000000000000000000000000000000B', 'ménage ✓ "quoted"', 'line\nbreak', FrequencyTypes.WEEKS, 2,
+         pendulum.datetime(2018, 6, 2, 9, 30, 15, 123456, tz='UTC'), False),
+        ('0000000000000000000000000000000C', 'done', 'ünïcode', FrequencyTypes.MONTHS, 3,
+         pendulum.datetime(2018, 5, 20, tz='UTC'), True),
+    ]
+    for index, (definition_id, name, details, frequency_type, amount, due_date, completed) in enumerate(rows):
+        stamp = created.add(minutes=index)
+        db_session.add(ChoreDefinition(
+            id=definition_id, name=name, details=details, frequency_type=frequency_type, frequency_amount=amount,
+            owner_id=user.id, created_at=stamp, updated_at=stamp,
+        ))
+        db_session.flush()
+        db_session.add(ChoreInstance(
+            id=definition_id[:-2] + '1' + definition_id[-1], name=name, details=details, owner_id=user.id,
+            chore_definition_id=definition_id, due_date=due_date, completed=completed,
+            created_at=stamp, updated_at=stamp,
+        ))
+    db_session.commit()
+
+
+def body(response):
+    return response.stream.read()
+
+
+@pytest.mark.parametrize('payload', GOLDEN_PAYLOADS)
+def test_fast_renderer_matches_molten_byte_for_byte(payload):
+    expected = body(JSONRenderer().render(HTTP_200, payload))
+    actual = FastJSONRenderer().render(HTTP_200, payload)
+
+    assert body(actual) == expected
+    assert actual.headers['content-type'] == 'application/json; charset=utf-8'
+
+
+def test_dumps_encodes_datetimes_and_enums_natively():
+    due_date = pendulum.datetime(2018, 6, 1, 8, tz='UTC')
+
+    assert dumps({'dueDate': due_date, 'frequencyType': FrequencyTypes.WEEKS}) == \
+        b'{"dueDate": "2018-06-01T08:00:00+00:00", "frequencyType": "weeks"}'
+
+
+def test_get_chores_matches_schema_dump(client, auth_headers):
+    resp = client.post('/api/chores', headers=auth_headers, json={
+        'name': 'ménage',
+        'details': 'every week',
+        'frequencyType': 'weeks',
+        'frequencyAmount': 1,
+        'startDate': pendulum.now('UTC').isoformat(),
+    })
+    chore = json.loads(resp.data)
+
+    resp = client.get('/api/chores', headers=auth_headers)
+    expected = json.dumps([dump_schema(Chore(start_date=None, **{
+        'id': chore['id'],
+        'name': chore['name'],
+        'details': chore['details'],
+        'frequency_type': chore['frequencyType'],
+        'frequency_amount': chore['frequencyAmount'],
+    }))])
+    assert resp.data == expected
+
+
+def test_responses_match_the_baseline_byte_for_byte(db_session, client, auth_headers, user, mock_provider_factory):
+    baseline_rows(db_session, user)
+
+    assert client.get('/api/upcoming', headers=auth_headers).data.encode() == baseline('upcoming')
+    assert client.get('/api/chores', headers=auth_headers).data.encode() == baseline('chores')
+
+    mock_provider_factory(AuthProviderComponent).set_mock(MagicMock(
+        get_user_from_token=lambda token: {'id': 'golden-user', 'email': 'golden@example.com'},
+        get_user_token=lambda user: 'golden.login.token',
+    ))
+    assert client.post('/login', json={'token': 'identity-token'}).data.encode() == baseline('login')
+
+
+@pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+def test_orjson_encoder_renders_the_same_documents():
+    try:
+        configure_json('orjson')
+        for payload in GOLDEN_PAYLOADS:
+            assert json.loads(dumps(payload)) == json.loads(body(JSONRenderer().render(HTTP_200, payload)))
+    finally:
+        configure_json()
+
+
+def test_unknown_encoder_is_rejected():
+    with pytest.raises(ValueError):
+        configure_json('simdjson')
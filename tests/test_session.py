@@ -0,0 +1,17 @@
+from molten import Settings
+
+from session import PooledSession, get_session, open_session, close_session
+
+
+def test_session_is_shared_until_closed():
+    settings = Settings({'identity_pool_size': 4, 'identity_connect_timeout': 1, 'identity_read_timeout': 2})
+    session = open_session(settings)
+
+    assert isinstance(session, PooledSession)
+    assert get_session(settings) is session
+    assert session.timeout == (1, 2)
+    assert session.get_adapter('https://example.com')._pool_maxsize == 4
+
+    close_session()
+    assert get_session(settings) is not session
+    close_session()
@@ -0,0 +1,176 @@
+from unittest.mock import patch
+
+import pendulum
+import pytest
+
+from models import ChoreDefinition, ChoreInstance, ChoreInstanceManager, ChoreStats
+from stats import rebuild_stats
+from tests.test_archive import backdate
+
+
+def create_chore(client, auth_headers, start_date):
+    resp = client.post('/api/chores', headers=auth_headers, json={
+        'name': 'chore',
+        'details': '',
+        'frequencyType': 'days',
+        'frequencyAmount': 1,
+        'startDate': start_date.isoformat(),
+    })
+    assert resp.status_code == 200
+    return resp.json()['id']
+
+
+def complete_next(db_session, client, auth_headers, chore_id, due_date=None):
+    instance = db_session.query(ChoreInstance)\
+        .filter_by(chore_definition_id=chore_id, completed=False)\
+        .one()
+    if due_date is not None:
+        instance.due_date = due_date
+        db_session.commit()
+    instance_id = instance.id
+    db_session.expire_all()
+    assert client.post(f'/api/upcoming/{instance_id}', headers=auth_headers).status_code == 200
+
+
+def stats_rows(db_session, user):
+    db_session.expire_all()
+    rows = db_session.query(ChoreStats)\
+        .join(ChoreDefinition, ChoreDefinition.id == ChoreStats.chore_definition_id)\
+        .filter(ChoreDefinition.owner_id == user.id)\
+        .order_by(ChoreStats.chore_definition_id)\
+        .all()
+    return [(
+        row.chore_definition_id,
+        row.completions,
+        row.on_time,
+        row.total_lateness,
+        row.current_streak,
+        row.last_completed_at,
+    ) for row in rows]
+
+
+def test_stats_track_completions(db_session, client, auth_headers):
+    now = pendulum.now('UTC')
+    chore_id = create_chore(client, auth_headers, now.subtract(hours=2))
+
+    resp = client.get(f'/api/chores/{chore_id}/stats', headers=auth_headers)
+    assert resp.json() == {
+        'id': chore_id,
+        'completions': 0,
+        'onTimeRatio': None,
+        'averageLatenessSeconds': None,
+        'currentStreak': 0,
+        'lastCompletedAt': None,
+    }
+
+    complete_next(db_session, client, auth_headers, chore_id)
+    complete_next(db_session, client, auth_headers, chore_id, due_date=now.add(days=1))
+    complete_next(db_session, client, auth_headers, chore_id, due_date=now.add(days=2))
+
+    stats = client.get(f'/api/chores/{chore_id}/stats', headers=auth_headers).json()
+    assert stats['completions'] == 3
+    assert stats['onTimeRatio'] == pytest.approx(2 / 3)
+    assert stats['averageLatenessSeconds'] == pytest.approx(2 * 3600 / 3, abs=5)
+    assert stats['currentStreak'] == 2
+    assert pendulum.parse(stats['lastCompletedAt']) >= now
+
+
+def test_late_completion_resets_streak(db_session, client, auth_headers):
+    now = pendulum.now('UTC')
+    chore_id = create_chore(client, auth_headers, now.add(days=1))
+    complete_next(db_session, client, auth_headers, chore_id)
+    complete_next(db_session, client, auth_headers, chore_id, due_date=now.subtract(days=1))
+
+    stats = client.get(f'/api/chores/{chore_id}/stats', headers=auth_headers).json()
+    assert stats['completions'] == 2
+    assert stats['currentStreak'] == 0
+
+
+def test_stats_of_unknown_chore_is_404(client, auth_headers):
+    assert client.get('/api/chores/ABC/stats', headers=auth_headers).status_code == 404
+
+
+def test_incremental_stats_match_rebuild(db_session, client, auth_headers, user):
+    now = pendulum.now('UTC')
+    chore_ids = [create_chore(client, auth_headers, now.add(hours=offset)) for offset in (-30, -1, 5, 48)]
+    for _ in range(3):
+        complete_next(db_session, client, auth_headers, chore_ids[0])
+        complete_next(db_session, client, auth_headers, chore_ids[2])
+        upcoming = client.get('/api/upcoming', headers=auth_headers).json()
+        assert client.post('/api/upcoming/complete', headers=auth_headers, json={
+            'ids': [chore['id'] for chore in upcoming],
+        }).status_code == 200
+
+    incremental = stats_rows(db_session, user)
+    assert any(row[1] for row in incremental)
+
+    rebuild_stats(db_session, chore_ids)
+    db_session.commit()
+    assert stats_rows(db_session, user) == incremental
+
+
+def test_rebuild_includes_archived_completions(db_session, client, auth_headers, user, archiver):
+    chore_id = create_chore(client, auth_headers, pendulum.now('UTC').subtract(days=1))
+    complete_next(db_session, client, auth_headers, chore_id)
+    complete_next(db_session, client, auth_headers, chore_id)
+    backdate(db_session, user, 60)
+    archiver.run()
+
+    db_session.query(ChoreStats).filter_by(chore_definition_id=chore_id).delete()
+    db_session.commit()
+    rebuild_stats(db_session, [chore_id])
+    db_session.commit()
+
+    stats = client.get(f'/api/chores/{chore_id}/stats', headers=auth_headers).json()
+    assert stats['completions'] == 2
+
+
+def complete_elsewhere_first(db_session):
+    # Another request completes the same instances between this request
+    # reading them and its UPDATE.
+    complete_open = ChoreInstanceManager._complete_open
+
+    def racing(self, instance_ids, completed_at):
+        db_session.query(ChoreInstance)\
+            .filter(ChoreInstance.id.in_(instance_ids[:1]))\
+            .update({'completed': True}, synchronize_session=False)
+        db_session.commit()
+        return complete_open(self, instance_ids, completed_at)
+
+    return patch.object(ChoreInstanceManager, '_complete_open', racing)
+
+
+def open_instances(db_session, chore_id):
+    db_session.expire_all()
+    return db_session.query(ChoreInstance).filter_by(chore_definition_id=chore_id, completed=False).count()
+
+
+def test_racing_completion_is_recorded_once(db_session, client, auth_headers):
+    chore_id = create_chore(client, auth_headers, pendulum.now('UTC').subtract(hours=1))
+    instance_id = db_session.query(ChoreInstance.id).filter_by(chore_definition_id=chore_id).scalar()
+
+    with complete_elsewhere_first(db_session):
+        assert client.post(f'/api/upcoming/{instance_id}', headers=auth_headers).status_code == 200
+
+    assert client.get(f'/api/chores/{chore_id}/stats', headers=auth_headers).json()['completions'] == 0
+    assert open_instances(db_session, chore_id) == 0
+
+
+def test_racing_batch_completion_records_only_its_own_rows(db_session, client, auth_headers):
+    now = pendulum.now('UTC')
+    chore_ids = [create_chore(client, auth_headers, now.subtract(hours=offset)) for offset in (2, 1)]
+    instance_ids = [
+        db_session.query(ChoreInstance.id).filter_by(chore_definition_id=chore_id).scalar()
+        for chore_id in chore_ids
+    ]
+
+    with complete_elsewhere_first(db_session):
+        resp = client.post('/api/upcoming/complete', headers=auth_headers, json={'ids': instance_ids})
+
+    assert resp.json()['results'] == [
+        {'id': instance_ids[0], 'completed': False},
+        {'id': instance_ids[1], 'completed': True},
+    ]
+    stats = [client.get(f'/api/chores/{chore_id}/stats', headers=auth_headers).json() for chore_id in chore_ids]
+    assert [chore_stats['completions'] for chore_stats in stats] == [0, 1]
+    assert [open_instances(db_session, chore_id) for chore_id in chore_ids] == [0, 1]
@@ -0,0 +1,49 @@
+import os
+import time
+
+from molten import HTTP_404, Settings
+
+from timing import Profiler, metrics
+
+
+def test_responses_carry_server_timing(client, auth_headers):
+    resp = client.get('/api/chores', headers=auth_headers)
+    assert resp.status_code == 200
+
+    entries = {
+        entry.split(';')[0]: entry
+        for entry in (part.strip() for part in resp.headers['server-timing'].split(','))
+    }
+    assert {'auth', 'user', 'view', 'sql', 'total'} <= set(entries)
+    assert 'queries"' in entries['sql']
+    assert not entries['sql'].endswith('"0 queries"')
+
+
+def test_metrics_need_the_metrics_token(client, auth_headers, metrics_headers):
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers=auth_headers).status_code == 401
+
+    client.get('/api/upcoming', headers=auth_headers)
+    resp = client.get('/metrics', headers=metrics_headers)
+
+    assert resp.status_code == 200
+    assert resp.headers['content-type'].startswith('text/plain')
+    assert 'doit_requests_total{route="api:get-upcoming",method="GET",status="200"}' in resp.data
+    assert 'doit_request_duration_seconds_bucket{route="api:get-upcoming",method="GET",le="+Inf"}' in resp.data
+    assert 'doit_sql_statements_total{route="api:get-upcoming"}' in resp.data
+    assert f'doit_process_info{{pid="{os.getpid()}"}} 1' in resp.data
+
+
+def test_metrics_are_off_without_a_token():
+    resp = metrics(None, None, Settings({}), 'Bearer anything')
+    assert resp.status == HTTP_404
+
+
+def test_profiler_keeps_the_slowest_requests(tmp_path):
+    profiler = Profiler(str(tmp_path), sample_rate=1, keep=2)
+    for delay in (0.03, 0.01, 0.02):
+        assert profiler.run('request', lambda: time.sleep(delay) or delay) == delay
+
+    kept = sorted(os.listdir(str(tmp_path)))
+    assert len(kept) == 2
+    assert [elapsed for elapsed, _ in sorted(profiler.slowest)][0] >= 0.02
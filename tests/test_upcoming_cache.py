@@ -0,0 +1,58 @@
+import time
+
+import events
+from upcoming_cache import UpcomingCache, RedisCacheBackend
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return value
+
+    def set(self, key, value, px=None):
+        self.data[key] = (value, time.time() + px / 1000 if px else None)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_shared_backend_is_invalidated_by_chore_events():
+    client = FakeRedis()
+    cache = UpcomingCache(RedisCacheBackend(client))
+    try:
+        cache.set('owner', 'v1', b'[]', ttl=60)
+        assert cache.get('owner', 'v1') == b'[]'
+        assert cache.get('owner', 'v2') is None
+        assert 'upcoming:owner' in client.data
+
+        events.publish('owner')
+        assert cache.get('owner', 'v1') is None
+    finally:
+        events.unsubscribe(cache.invalidate)
+
+
+def test_upcoming_etag_and_invalidation(client, auth_headers):
+    client.post('/api/chores', headers=auth_headers, json={
+        'name': 'dishes',
+        'details': '',
+        'frequencyType': 'days',
+        'frequencyAmount': 1,
+        'startDate': '2000-01-01T00:00:00+00:00',
+    })
+    first = client.get('/api/upcoming', headers=auth_headers)
+    etag = first.headers['etag']
+    assert first.status_code == 200
+
+    resp = client.get('/api/upcoming', headers=dict(auth_headers, **{'if-none-match': etag}))
+    assert resp.status_code == 304
+
+    chore_id = first.json()[0]['id']
+    client.post(f'/api/upcoming/{chore_id}', headers=auth_headers)
+    resp = client.get('/api/upcoming', headers=dict(auth_headers, **{'if-none-match': etag}))
+    assert resp.status_code == 200
+    assert resp.headers['etag'] != etag
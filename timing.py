@@ -0,0 +1,295 @@
+import cProfile
+import heapq
+import hmac
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from inspect import Parameter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from molten import Header, Request, Response, Route, Settings, HTTP_200, HTTP_401, HTTP_404
+from molten.contrib.sqlalchemy import EngineData
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from database import render_pool_stats
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_local = threading.local()
+
+
+class RequestTimings:
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self._stack: List[List[float]] = []
+
+    def start(self):
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def stop(self, name: str) -> float:
+        started, children = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed - children
+        if self._stack:
+            self._stack[-1][1] += elapsed
+        return elapsed
+
+    def server_timing(self, total: float) -> str:
+        entries = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.phases.items()]
+        entries.append(f'sql;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} queries"')
+        entries.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return getattr(_local, 'timings', None)
+
+
+@contextmanager
+def phase(name: str):
+    timings = current_timings()
+    if timings is None:
+        yield
+        return
+
+    timings.start()
+    try:
+        yield
+    finally:
+        timings.stop(name)
+
+
+def query_budget(limit: int):
+    def decorator(f):
+        f.query_budget = limit
+        return f
+    return decorator
+
+
+def phase_middleware(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def decorator(handler: Callable[..., Any]) -> Callable[..., Any]:
+        def middleware() -> Any:
+            with phase(name):
+                return handler()
+        return middleware
+    return decorator
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if current_timings() is not None:
+        conn.info.setdefault('statement_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    timings = current_timings()
+    started = conn.info.get('statement_started')
+    if timings is None or not started:
+        return
+
+    timings.sql_count += 1
+    timings.sql_time += time.perf_counter() - started.pop()
+
+
+class Metrics:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], List[float]] = {}
+        self.phases: Dict[Tuple[str, str], float] = {}
+        self.sql: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, method: str, status: int, total: float, timings: RequestTimings):
+        with self._lock:
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            histogram = self.latency.setdefault((route, method), [0] * (len(self.buckets) + 1) + [0.0])
+            histogram[bisect_left(self.buckets, total)] += 1
+            histogram[-1] += total
+
+            for name, seconds in timings.phases.items():
+                self.phases[(route, name)] = self.phases.get((route, name), 0.0) + seconds
+
+            sql = self.sql.setdefault(route, [0, 0.0])
+            sql[0] += timings.sql_count
+            sql[1] += timings.sql_time
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                '# HELP doit_process_info The process that answered this scrape.',
+                '# TYPE doit_process_info gauge',
+                f'doit_process_info{{pid="{os.getpid()}"}} 1',
+                '# HELP doit_requests_total Requests handled, by route, method and status.',
+                '# TYPE doit_requests_total counter',
+            ]
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'doit_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}')
+
+            lines.append('# HELP doit_request_duration_seconds Time spent handling requests.')
+            lines.append('# TYPE doit_request_duration_seconds histogram')
+            for (route, method), histogram in sorted(self.latency.items()):
+                labels = f'route="{route}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), histogram):
+                    cumulative += count
+                    lines.append(f'doit_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'doit_request_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}')
+                lines.append(f'doit_request_duration_seconds_count{{{labels}}} {cumulative}')
+
+            lines.append('# HELP doit_phase_seconds_total Exclusive time spent in each request phase.')
+            lines.append('# TYPE doit_phase_seconds_total counter')
+            for (route, name), seconds in sorted(self.phases.items()):
+                lines.append(f'doit_phase_seconds_total{{route="{route}",phase="{name}"}} {seconds:.6f}')
+
+            lines.append('# HELP doit_sql_statements_total SQL statements executed while handling requests.')
+            lines.append('# TYPE doit_sql_statements_total counter')
+            for route, (count, _) in sorted(self.sql.items()):
+                lines.append(f'doit_sql_statements_total{{route="{route}"}} {count}')
+
+            lines.append('# HELP doit_sql_seconds_total Time spent executing SQL statements.')
+            lines.append('# TYPE doit_sql_seconds_total counter')
+            for route, (_, seconds) in sorted(self.sql.items()):
+                lines.append(f'doit_sql_seconds_total{{route="{route}"}} {seconds:.6f}')
+
+        return '\n'.join(lines) + '\n'
+
+
+class Profiler:
+    def __init__(self, directory: str, sample_rate: float = 0.0, keep: int = 10):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.slowest: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        # Only one profile runs at a time; overlapping profilers in one
+        # process interfere with each other.
+        self._active = threading.Lock()
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def run(self, name: str, handler: Callable[[], Any]) -> Any:
+        if not self._active.acquire(blocking=False):
+            return handler()
+
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            return profile.runcall(handler)
+        finally:
+            self._active.release()
+            self.record(name, time.perf_counter() - started, profile)
+
+    def record(self, name: str, elapsed: float, profile: cProfile.Profile):
+        with self._lock:
+            if len(self.slowest) >= self.keep and elapsed <= self.slowest[0][0]:
+                return
+
+            os.makedirs(self.directory, exist_ok=True)
+            filename = os.path.join(self.directory, f'{int(elapsed * 1000):06d}ms-{name}-{time.time():.6f}.prof')
+            profile.dump_stats(filename)
+            heapq.heappush(self.slowest, (elapsed, filename))
+            while len(self.slowest) > self.keep:
+                _, evicted = heapq.heappop(self.slowest)
+                os.remove(evicted)
+
+
+class Instrumentation:
+    def __init__(self, metrics: Metrics, profiler: Optional[Profiler] = None, warn_over_budget: bool = False):
+        self.metrics = metrics
+        self.profiler = profiler
+        self.warn_over_budget = warn_over_budget
+
+
+class InstrumentationComponent:
+    is_cacheable = True
+    is_singleton = True
+
+    def can_handle_parameter(self, parameter: Parameter) -> bool:
+        return parameter.annotation is Instrumentation
+
+    def resolve(self, settings: Settings) -> Instrumentation:
+        profiler = None
+        if settings.get('profile_sample_rate'):
+            profiler = Profiler(
+                settings.get('profile_dir', 'profiles'),
+                sample_rate=settings['profile_sample_rate'],
+                keep=settings.get('profile_keep', 10),
+            )
+        return Instrumentation(Metrics(), profiler, warn_over_budget=settings.get('query_budget_warnings', False))
+
+
+def route_label(route: Optional[Route]) -> str:
+    if route is None:
+        return 'unmatched'
+    return route.name or route.template
+
+
+def timing_middleware(handler: Callable[..., Any]) -> Callable[..., Any]:
+    def middleware(route: Optional[Route], request: Request, instrumentation: Instrumentation) -> Any:
+        timings = _local.timings = RequestTimings()
+        label = route_label(route)
+        status = 500
+        started = time.perf_counter()
+        timings.start()
+        try:
+            profiler = instrumentation.profiler
+            if profiler is not None and profiler.should_sample():
+                response = profiler.run(label, handler)
+            else:
+                response = handler()
+            status = int(response.status.split(' ', 1)[0])
+        finally:
+            timings.stop('render')
+            total = time.perf_counter() - started
+            _local.timings = None
+            instrumentation.metrics.observe(label, request.method, status, total, timings)
+
+        budget = getattr(route.handler, 'query_budget', None) if route else None
+        if instrumentation.warn_over_budget and budget is not None and timings.sql_count > budget:
+            logger.warning(
+                '%s %s ran %d queries, over its budget of %d',
+                request.method, label, timings.sql_count, budget,
+            )
+
+        response.headers.add('server-timing', timings.server_timing(total))
+        return response
+
+    return middleware
+
+
+def metrics(
+    instrumentation: Instrumentation,
+    engine_data: EngineData,
+    settings: Settings,
+    authorization: Optional[Header],
+) -> Response:
+    # Off unless METRICS_TOKEN is set, and then only for scrapers sending it
+    # as a bearer token.  The numbers are per process: under gunicorn each
+    # scrape is answered by whichever worker picks it up (doit_process_info
+    # says which), so they describe that worker, not the whole server.
+    token = settings.get('metrics_token')
+    if not token:
+        return Response(HTTP_404, content='Not Found')
+    if not hmac.compare_digest((authorization or '').encode('utf-8'), f'Bearer {token}'.encode('utf-8')):
+        return Response(HTTP_401, content='Unauthorized')
+
+    return Response(
+        HTTP_200,
+        content=instrumentation.metrics.render() + render_pool_stats(engine_data.engine),
+        headers={'Content-Type': 'text/plain; version=0.0.4'},
+    )
@@ -0,0 +1,83 @@
+from inspect import Parameter
+from typing import Optional
+
+from molten import Settings
+
+import events
+from cache import LRUCache
+
+
+class LocalCacheBackend:
+    def __init__(self, max_size: int = 4096):
+        self.cache = LRUCache(max_size=max_size)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.cache.set(key, value, expires_at=self.cache.clock() + ttl)
+
+    def delete(self, key: str):
+        self.cache.delete(key)
+
+
+class RedisCacheBackend:
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> 'RedisCacheBackend':
+        import redis
+        return cls(redis.StrictRedis.from_url(url))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(key, value, px=max(int(ttl * 1000), 1))
+
+    def delete(self, key: str):
+        self.client.delete(key)
+
+
+class UpcomingCache:
+    def __init__(self, backend, max_ttl: float = 30, prefix: str = 'upcoming:'):
+        self.backend = backend
+        self.max_ttl = max_ttl
+        self.prefix = prefix
+        events.subscribe(self.invalidate)
+
+    def get(self, owner_id: str, version: str) -> Optional[bytes]:
+        # Entries carry the version stamp they were built from: changes made
+        # by another process never reach invalidate() here, but they do move
+        # the stamp, so a stale body is never served under a fresh ETag.
+        entry = self.backend.get(self.prefix + owner_id)
+        if entry is None:
+            return None
+        entry_version, _, payload = entry.partition(b'\n')
+        return payload if entry_version == version.encode('ascii') else None
+
+    def set(self, owner_id: str, version: str, payload: bytes, ttl: Optional[float] = None):
+        ttl = self.max_ttl if ttl is None else min(ttl, self.max_ttl)
+        if ttl > 0:
+            self.backend.set(self.prefix + owner_id, version.encode('ascii') + b'\n' + payload, ttl)
+
+    def invalidate(self, owner_id: str):
+        self.backend.delete(self.prefix + owner_id)
+
+
+class UpcomingCacheComponent:
+    is_cacheable = True
+    is_singleton = True
+
+    def can_handle_parameter(self, parameter: Parameter) -> bool:
+        return parameter.annotation is UpcomingCache
+
+    def resolve(self, settings: Settings) -> UpcomingCache:
+        url = settings.get('upcoming_cache_url')
+        if url:
+            backend = RedisCacheBackend.from_url(url)
+        else:
+            backend = LocalCacheBackend(max_size=settings.get('upcoming_cache_size', 4096))
+
+        return UpcomingCache(backend, max_ttl=settings.get('upcoming_cache_ttl', 30))
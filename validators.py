@@ -1,7 +1,11 @@
 import pendulum
+from molten import FieldValidationError
 from molten.validation.field import Validator
 
 
 class PendulumValidator(Validator):
     def validate(self, value):
-        return pendulum.parse(value)
+        try:
+            return pendulum.parse(value)
+        except (ValueError, TypeError):
+            raise FieldValidationError('invalid date')